@@ -93,7 +93,11 @@ def chat(
     service: ChatService = Depends(get_chat_service),
 ) -> ChatResponse:
     try:
-        result = service.run(session_id=session_id, prompt=payload.message)
+        result = service.run(
+            session_id=session_id,
+            prompt=payload.message,
+            rag_filters=payload.rag_filters,
+        )
     except SessionNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     except ChatExecutionError as exc:
@@ -108,7 +112,13 @@ def chat_stream(
     service: ChatService = Depends(get_chat_service),
 ) -> StreamingResponse:
     try:
-        event_iterator = iter(service.run_stream(session_id=session_id, prompt=payload.message))
+        event_iterator = iter(
+            service.run_stream(
+                session_id=session_id,
+                prompt=payload.message,
+                rag_filters=payload.rag_filters,
+            )
+        )
         first_event = next(event_iterator)
     except SessionNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 class ChatRequest(BaseModel):
     message: str
+    rag_filters: dict[str, str | list[str]] | None = None
 
 
 class ChatResponse(BaseModel):
@@ -168,7 +168,9 @@ class ChatService:
             return [initial_state.merge(answer=answer, error=error)]
         raise AttributeError("runtime does not implement run_stream or run")
 
-    def run(self, session_id: str, prompt: str) -> ChatResult:
+    def run(
+        self, session_id: str, prompt: str, rag_filters: dict | None = None
+    ) -> ChatResult:
         session = self._session_repo.get(session_id)
         if session is None:
             raise SessionNotFoundError("session not found")
@@ -197,7 +199,13 @@ class ChatService:
                 recorder = self._recorder_factory(session_id, run_id)
                 runtime = self._runtime_factory.create(recorder=recorder)
                 try:
-                    result = runtime.run(AgentState(prompt=prompt, prompt_history=prompt_history))
+                    result = runtime.run(
+                        AgentState(
+                            prompt=prompt,
+                            prompt_history=prompt_history,
+                            rag_filters=rag_filters,
+                        )
+                    )
                 except Exception as exc:
                     span.record_exception(exc)
                     self._logger.exception("chat run runtime failed")
@@ -255,7 +263,7 @@ class ChatService:
             )
             clear_log_context()
 
-    def run_stream(self, session_id: str, prompt: str):
+    def run_stream(self, session_id: str, prompt: str, rag_filters: dict | None = None):
         session = self._session_repo.get(session_id)
         if session is None:
             raise SessionNotFoundError("session not found")
@@ -307,12 +315,17 @@ class ChatService:
                     def worker():
                         try:
                             answer_emitted = False
-                            last_state = AgentState(prompt=prompt, prompt_history=prompt_history)
+                            last_state = AgentState(
+                                prompt=prompt,
+                                prompt_history=prompt_history,
+                                rag_filters=rag_filters,
+                            )
                             for state in self._runtime_states(
                                 runtime,
                                 AgentState(
                                     prompt=prompt,
                                     prompt_history=prompt_history,
+                                    rag_filters=rag_filters,
                                     llm_stream_callback=on_llm_delta,
                                 ),
                             ):
@@ -1,3 +1,4 @@
+import logging
 import os
 
 from opscopilot_agent_runtime import (
@@ -11,6 +12,7 @@ from opscopilot_agent_runtime import (
     LlmPlanner,
     MCPClient,
     PlannerNode,
+    RagRetriever,
     ScopeCheckNode,
     ScopeClassifier,
     ToolExecutorNode,
@@ -19,6 +21,8 @@ from opscopilot_agent_runtime import (
 from opscopilot_agent_runtime.persistence import AgentRunRecorder
 from opscopilot_llm_gateway.providers.bedrock import BedrockProvider, build_bedrock_client
 
+logger = logging.getLogger(__name__)
+
 
 def _read_int(name: str, default_value: int) -> int:
     value = os.getenv(name)
@@ -30,14 +34,29 @@ def _read_int(name: str, default_value: int) -> int:
         raise RuntimeError(f"{name} must be an integer") from exc
 
 
+def _shared_rag_retriever() -> RagRetriever | None:
+    try:
+        return RagRetriever.shared()
+    except Exception as exc:
+        logger.info("RAG retriever unavailable: %s", exc)
+        return None
+
+
 class RuntimeFactory:
     def create(self, recorder: AgentRunRecorder) -> AgentRuntime:
         provider = BedrockProvider(build_bedrock_client())
         client = MCPClient.from_env()
+        rag_retriever = _shared_rag_retriever()
         graph = AgentGraph(
             tool_registry=ToolRegistry(client=client),
-            scope_check=ScopeCheckNode(classifier=ScopeClassifier.from_env(provider=provider, recorder=recorder)),
-            planner=PlannerNode(llm_planner=LlmPlanner.from_env(provider=provider, recorder=recorder)),
+            scope_check=ScopeCheckNode(
+                classifier=ScopeClassifier.from_env(provider=provider, recorder=recorder),
+                rag_retriever=rag_retriever,
+            ),
+            planner=PlannerNode(
+                llm_planner=LlmPlanner.from_env(provider=provider, recorder=recorder),
+                rag_retriever=rag_retriever,
+            ),
             clarifier=ClarifierNode(clarifier=LlmClarifier.from_env(provider=provider)),
             tool_executor=ToolExecutorNode(client=client, recorder=recorder),
             answer=AnswerNode(synthesizer=AnswerSynthesizer.from_env(provider=provider, recorder=recorder)),
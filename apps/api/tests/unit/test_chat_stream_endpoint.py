@@ -5,7 +5,7 @@ from opscopilot_api.services.chat_service import SessionNotFoundError
 
 
 class _FakeStreamService:
-    def run_stream(self, session_id: str, prompt: str):
+    def run_stream(self, session_id: str, prompt: str, rag_filters: dict | None = None):
         if session_id == "missing":
             raise SessionNotFoundError("session not found")
         yield {
@@ -32,7 +32,7 @@ class _FakeStreamService:
 
 
 class _CrashStreamService:
-    def run_stream(self, session_id: str, prompt: str):
+    def run_stream(self, session_id: str, prompt: str, rag_filters: dict | None = None):
         yield {
             "type": "agent_run.started",
             "timestamp": "2026-01-01T00:00:00+00:00",
@@ -44,7 +44,9 @@ class _CrashStreamService:
 
 
 class _ClarifyStreamService:
-    def run_stream(self, session_id: str, prompt: str):  # noqa: ARG002
+    def run_stream(  # noqa: ARG002
+        self, session_id: str, prompt: str, rag_filters: dict | None = None
+    ):
         yield {
             "type": "agent_run.started",
             "timestamp": "2026-01-01T00:00:00+00:00",
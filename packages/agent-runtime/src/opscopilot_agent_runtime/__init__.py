@@ -11,6 +11,7 @@ from .nodes.planner_node import Plan, PlanStep, PlannerNode, plan
 from .runtime import AgentRuntime
 from .nodes.tool_executor_node import ToolExecutorNode, ToolResult, execute_plan
 from .nodes.scope_check_node import ScopeCheckNode
+from .runtime.rag import RagContext, RagRetriever
 from .state import AgentState
 from .persistence import AgentRunRecorder
 
@@ -41,5 +42,7 @@ __all__ = [
     "AgentRunRecorder",
     "AgentState",
     "ScopeCheckNode",
+    "RagContext",
+    "RagRetriever",
     "ToolRegistry",
 ]
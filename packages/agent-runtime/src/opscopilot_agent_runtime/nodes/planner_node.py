@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 from opscopilot_agent_runtime.runtime.events import AgentEvent
 from opscopilot_agent_runtime.runtime.logging import get_logger
 from opscopilot_agent_runtime.mcp_client import MCPTool
-from opscopilot_agent_runtime.runtime.rag import RagRetriever
+from opscopilot_agent_runtime.runtime.rag import RagRetriever, rag_queries
 from opscopilot_agent_runtime.state import AgentState
 
 if TYPE_CHECKING:
@@ -50,7 +50,7 @@ class PlannerNode:
         self._llm_planner = llm_planner
         if rag_retriever is None:
             try:
-                rag_retriever = RagRetriever.from_env()
+                rag_retriever = RagRetriever.shared()
             except Exception as exc:
                 logger = get_logger(__name__)
                 logger.info("Exception creating Rag retriever: %s", exc)
@@ -72,9 +72,10 @@ class PlannerNode:
         if next_state.prompt and self._rag_retriever and next_state.rag is None:
             try:
                 logger.debug("planner: retrieving rag context")
-                rag_context = self._rag_retriever.retrieve(
-                    next_state.prompt,
+                rag_context = self._rag_retriever.retrieve_many(
+                    rag_queries(next_state.prompt, next_state.prompt_history),
                     recorder=next_state.recorder,
+                    filters=next_state.rag_filters,
                 )
                 next_state = next_state.merge(rag=rag_context)
             except Exception as exc:
@@ -3,7 +3,7 @@ from __future__ import annotations
 from opscopilot_agent_runtime.llm.scope import ScopeClassifier
 from opscopilot_agent_runtime.runtime.events import AgentEvent
 from opscopilot_agent_runtime.runtime.logging import get_logger
-from opscopilot_agent_runtime.runtime.rag import RagRetriever
+from opscopilot_agent_runtime.runtime.rag import RagRetriever, rag_queries
 from opscopilot_agent_runtime.state import AgentState
 
 
@@ -16,7 +16,7 @@ class ScopeCheckNode:
         self._classifier = classifier
         if rag_retriever is None:
             try:
-                rag_retriever = RagRetriever.from_env()
+                rag_retriever = RagRetriever.shared()
             except Exception:
                 rag_retriever = None
         self._rag_retriever = rag_retriever
@@ -37,9 +37,10 @@ class ScopeCheckNode:
         if next_state.prompt and self._rag_retriever and next_state.rag is None:
             try:
                 logger.debug("scope_check: retrieving rag context")
-                rag_context = self._rag_retriever.retrieve(
-                    next_state.prompt,
+                rag_context = self._rag_retriever.retrieve_many(
+                    rag_queries(next_state.prompt, next_state.prompt_history),
                     recorder=next_state.recorder,
+                    filters=next_state.rag_filters,
                 )
                 next_state = next_state.merge(rag=rag_context)
             except Exception:
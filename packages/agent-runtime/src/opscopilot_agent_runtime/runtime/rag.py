@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
 
 from opentelemetry import metrics, trace
+from opscopilot_rag.chunking import estimate_tokens
 from opscopilot_rag.citations import build_citations
-from opscopilot_rag.embeddings import OpenAIEmbeddingAdapter
-from opscopilot_rag.opensearch_client import OpenSearchClient
-from opscopilot_rag.retrieval import retrieve_knn
-from opscopilot_rag.types import EmbeddingRequest, OpenSearchConfig, \
-  RetrievalResult, Citation
+from opscopilot_rag.context import assemble_context, context_assembly_config_from_env, \
+  format_context_line
+from opscopilot_rag.fusion import reciprocal_rank_fusion
+from opscopilot_rag.filters import NormalizedFilters, normalize_filters
+from opscopilot_rag.embeddings import CachedEmbeddingAdapter, EmbeddingAdapter, \
+  OpenAIEmbeddingAdapter, embedding_cache_from_env
+from opscopilot_rag.backends import OpenSearchBackend, RetrievalBackend, \
+  retrieval_backend_from_env
+from opscopilot_rag.query_cache import normalize_query, query_cache_from_env
+from opscopilot_rag.types import ContextAssemblyConfig, EmbeddingRequest, \
+  OpenSearchConfig, RetrievalResult, Citation
 
 from opscopilot_agent_runtime.runtime.logging import get_logger
 
@@ -26,6 +38,45 @@ class RagContext:
   citations: list[Citation]
 
 
+_shared_lock = threading.Lock()
+_shared_retriever: "RagRetriever | None" = None
+_shared_error: Exception | None = None
+
+
+def _read_max_queries() -> int:
+  raw = os.getenv("RAG_MAX_SUBQUERIES", "3")
+  try:
+    return max(1, int(raw or "3"))
+  except ValueError as exc:
+    raise RuntimeError("RAG_MAX_SUBQUERIES must be an integer") from exc
+
+
+def rag_queries(
+    prompt: str | None,
+    history: Sequence[str] | None = None,
+    limit: int | None = None,
+) -> list[str]:
+  turns = [turn for turn in (history or []) if turn and turn.strip()]
+  if not turns:
+    return [prompt] if prompt else []
+  limit = limit or _read_max_queries()
+  if len(turns) <= limit:
+    return list(reversed(turns))
+  if limit == 1:
+    return [turns[-1]]
+  return [*reversed(turns[-(limit - 1):]), turns[0]]
+
+
+def _distinct_queries(queries: Sequence[str]) -> list[str]:
+  distinct: dict[str, str] = {}
+  for query in queries:
+    if query and query.strip():
+      distinct.setdefault(normalize_query(query), query)
+  if not distinct:
+    raise ValueError("at least one non-empty query is required")
+  return list(distinct.values())
+
+
 def _read_top_k() -> int:
   raw = os.getenv("RAG_TOP_K", "3")
   try:
@@ -35,54 +86,262 @@ def _read_top_k() -> int:
 
 
 class RagRetriever:
-  def __init__(self, config: OpenSearchConfig, top_k: int) -> None:
-    self._config = config
+  def __init__(
+      self,
+      config: OpenSearchConfig | None,
+      top_k: int,
+      embedding_adapter: EmbeddingAdapter | None = None,
+      backend: RetrievalBackend | None = None,
+      assembly: ContextAssemblyConfig | None = None,
+  ) -> None:
+    self._backend = backend or OpenSearchBackend.from_config(config)
+    self._index = self._backend.name
     self._top_k = top_k
-    self._client = OpenSearchClient(config).client
-    self._adapter = OpenAIEmbeddingAdapter()
+    self._assembly = assembly or ContextAssemblyConfig(
+        candidates=top_k, max_chunks=top_k, token_budget=0, mmr_lambda=1.0,
+        merge_neighbors=False)
+    self._embedding_adapter = embedding_adapter or OpenAIEmbeddingAdapter()
+    self._embedding_cache = embedding_cache_from_env()
+    self._query_embedders = threading.local()
+    self._query_cache = query_cache_from_env()
     meter = metrics.get_meter("opscopilot_agent_runtime.rag")
     self._rag_retrieval_requests_total = meter.create_counter("rag_retrieval_requests_total")
     self._rag_retrieval_latency_ms = meter.create_histogram("rag_retrieval_latency_ms")
     self._rag_retrieved_chunks_total = meter.create_counter("rag_retrieved_chunks_total")
+    self._rag_context_tokens = meter.create_histogram("rag_context_tokens")
+    self._rag_retrieval_cache_hits_total = meter.create_counter("rag_retrieval_cache_hits_total")
+    self._rag_retrieval_cache_misses_total = meter.create_counter(
+        "rag_retrieval_cache_misses_total")
+    self._rag_index_search_latency_ms = meter.create_histogram("rag_index_search_latency_ms")
+    self._rag_index_hits_total = meter.create_counter("rag_index_hits_total")
+    self._backend.observe(self._record_index_search)
 
   @staticmethod
   def from_env() -> "RagRetriever":
-    return RagRetriever(OpenSearchClient().config, _read_top_k())
+    top_k = _read_top_k()
+    return RagRetriever(
+        None,
+        top_k,
+        backend=retrieval_backend_from_env(),
+        assembly=context_assembly_config_from_env(top_k),
+    )
 
-  def retrieve(self, query: str, recorder: "AgentRunRecorder | None" = None) -> RagContext:
-    logger = get_logger(__name__)
-    tracer = trace.get_tracer("opscopilot_agent_runtime.rag")
+  @staticmethod
+  def shared() -> "RagRetriever":
+    global _shared_retriever, _shared_error
+    with _shared_lock:
+      if _shared_error is not None:
+        raise _shared_error
+      if _shared_retriever is None:
+        try:
+          _shared_retriever = RagRetriever.from_env()
+        except Exception as exc:
+          _shared_error = exc
+          raise
+        get_logger(__name__).info(
+            "Created shared RAG retriever index=%s", _shared_retriever._index
+        )
+      return _shared_retriever
+
+  @staticmethod
+  def reset_shared() -> None:
+    global _shared_retriever, _shared_error
+    with _shared_lock:
+      _shared_retriever = None
+      _shared_error = None
+
+  def retrieve(
+      self,
+      query: str,
+      recorder: "AgentRunRecorder | None" = None,
+      filters: dict | None = None,
+  ) -> RagContext:
+    return self.retrieve_many([query], recorder=recorder, filters=filters)
+
+  def retrieve_many(
+      self,
+      queries: Sequence[str],
+      recorder: "AgentRunRecorder | None" = None,
+      filters: dict | None = None,
+  ) -> RagContext:
+    queries = _distinct_queries(queries)
+    filters = normalize_filters(filters)
     started = time.perf_counter()
+    with self._start_span(queries, recorder, filters) as span:
+      cached = self._lookup_cached(queries, filters, span, started)
+      if cached is not None:
+        return cached
+      vectors = self._embed_queries(queries)
+      if len(queries) == 1:
+        candidate_lists = [self._backend.search(
+            vectors[0],
+            self._candidate_count(),
+            query_text=queries[0],
+            include_vectors=self._assembly.mmr_lambda < 1.0,
+            filters=self._search_filters(filters),
+        )]
+      else:
+        candidate_lists = self._backend.search_many(
+            vectors,
+            self._candidate_count(),
+            query_texts=queries,
+            include_vectors=self._assembly.mmr_lambda < 1.0,
+            filters=self._search_filters(filters),
+        )
+      return self._build_context(queries, filters, vectors, candidate_lists, span, started)
+
+  async def aretrieve(
+      self,
+      query: str,
+      recorder: "AgentRunRecorder | None" = None,
+      filters: dict | None = None,
+  ) -> RagContext:
+    return await self.aretrieve_many([query], recorder=recorder, filters=filters)
+
+  async def aretrieve_many(
+      self,
+      queries: Sequence[str],
+      recorder: "AgentRunRecorder | None" = None,
+      filters: dict | None = None,
+  ) -> RagContext:
+    queries = _distinct_queries(queries)
+    filters = normalize_filters(filters)
+    started = time.perf_counter()
+    with self._start_span(queries, recorder, filters) as span:
+      span.set_attribute("async", True)
+      cached = await asyncio.to_thread(self._lookup_cached, queries, filters, span, started)
+      if cached is not None:
+        return cached
+      vectors = await asyncio.to_thread(self._embed_queries, queries)
+      if len(queries) == 1:
+        candidate_lists = [await self._backend.asearch(
+            vectors[0],
+            self._candidate_count(),
+            query_text=queries[0],
+            include_vectors=self._assembly.mmr_lambda < 1.0,
+            filters=self._search_filters(filters),
+        )]
+      else:
+        candidate_lists = await self._backend.asearch_many(
+            vectors,
+            self._candidate_count(),
+            query_texts=queries,
+            include_vectors=self._assembly.mmr_lambda < 1.0,
+            filters=self._search_filters(filters),
+        )
+      return self._build_context(queries, filters, vectors, candidate_lists, span, started)
+
+  async def aclose(self) -> None:
+    await self._backend.aclose()
+
+  def _record_index_search(self, index: str, latency_ms: float, hits: int) -> None:
+    attributes = {"index": index}
+    self._rag_index_search_latency_ms.record(latency_ms, attributes)
+    self._rag_index_hits_total.add(hits, attributes)
+
+  def _candidate_count(self) -> int:
+    return max(self._assembly.candidates, self._top_k)
+
+  @staticmethod
+  def _search_filters(filters: NormalizedFilters) -> dict | None:
+    return {key: list(values) for key, values in filters} or None
+
+  @contextmanager
+  def _start_span(
+      self,
+      queries: list[str],
+      recorder: "AgentRunRecorder | None",
+      filters: NormalizedFilters = (),
+  ):
+    tracer = trace.get_tracer("opscopilot_agent_runtime.rag")
     with tracer.start_as_current_span("rag.retrieve") as span:
-      span.set_attribute("index", self._config.index)
+      span.set_attribute("index", self._index)
       span.set_attribute("top_k", self._top_k)
-      span.set_attribute("query_length", len(query))
-      self._rag_retrieval_requests_total.add(1, {"index": self._config.index})
+      span.set_attribute("queries", len(queries))
+      span.set_attribute("query_length", sum(len(query) for query in queries))
+      span.set_attribute("filters", ",".join(key for key, _ in filters))
+      self._rag_retrieval_requests_total.add(1, {"index": self._index})
       if recorder:
         span.set_attribute("session_id", recorder.session_id)
         span.set_attribute("agent_run_id", recorder.run_id)
-      logger.info(
-          "RAG RETRIEVE query %s index=%s top_k=%d", query, self._config.index,
+      get_logger(__name__).info(
+          "RAG RETRIEVE query %s index=%s top_k=%d", " | ".join(queries), self._index,
           self._top_k
       )
-      embeddings = self._adapter.embed(EmbeddingRequest(texts=[query]))
-      vector = embeddings.vectors[0]
-      results = retrieve_knn(self._client, self._config.index, vector,
-                             self._top_k)
-      citations = build_citations(results)
-      context_lines = []
-      for result in results:
-        context_lines.append(f"[{result.source}] {result.text}")
-      span.set_attribute("retrieved_chunks", len(results))
-      self._rag_retrieved_chunks_total.add(len(results), {"index": self._config.index})
+      yield span
+
+  def _lookup_cached(
+      self, queries: list[str], filters: NormalizedFilters, span, started: float
+  ) -> RagContext | None:
+    cached = self._cached_context(queries, filters)
+    span.set_attribute("cache_hit", cached is not None)
+    if cached is not None:
       self._rag_retrieval_latency_ms.record(
           (time.perf_counter() - started) * 1000.0,
-          {"index": self._config.index},
+          {"index": self._index, "cache_hit": True},
       )
-      logger.debug(
-          "rag retrieved %d chunks index=%s top_k=%d",
-          len(results),
-          self._config.index,
-          self._top_k,
-      )
-      return RagContext(text="\n".join(context_lines), results=results, citations=citations)
+      get_logger(__name__).debug("rag query cache hit index=%s top_k=%d", self._index,
+                                 self._top_k)
+    return cached
+
+  def _query_embedder(self) -> CachedEmbeddingAdapter:
+    local = self._query_embedders
+    if not hasattr(local, "embedder"):
+      local.adapter = self._embedding_adapter.fork()
+      local.embedder = CachedEmbeddingAdapter(local.adapter, self._embedding_cache)
+    local.adapter.reset_budget()
+    return local.embedder
+
+  def _embed_queries(self, queries: list[str]) -> np.ndarray:
+    return self._query_embedder().embed(EmbeddingRequest(texts=list(queries), input_type="query")).vectors
+
+  def _build_context(
+      self,
+      queries: list[str],
+      filters: NormalizedFilters,
+      vectors: np.ndarray,
+      candidate_lists: list[list[RetrievalResult]],
+      span,
+      started: float,
+  ) -> RagContext:
+    if len(candidate_lists) == 1:
+      candidates, vector = candidate_lists[0], vectors[0]
+    else:
+      candidates = reciprocal_rank_fusion(candidate_lists, limit=self._candidate_count())
+      normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+      vector = normalized.mean(axis=0)
+    results = assemble_context(vector, candidates, self._assembly)
+    citations = build_citations(results)
+    text = "\n".join(format_context_line(result) for result in results)
+    span.set_attribute("candidate_chunks", len(candidates))
+    span.set_attribute("retrieved_chunks", len(results))
+    self._rag_context_tokens.record(estimate_tokens(text), {"index": self._index})
+    self._rag_retrieved_chunks_total.add(len(results), {"index": self._index})
+    self._rag_retrieval_latency_ms.record(
+        (time.perf_counter() - started) * 1000.0,
+        {"index": self._index, "cache_hit": False},
+    )
+    get_logger(__name__).debug(
+        "rag retrieved %d chunks index=%s top_k=%d queries=%d",
+        len(results),
+        self._index,
+        self._top_k,
+        len(queries),
+    )
+    context = RagContext(text=text, results=results, citations=citations)
+    self._query_cache.put(self._cache_key(queries, filters), context)
+    return context
+
+  def _cache_key(self, queries: list[str], filters: NormalizedFilters) -> tuple:
+    return (tuple(normalize_query(query) for query in queries), filters, self._index,
+            self._top_k)
+
+  def _cached_context(self, queries: list[str], filters: NormalizedFilters) -> RagContext | None:
+    if not self._query_cache.enabled:
+      return None
+    self._query_cache.refresh_generation(self._backend.generation)
+    cached = self._query_cache.get(self._cache_key(queries, filters))
+    counter = (self._rag_retrieval_cache_hits_total if cached is not None
+               else self._rag_retrieval_cache_misses_total)
+    counter.add(1, {"index": self._index})
+    return cached
@@ -22,6 +22,7 @@ class AgentState:
     tool_results: list[ToolResult] | None = None
     answer: str | None = None
     rag: RagContext | None = None
+    rag_filters: dict | None = None
     citations: list[Citation] | None = None
     namespace: str | None = None
     label_selector: str | None = None
@@ -46,6 +47,7 @@ class AgentState:
             "tool_results": self.tool_results,
             "answer": self.answer,
             "rag": self.rag,
+            "rag_filters": self.rag_filters,
             "citations": self.citations,
             "namespace": self.namespace,
             "label_selector": self.label_selector,
@@ -69,6 +71,7 @@ class AgentState:
             tool_results=payload.get("tool_results"),
             answer=payload.get("answer"),
             rag=payload.get("rag"),
+            rag_filters=payload.get("rag_filters"),
             citations=payload.get("citations"),
             namespace=payload.get("namespace"),
             label_selector=payload.get("label_selector"),
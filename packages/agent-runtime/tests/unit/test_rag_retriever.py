@@ -0,0 +1,359 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+from opscopilot_rag import backends
+from opscopilot_rag.backends import (
+    FederatedBackend,
+    FederatedIndex,
+    OpenSearchBackend,
+    RetrievalBackend,
+)
+from opscopilot_rag.embeddings import EmbeddingAdapter
+from opscopilot_rag.types import (
+    ContextAssemblyConfig,
+    EmbeddingResult,
+    OpenSearchConfig,
+    RetrievalResult,
+)
+
+from opscopilot_agent_runtime.nodes.planner_node import PlannerNode
+from opscopilot_agent_runtime.nodes.scope_check_node import ScopeCheckNode
+from opscopilot_agent_runtime.runtime.rag import RagContext, RagRetriever, rag_queries
+from opscopilot_agent_runtime.state.agent_state import AgentState
+
+
+def test_shared_retriever_is_built_once(monkeypatch):
+    created = []
+
+    def _from_env():
+        created.append(SimpleNamespace(_index="docs"))
+        return created[-1]
+
+    RagRetriever.reset_shared()
+    monkeypatch.setattr(RagRetriever, "from_env", staticmethod(_from_env))
+    try:
+        assert RagRetriever.shared() is RagRetriever.shared()
+        assert len(created) == 1
+    finally:
+        RagRetriever.reset_shared()
+
+
+def test_shared_retriever_caches_construction_failures(monkeypatch):
+    attempts = []
+
+    def _from_env():
+        attempts.append(1)
+        raise RuntimeError("OPENSEARCH_URL is not set")
+
+    RagRetriever.reset_shared()
+    monkeypatch.setattr(RagRetriever, "from_env", staticmethod(_from_env))
+    try:
+        assert ScopeCheckNode()._rag_retriever is None
+        assert PlannerNode()._rag_retriever is None
+        assert len(attempts) == 1
+    finally:
+        RagRetriever.reset_shared()
+
+
+def test_nodes_fall_back_to_shared_retriever(monkeypatch):
+    shared = object()
+    monkeypatch.setattr(RagRetriever, "shared", staticmethod(lambda: shared))
+    assert ScopeCheckNode()._rag_retriever is shared
+    assert PlannerNode()._rag_retriever is shared
+
+
+class FakeEmbeddingAdapter(EmbeddingAdapter):
+    def __init__(self):
+        self.calls = 0
+        self.resets = 0
+        self.model = "fake"
+
+    def reset_budget(self):
+        self.resets += 1
+
+    def embed(self, request):
+        self.calls += 1
+        self.texts = list(request.texts)
+        return EmbeddingResult(
+            vectors=np.ones((len(request.texts), 2), dtype=np.float32),
+            model_id="fake",
+            dimensions=2,
+        )
+
+
+class FakeBackend(RetrievalBackend):
+    name = "docs"
+
+    def __init__(self, results):
+        self.results = results
+        self.searches = 0
+        self.filters = []
+
+    def search(self, vector, top_k, query_text=None, include_vectors=False, filters=None):
+        self.searches += 1
+        self.filters.append(filters)
+        return self.results[:top_k]
+
+    def search_many(
+        self, vectors, top_k, query_texts=None, include_vectors=False, filters=None
+    ):
+        self.searches += 1
+        self.filters.append(filters)
+        return [self.results[position::2][:top_k] for position in range(len(vectors))]
+
+    def generation(self):
+        return "g1"
+
+
+def test_retrieve_serves_repeated_queries_from_cache():
+    result = RetrievalResult(
+        document_id="doc",
+        chunk_id="doc::chunk-0",
+        chunk_index=0,
+        source="runbook.md",
+        text="restart the deployment",
+        metadata={},
+        score=1.0,
+    )
+    backend = FakeBackend([result])
+    adapter = FakeEmbeddingAdapter()
+    retriever = RagRetriever(None, top_k=3, embedding_adapter=adapter, backend=backend)
+    first = retriever.retrieve("How do I restart a deployment?")
+    second = retriever.retrieve("how do i restart a deployment")
+    assert second is first
+    assert backend.searches == 1
+    assert adapter.calls == 1
+
+
+def test_retrieve_assembles_context_from_candidates():
+    results = [
+        RetrievalResult(
+            document_id="doc",
+            chunk_id=f"doc::chunk-{i}",
+            chunk_index=i,
+            source="runbook.md",
+            text=f"step {i}",
+            metadata={},
+            score=1.0 - i / 10,
+        )
+        for i in range(6)
+    ]
+    backend = FakeBackend(results)
+    retriever = RagRetriever(
+        None,
+        top_k=2,
+        embedding_adapter=FakeEmbeddingAdapter(),
+        backend=backend,
+        assembly=ContextAssemblyConfig(candidates=6, max_chunks=2, mmr_lambda=1.0),
+    )
+    context = retriever.retrieve("restart")
+    assert context.text == "[runbook.md] step 0\nstep 1"
+    assert context.results[0].metadata["merged_chunk_ids"] == ["doc::chunk-0", "doc::chunk-1"]
+
+
+def test_aretrieve_uses_backend_async_search():
+    result = RetrievalResult(
+        document_id="doc",
+        chunk_id="doc::chunk-0",
+        chunk_index=0,
+        source="runbook.md",
+        text="restart the deployment",
+        metadata={},
+        score=1.0,
+    )
+    backend = FakeBackend([result])
+    retriever = RagRetriever(
+        None, top_k=3, embedding_adapter=FakeEmbeddingAdapter(), backend=backend
+    )
+    context = asyncio.run(retriever.aretrieve("restart"))
+    assert context.text == "[runbook.md] restart the deployment"
+    assert asyncio.run(retriever.aretrieve("Restart?")) is context
+    assert backend.searches == 1
+
+
+class LoopBoundSearchClient:
+    def __init__(self):
+        self.loop = None
+        self.closed = False
+
+    async def search(self, index, body):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError("attached to a different loop")
+        return {"hits": {"hits": [{"_score": 1.0, "_source": {"chunk_id": "doc::chunk-0"}}]}}
+
+    async def close(self):
+        self.closed = True
+
+
+def test_aretrieve_works_across_consecutive_event_loops(monkeypatch):
+    clients = []
+
+    def _async_client(config):
+        clients.append(LoopBoundSearchClient())
+        return SimpleNamespace(client=clients[-1])
+
+    monkeypatch.setattr(backends, "AsyncOpenSearchClient", _async_client)
+    backend = OpenSearchBackend(
+        None, "docs", config=OpenSearchConfig(url="http://localhost:9200", index="docs")
+    )
+    retriever = RagRetriever(
+        None, top_k=1, embedding_adapter=FakeEmbeddingAdapter(), backend=backend
+    )
+    first = asyncio.run(retriever.aretrieve("restart"))
+    second = asyncio.run(retriever.aretrieve("rollback"))
+    assert first.results[0].chunk_id == second.results[0].chunk_id == "doc::chunk-0"
+    assert len(clients) == 2
+
+    async def _retrieve_and_close():
+        await retriever.aretrieve("scale up")
+        await retriever.aclose()
+
+    asyncio.run(_retrieve_and_close())
+    assert len(clients) == 3 and clients[-1].closed
+
+
+def test_retrieve_passes_filters_to_backend_and_cache_key():
+    result = RetrievalResult(
+        document_id="doc",
+        chunk_id="doc::chunk-0",
+        chunk_index=0,
+        source="payments/runbook.md",
+        text="restart the deployment",
+        metadata={"team": "payments"},
+        score=1.0,
+    )
+    backend = FakeBackend([result])
+    retriever = RagRetriever(
+        None, top_k=3, embedding_adapter=FakeEmbeddingAdapter(), backend=backend
+    )
+    filtered = retriever.retrieve("restart", filters={"team": "payments", "product": None})
+    assert backend.filters == [{"team": ["payments"]}]
+    assert retriever.retrieve("restart", filters={"team": ["payments"]}) is filtered
+    assert retriever.retrieve("restart") is not filtered
+    assert backend.filters == [{"team": ["payments"]}, None]
+
+
+def test_nodes_forward_state_filters_to_retriever():
+    class RecordingRetriever:
+        def __init__(self):
+            self.filters = []
+
+        def retrieve_many(self, queries, recorder=None, filters=None):
+            self.filters.append(filters)
+            return RagContext(text="", results=[], citations=[])
+
+    retriever = RecordingRetriever()
+    state = AgentState(prompt="restart", rag_filters={"team": "payments"})
+    PlannerNode(rag_retriever=retriever)(state)
+    assert retriever.filters == [{"team": "payments"}]
+    assert AgentState.from_dict(state.to_dict()).rag_filters == {"team": "payments"}
+
+
+def test_rag_queries_lead_with_the_latest_turn():
+    assert rag_queries("restart", None) == ["restart"]
+    history = ["restart the api", "which cluster?", "prod"]
+    assert rag_queries("\n".join(history), history) == ["prod", "which cluster?", "restart the api"]
+    assert rag_queries("\n".join(history), history, limit=2) == ["prod", "restart the api"]
+
+
+def test_rag_queries_keep_the_first_turn_of_a_long_clarification_chain():
+    history = ["restart the payments api", "which cluster?", "prod", "which region?", "eu-west-1"]
+    assert rag_queries("\n".join(history), history, limit=3) == [
+        "eu-west-1",
+        "which region?",
+        "restart the payments api",
+    ]
+    assert rag_queries("\n".join(history), history, limit=2) == [
+        "eu-west-1",
+        "restart the payments api",
+    ]
+    assert rag_queries("\n".join(history), history, limit=1) == ["eu-west-1"]
+    for limit in range(1, 7):
+        assert len(rag_queries("\n".join(history), history, limit=limit)) == min(limit, 5)
+
+
+def test_retrieve_many_embeds_once_and_fuses_one_search_round_trip():
+    results = [
+        RetrievalResult(
+            document_id=f"doc-{i}",
+            chunk_id=f"doc-{i}::chunk-0",
+            chunk_index=0,
+            source=f"doc-{i}.md",
+            text=f"step {i}",
+            metadata={},
+            score=1.0,
+        )
+        for i in range(4)
+    ]
+    backend = FakeBackend(results)
+    adapter = FakeEmbeddingAdapter()
+    retriever = RagRetriever(None, top_k=4, embedding_adapter=adapter, backend=backend)
+    context = retriever.retrieve_many(["prod", "restart the api", "Prod"])
+    assert adapter.calls == 1
+    assert adapter.texts == ["prod", "restart the api"]
+    assert backend.searches == 1
+    assert [r.chunk_id for r in context.results] == [
+        "doc-0::chunk-0",
+        "doc-1::chunk-0",
+        "doc-2::chunk-0",
+        "doc-3::chunk-0",
+    ]
+
+
+class RecordingInstrument:
+    def __init__(self):
+        self.calls = []
+
+    def add(self, value, attributes=None):
+        self.calls.append((value, attributes))
+
+    record = add
+
+
+def test_federated_retrieval_reports_per_index_hits():
+    def _results(prefix):
+        return [
+            RetrievalResult(
+                document_id=prefix,
+                chunk_id=f"{prefix}::chunk-0",
+                chunk_index=0,
+                source=f"{prefix}.md",
+                text=prefix,
+                metadata={},
+                score=1.0,
+            )
+        ]
+
+    runbooks, faqs = FakeBackend(_results("runbooks")), FakeBackend(_results("faqs"))
+    faqs.name = "faqs"
+    backend = FederatedBackend([FederatedIndex(runbooks), FederatedIndex(faqs, weight=2.0)])
+    retriever = RagRetriever(
+        None, top_k=2, embedding_adapter=FakeEmbeddingAdapter(), backend=backend
+    )
+    index_hits, retrieved, latency = (
+        RecordingInstrument(), RecordingInstrument(), RecordingInstrument()
+    )
+    retriever._rag_index_hits_total = index_hits
+    retriever._rag_retrieved_chunks_total = retrieved
+    retriever._rag_retrieval_latency_ms = latency
+    context = retriever.retrieve("restart")
+    assert [result.document_id for result in context.results] == ["faqs", "runbooks"]
+    assert sorted(index_hits.calls, key=lambda call: call[1]["index"]) == [
+        (1, {"index": "docs"}),
+        (1, {"index": "faqs"}),
+    ]
+    assert retrieved.calls == [(2, {"index": "docs+faqs"})]
+    assert [attributes for _, attributes in latency.calls] == [
+        {"index": "docs+faqs", "cache_hit": False}
+    ]
+
+
+def test_query_embedder_is_reused_with_a_fresh_budget_per_query():
+    adapter = FakeEmbeddingAdapter()
+    retriever = RagRetriever(None, top_k=1, embedding_adapter=adapter, backend=FakeBackend([]))
+    first = retriever._query_embedder()
+    assert retriever._query_embedder() is first
+    assert adapter.resets == 2
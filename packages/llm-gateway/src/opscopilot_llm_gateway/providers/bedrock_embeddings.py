@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import random
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
 import boto3
+from botocore.config import Config
 
 from opscopilot_llm_gateway.types import EmbeddingRequest, EmbeddingResponse
 
+logger = logging.getLogger(__name__)
+
 
 def read_bedrock_region() -> str:
     region = os.getenv("BEDROCK_REGION") or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION")
@@ -25,32 +31,127 @@ def read_bedrock_embedding_model_id() -> str:
     return model_id
 
 
+_RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+}
+
+_BATCH_MODEL_PREFIXES = {"cohere.embed": 96}
+_COHERE_INPUT_TYPES = {"document": "search_document", "query": "search_query"}
+
+
+def read_bedrock_embedding_concurrency() -> int:
+    raw = os.getenv("BEDROCK_EMBEDDING_MAX_CONCURRENCY", "8")
+    try:
+        return max(1, int(raw))
+    except ValueError as exc:
+        raise RuntimeError("BEDROCK_EMBEDDING_MAX_CONCURRENCY must be an integer") from exc
+
+
+def is_retryable_bedrock_error(exc: BaseException) -> bool:
+    response = getattr(exc, "response", None)
+    if not isinstance(response, dict):
+        return False
+    code = response.get("Error", {}).get("Code")
+    status = response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+    return code in _RETRYABLE_ERROR_CODES or status == 429 or status >= 500
+
+
+def max_texts_per_request(model_id: str) -> int:
+    for prefix, limit in _BATCH_MODEL_PREFIXES.items():
+        if prefix in model_id:
+            return limit
+    return 1
+
+
+def _build_body(model_id: str, texts: list[str], input_type: str = "document") -> str:
+    if max_texts_per_request(model_id) > 1:
+        return json.dumps({"texts": texts, "input_type": _COHERE_INPUT_TYPES[input_type]})
+    return json.dumps({"inputText": texts[0]})
+
+
+def _read_token_count(response: dict, payload: dict) -> int:
+    if "inputTextTokenCount" in payload:
+        return int(payload["inputTextTokenCount"])
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    value = headers.get("x-amzn-bedrock-input-token-count")
+    return int(value) if value else 0
+
+
 @dataclass(frozen=True)
 class BedrockEmbeddingClient:
     client: Any
+    max_concurrency: int = 8
+    max_attempts: int = 5
+    base_delay_s: float = 0.5
+    max_delay_s: float = 20.0
+    _pool: ThreadPoolExecutor = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "_pool",
+            ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="bedrock-embed",
+            ),
+        )
 
-    def invoke_embedding(self, model_id: str, texts: list[str]):
+    def _invoke_with_retry(
+        self,
+        model_id: str,
+        texts: list[str],
+        input_type: str = "document",
+    ) -> tuple[list[list[float]], int]:
+        body = _build_body(model_id, texts, input_type)
+        attempts = 0
+        while True:
+            try:
+                response = self.client.invoke_model(modelId=model_id, body=body)
+                break
+            except Exception as exc:
+                attempts += 1
+                if attempts >= self.max_attempts or not is_retryable_bedrock_error(exc):
+                    raise
+                delay = random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2**attempts))
+                logger.warning(
+                    "bedrock embedding retry model=%s attempt=%d delay_s=%.2f error=%s",
+                    model_id,
+                    attempts,
+                    delay,
+                    exc,
+                )
+                time.sleep(delay)
+        payload = json.loads(response["body"].read().decode("utf-8"))
+        if "embeddings" in payload:
+            vectors = payload["embeddings"]
+        else:
+            vectors = [payload.get("embedding", [])]
+        return vectors, _read_token_count(response, payload)
+
+    def invoke_embedding(self, model_id: str, texts: list[str], input_type: str = "document"):
+        per_request = max_texts_per_request(model_id)
+        groups = [texts[i : i + per_request] for i in range(0, len(texts), per_request)]
+        if len(groups) == 1:
+            responses = [self._invoke_with_retry(model_id, groups[0], input_type)]
+        else:
+            responses = self._pool.map(
+                lambda group: self._invoke_with_retry(model_id, group, input_type),
+                groups,
+            )
         vectors: list[list[float]] = []
         tokens_input = 0
-        for text in texts:
-            body = json.dumps({"inputText": text})
-            attempts = 0
-            while True:
-                try:
-                    response = self.client.invoke_model(modelId=model_id, body=body)
-                    payload = json.loads(response["body"].read().decode("utf-8"))
-                    vectors.append(payload.get("embedding", []))
-                    break
-                except Exception as exc:
-                    attempts += 1
-                    if attempts >= 5:
-                        raise exc
-                    time.sleep(2**attempts / 2)
+        for group_vectors, group_tokens in responses:
+            vectors.extend(group_vectors)
+            tokens_input += group_tokens
         return BedrockEmbeddingResult(
             vectors=vectors,
             tokens_input=tokens_input,
             cost_usd=0.0,
-            provider_metadata={"model": model_id},
+            provider_metadata={"model": model_id, "requests": len(groups)},
         )
 
 
@@ -71,6 +172,7 @@ class BedrockEmbeddingProvider:
         response = self.client.invoke_embedding(
             model_id=request.model_id,
             texts=request.texts,
+            input_type=request.input_type,
         )
         latency_ms = int((time.monotonic() - start) * 1000)
         return EmbeddingResponse(
@@ -86,9 +188,11 @@ class BedrockEmbeddingProvider:
 def build_bedrock_client() -> BedrockEmbeddingClient:
     profile = os.getenv("AWS_PROFILE")
     region = read_bedrock_region()
+    concurrency = read_bedrock_embedding_concurrency()
+    config = Config(max_pool_connections=max(10, concurrency))
     if profile:
         session = boto3.Session(profile_name=profile, region_name=region)
-        runtime = session.client("bedrock-runtime")
+        runtime = session.client("bedrock-runtime", config=config)
     else:
-        runtime = boto3.client("bedrock-runtime", region_name=region)
-    return BedrockEmbeddingClient(client=runtime)
+        runtime = boto3.client("bedrock-runtime", region_name=region, config=config)
+    return BedrockEmbeddingClient(client=runtime, max_concurrency=concurrency)
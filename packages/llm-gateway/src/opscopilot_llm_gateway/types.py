@@ -73,6 +73,7 @@ class EmbeddingRequest:
     texts: list[str]
     idempotency_key: str
     tags: LlmTags
+    input_type: str = "document"
 
 
 @dataclass(frozen=True)
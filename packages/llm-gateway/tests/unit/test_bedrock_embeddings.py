@@ -1,3 +1,8 @@
+import json
+import threading
+import time
+from dataclasses import replace
+
 from opscopilot_llm_gateway.providers.bedrock_embeddings import (
     BedrockEmbeddingClient,
     BedrockEmbeddingProvider,
@@ -5,23 +10,133 @@ from opscopilot_llm_gateway.providers.bedrock_embeddings import (
 from opscopilot_llm_gateway.types import EmbeddingRequest, LlmTags
 
 
+class FakeBody:
+    def __init__(self, payload: dict):
+        self._payload = payload
+
+    def read(self):
+        return json.dumps(self._payload).encode("utf-8")
+
+
 class FakeRuntime:
     def invoke_model(self, modelId, body):
-        class FakeBody:
-            def read(self):
-                return b'{"embedding": [0.1, 0.2]}'
+        return {"body": FakeBody({"embedding": [0.1, 0.2]})}
 
-        return {"body": FakeBody()}
 
+class FakeClientError(Exception):
+    def __init__(self, code: str, status: int):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}
 
-def test_bedrock_embedding_provider_embeds():
-    client = BedrockEmbeddingClient(client=FakeRuntime())
-    provider = BedrockEmbeddingProvider(client=client)
-    request = EmbeddingRequest(
-        model_id="model",
-        texts=["hello"],
+
+def _request(texts, model_id="model"):
+    return EmbeddingRequest(
+        model_id=model_id,
+        texts=texts,
         idempotency_key="id",
         tags=LlmTags(session_id="s", agent_run_id="r", agent_node="n"),
     )
-    response = provider.embed(request)
+
+
+def test_bedrock_embedding_provider_embeds():
+    client = BedrockEmbeddingClient(client=FakeRuntime())
+    provider = BedrockEmbeddingProvider(client=client)
+    response = provider.embed(_request(["hello"]))
     assert response.vectors == [[0.1, 0.2]]
+
+
+def test_bedrock_embedding_client_invokes_in_parallel_and_keeps_order():
+    class SlowRuntime:
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.active = 0
+            self.max_active = 0
+
+        def invoke_model(self, modelId, body):
+            text = json.loads(body)["inputText"]
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.01 * (3 - len(text) % 3))
+            with self.lock:
+                self.active -= 1
+            return {"body": FakeBody({"embedding": [float(len(text))], "inputTextTokenCount": 2})}
+
+    runtime = SlowRuntime()
+    client = BedrockEmbeddingClient(client=runtime, max_concurrency=4)
+    texts = ["a" * n for n in range(1, 9)]
+    result = client.invoke_embedding("amazon.titan-embed-text-v2:0", texts)
+    assert result.vectors == [[float(n)] for n in range(1, 9)]
+    assert result.tokens_input == 16
+    assert runtime.max_active > 1
+
+
+def test_bedrock_embedding_client_batches_array_models():
+    calls = []
+
+    class CohereRuntime:
+        def invoke_model(self, modelId, body):
+            texts = json.loads(body)["texts"]
+            calls.append(texts)
+            return {"body": FakeBody({"embeddings": [[float(len(text))] for text in texts]})}
+
+    client = BedrockEmbeddingClient(client=CohereRuntime())
+    texts = [str(n) for n in range(100)]
+    result = client.invoke_embedding("cohere.embed-english-v3", texts)
+    assert [len(batch) for batch in calls] == [96, 4]
+    assert len(result.vectors) == 100
+
+
+def test_bedrock_embedding_client_retries_only_retryable_errors():
+    class FlakyRuntime:
+        def __init__(self, error):
+            self.error = error
+            self.calls = 0
+
+        def invoke_model(self, modelId, body):
+            self.calls += 1
+            if self.calls == 1:
+                raise self.error
+            return {"body": FakeBody({"embedding": [1.0]})}
+
+    throttled = FlakyRuntime(FakeClientError("ThrottlingException", 429))
+    client = BedrockEmbeddingClient(client=throttled, base_delay_s=0.001)
+    assert client.invoke_embedding("model", ["x"]).vectors == [[1.0]]
+    assert throttled.calls == 2
+
+    invalid = FlakyRuntime(FakeClientError("ValidationException", 400))
+    client = BedrockEmbeddingClient(client=invalid, base_delay_s=0.001)
+    try:
+        client.invoke_embedding("model", ["x"])
+    except FakeClientError:
+        assert invalid.calls == 1
+    else:
+        raise AssertionError("expected ValidationException")
+
+
+def test_bedrock_cohere_requests_carry_the_input_type():
+    bodies = []
+
+    class CohereRuntime:
+        def invoke_model(self, modelId, body):
+            bodies.append(json.loads(body))
+            return {"body": FakeBody({"embeddings": [[0.1]]})}
+
+    provider = BedrockEmbeddingProvider(client=BedrockEmbeddingClient(client=CohereRuntime()))
+    provider.embed(_request(["doc"], model_id="cohere.embed-english-v3"))
+    query = _request(["question"], model_id="cohere.embed-english-v3")
+    provider.embed(replace(query, input_type="query"))
+    assert [body["input_type"] for body in bodies] == ["search_document", "search_query"]
+
+
+def test_bedrock_single_group_runs_on_the_calling_thread():
+    threads = []
+
+    class RecordingRuntime:
+        def invoke_model(self, modelId, body):
+            threads.append(threading.current_thread())
+            return {"body": FakeBody({"embedding": [0.1]})}
+
+    client = BedrockEmbeddingClient(client=RecordingRuntime())
+    client.invoke_embedding("amazon.titan-embed-text-v2:0", ["one"])
+    assert threads == [threading.current_thread()]
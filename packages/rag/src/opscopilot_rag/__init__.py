@@ -1,48 +1,196 @@
-from .chunking import chunk_text
+from .backends import (
+    FederatedBackend,
+    FederatedIndex,
+    LocalBackend,
+    OpenSearchBackend,
+    RetrievalBackend,
+    retrieval_backend_from_env,
+)
+from .checkpoint import IngestCheckpoint
+from .chunking import chunk_document, chunk_markdown, chunk_text, estimate_tokens
 from .citations import build_citations
-from .embeddings import EmbeddingAdapter, OpenAIEmbeddingAdapter
-from .indexing import build_index_documents, bulk_upsert_chunks
+from .context import (
+    assemble_context,
+    context_assembly_config_from_env,
+    format_context_line,
+    merge_adjacent,
+    mmr_order,
+)
+from .embeddings import (
+    CachedEmbeddingAdapter,
+    ConcurrentEmbeddingExecutor,
+    EmbeddingAdapter,
+    EmbeddingCache,
+    OpenAIEmbeddingAdapter,
+)
+from .dedup import MinHasher, NearDuplicateFilter
+from .filters import (
+    apply_filter_fields,
+    build_metadata_filter,
+    matches_filters,
+    normalize_filters,
+    parse_filter_fields,
+)
+from .fusion import reciprocal_rank_fusion
+from .indexing import (
+    build_index_documents,
+    bulk_delete_chunks,
+    bulk_update_chunk_metadata,
+    bulk_upsert_chunks,
+    stream_bulk,
+)
 from .ingestion import discover_document_paths, load_documents, normalize_text
 from .opensearch_client import (
+    AsyncOpenSearchClient,
     OpenSearchClient,
     build_index_body,
+    bulk_load_settings,
+    check_alias_target,
     ensure_index,
+    filtered_knn_engine,
+    generation_index_name,
+    knn_method_config_from_env,
+    mark_index_generation,
     opensearch_config_from_env,
+    prune_index_generations,
+    read_index_generation,
+    read_quantization_scale,
+    resolve_alias,
+    swap_alias,
+    warm_index,
+)
+from .local_store import LocalVectorStore, LocalVectorStoreWriter
+from .manifest import IncrementalPlanner, IngestManifest
+from .pipeline import iter_batches, iter_chunked_documents
+from .quantization import (
+    QUANTIZATION_MODES,
+    calibrate_byte_scale,
+    count_clipped,
+    estimate_native_memory_bytes,
+    quantize_matrix,
+    quantize_vector,
+)
+from .query_cache import QueryResultCache, normalize_query, query_cache_from_env
+from .retrieval import (
+    aretrieve_knn,
+    aretrieve_knn_many,
+    build_knn_query,
+    build_msearch_body,
+    retrieval_options_from_env,
+    retrieve_knn,
+    retrieve_knn_many,
 )
-from .retrieval import build_knn_query, retrieve_knn
 from .types import (
+    BulkIndexConfig,
+    BulkIndexResult,
+    BulkItemFailure,
     Chunk,
+    ChunkingConfig,
     Citation,
+    ContextAssemblyConfig,
     Document,
     EmbeddingRequest,
     EmbeddingResult,
+    FilterField,
     IndexedChunk,
+    KnnMethodConfig,
     OpenSearchConfig,
+    RetrievalOptions,
     RetrievalResult,
 )
 
 __all__ = [
+    "AsyncOpenSearchClient",
+    "BulkIndexConfig",
+    "BulkIndexResult",
+    "BulkItemFailure",
+    "CachedEmbeddingAdapter",
     "Chunk",
+    "ChunkingConfig",
     "Citation",
+    "ContextAssemblyConfig",
+    "ConcurrentEmbeddingExecutor",
     "Document",
     "EmbeddingAdapter",
+    "EmbeddingCache",
     "EmbeddingRequest",
     "EmbeddingResult",
+    "FederatedBackend",
+    "FederatedIndex",
+    "FilterField",
+    "IncrementalPlanner",
     "IndexedChunk",
+    "IngestCheckpoint",
+    "IngestManifest",
+    "KnnMethodConfig",
+    "LocalBackend",
+    "LocalVectorStore",
+    "LocalVectorStoreWriter",
+    "MinHasher",
+    "NearDuplicateFilter",
     "OpenAIEmbeddingAdapter",
+    "OpenSearchBackend",
     "OpenSearchClient",
     "OpenSearchConfig",
+    "QUANTIZATION_MODES",
+    "QueryResultCache",
+    "RetrievalBackend",
+    "RetrievalOptions",
     "RetrievalResult",
+    "apply_filter_fields",
+    "aretrieve_knn",
+    "aretrieve_knn_many",
+    "assemble_context",
     "build_citations",
+    "calibrate_byte_scale",
+    "count_clipped",
     "build_index_body",
     "build_index_documents",
     "build_knn_query",
+    "build_metadata_filter",
+    "build_msearch_body",
+    "bulk_delete_chunks",
+    "bulk_load_settings",
+    "bulk_update_chunk_metadata",
     "bulk_upsert_chunks",
+    "check_alias_target",
+    "chunk_document",
+    "chunk_markdown",
     "chunk_text",
+    "context_assembly_config_from_env",
     "discover_document_paths",
     "ensure_index",
+    "filtered_knn_engine",
+    "generation_index_name",
+    "estimate_native_memory_bytes",
+    "estimate_tokens",
+    "format_context_line",
+    "iter_batches",
+    "iter_chunked_documents",
+    "knn_method_config_from_env",
+    "mark_index_generation",
+    "matches_filters",
+    "merge_adjacent",
+    "mmr_order",
+    "normalize_filters",
+    "normalize_query",
     "opensearch_config_from_env",
+    "parse_filter_fields",
     "load_documents",
     "normalize_text",
+    "prune_index_generations",
+    "quantize_matrix",
+    "quantize_vector",
+    "query_cache_from_env",
+    "read_index_generation",
+    "read_quantization_scale",
+    "reciprocal_rank_fusion",
+    "resolve_alias",
+    "retrieval_backend_from_env",
+    "retrieval_options_from_env",
     "retrieve_knn",
+    "retrieve_knn_many",
+    "stream_bulk",
+    "swap_alias",
+    "warm_index",
 ]
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable
+
+import numpy as np
+from opensearchpy import OpenSearch
+
+from .fusion import reciprocal_rank_fusion
+from .local_store import LocalVectorStore
+from .opensearch_client import (
+    AsyncOpenSearchClient,
+    OpenSearchClient,
+    read_index_generation,
+    read_quantization_scale,
+)
+from .retrieval import (
+    aretrieve_knn,
+    aretrieve_knn_many,
+    retrieval_options_from_env,
+    retrieve_knn,
+    retrieve_knn_many,
+    truncate_text,
+)
+from .types import OpenSearchConfig, RetrievalOptions, RetrievalResult
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_BACKENDS = ("opensearch", "local")
+
+IndexObserver = Callable[[str, float, int], None]
+
+
+class RetrievalBackend:
+    name: str = ""
+
+    def search(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        raise NotImplementedError("retrieval backend is not configured")
+
+    async def asearch(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        return await asyncio.to_thread(
+            self.search,
+            vector,
+            top_k,
+            query_text=query_text,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    def search_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        texts = query_texts or [None] * len(vectors)
+        return [
+            self.search(
+                vector, top_k, query_text=text, include_vectors=include_vectors, filters=filters
+            )
+            for vector, text in zip(vectors, texts)
+        ]
+
+    async def asearch_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        return await asyncio.to_thread(
+            self.search_many,
+            vectors,
+            top_k,
+            query_texts=query_texts,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    def generation(self) -> str | None:
+        return None
+
+    def observe(self, callback: IndexObserver) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+
+class OpenSearchBackend(RetrievalBackend):
+    def __init__(
+        self,
+        client: OpenSearch,
+        index_name: str,
+        options: RetrievalOptions | None = None,
+        config: OpenSearchConfig | None = None,
+        async_client=None,
+    ) -> None:
+        self.client = client
+        self.name = index_name
+        self.options = options or RetrievalOptions()
+        self.async_client = async_client
+        self._config = config
+        self._async_unavailable = False
+        self._async_clients: dict[asyncio.AbstractEventLoop, object] = {}
+        self._async_lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: OpenSearchConfig | None = None,
+        options: RetrievalOptions | None = None,
+    ) -> "OpenSearchBackend":
+        os_client = OpenSearchClient(config)
+        return cls(os_client.client, os_client.config.index, options, config=os_client.config)
+
+    def _search_options(self) -> RetrievalOptions:
+        if self.options.quantization == "byte" and self.options.quantization_scale is None:
+            scale = read_quantization_scale(self.client, self.name)
+            if scale is None:
+                raise RuntimeError(
+                    f"{self.name} has no stored byte quantization scale; set "
+                    "RAG_KNN_QUANTIZATION_SCALE to the scale the index was ingested with"
+                )
+            self.options = replace(self.options, quantization_scale=scale)
+        return self.options
+
+    def search(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        return retrieve_knn(
+            self.client,
+            self.name,
+            vector,
+            top_k,
+            options=self._search_options(),
+            query_text=query_text,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    def _async_client(self):
+        if self.async_client is not None:
+            return self.async_client
+        if self._config is None or self._async_unavailable:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            for stale in [known for known in self._async_clients if known.is_closed()]:
+                del self._async_clients[stale]
+            client = self._async_clients.get(loop)
+            if client is None:
+                try:
+                    client = AsyncOpenSearchClient(self._config).client
+                except RuntimeError as exc:
+                    self._async_unavailable = True
+                    logger.warning("Async retrieval falls back to a worker thread: %s", exc)
+                    return None
+                self._async_clients[loop] = client
+        return client
+
+    async def asearch(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        client = self._async_client()
+        if client is None:
+            return await super().asearch(
+                vector,
+                top_k,
+                query_text=query_text,
+                include_vectors=include_vectors,
+                filters=filters,
+            )
+        return await aretrieve_knn(
+            client,
+            self.name,
+            vector,
+            top_k,
+            options=self._search_options(),
+            query_text=query_text,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    def search_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        return retrieve_knn_many(
+            self.client,
+            self.name,
+            vectors,
+            top_k,
+            options=self._search_options(),
+            query_texts=query_texts,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    async def asearch_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        client = self._async_client()
+        if client is None:
+            return await super().asearch_many(
+                vectors,
+                top_k,
+                query_texts=query_texts,
+                include_vectors=include_vectors,
+                filters=filters,
+            )
+        return await aretrieve_knn_many(
+            client,
+            self.name,
+            vectors,
+            top_k,
+            options=self._search_options(),
+            query_texts=query_texts,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+
+    def generation(self) -> str | None:
+        return read_index_generation(self.client, self.name)
+
+    async def aclose(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+class LocalBackend(RetrievalBackend):
+    def __init__(self, store: LocalVectorStore, options: RetrievalOptions | None = None) -> None:
+        self.store = store
+        self.name = store.name
+        self.options = options or RetrievalOptions()
+
+    def search(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        results = self.store.search(
+            vector,
+            top_k,
+            include_vectors=include_vectors,
+            ef_search=self.options.ef_search,
+            filters=filters,
+        )
+        if self.options.text_mode == "full":
+            return results
+        return [
+            replace(result, text=truncate_text(result.text, self.options.max_text_chars))
+            for result in results
+        ]
+
+    def generation(self) -> str | None:
+        return self.store.generation()
+
+
+@dataclass(frozen=True)
+class FederatedIndex:
+    backend: RetrievalBackend
+    weight: float = 1.0
+    top_k: int | None = None
+
+
+class FederatedBackend(RetrievalBackend):
+    def __init__(self, indices: list[FederatedIndex]) -> None:
+        if not indices:
+            raise ValueError("federated retrieval needs at least one index")
+        self.indices = list(indices)
+        self.name = "+".join(entry.backend.name for entry in self.indices)
+        self._weights = [entry.weight for entry in self.indices]
+        self._observers: list[IndexObserver] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.indices),
+            thread_name_prefix="rag-federated",
+        )
+
+    def observe(self, callback: IndexObserver) -> None:
+        self._observers.append(callback)
+
+    def _notify(self, entry: FederatedIndex, started: float, hits: int) -> None:
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        for callback in self._observers:
+            callback(entry.backend.name, latency_ms, hits)
+
+    def _tag(self, entry: FederatedIndex, results: list[RetrievalResult]) -> list[RetrievalResult]:
+        return [
+            replace(result, metadata={**result.metadata, "index": entry.backend.name})
+            for result in results
+        ]
+
+    def _search_index(
+        self,
+        entry: FederatedIndex,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None,
+        include_vectors: bool,
+        filters: dict | None,
+    ) -> list[list[RetrievalResult]]:
+        started = time.perf_counter()
+        results = entry.backend.search_many(
+            vectors,
+            entry.top_k or top_k,
+            query_texts=query_texts,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+        self._notify(entry, started, sum(len(hits) for hits in results))
+        return [self._tag(entry, hits) for hits in results]
+
+    async def _asearch_index(
+        self,
+        entry: FederatedIndex,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None,
+        include_vectors: bool,
+        filters: dict | None,
+    ) -> list[list[RetrievalResult]]:
+        started = time.perf_counter()
+        results = await entry.backend.asearch_many(
+            vectors,
+            entry.top_k or top_k,
+            query_texts=query_texts,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+        self._notify(entry, started, sum(len(hits) for hits in results))
+        return [self._tag(entry, hits) for hits in results]
+
+    def _fuse(
+        self,
+        per_index: list[list[list[RetrievalResult]]],
+        top_k: int,
+    ) -> list[list[RetrievalResult]]:
+        return [
+            reciprocal_rank_fusion(
+                [results[query] for results in per_index],
+                weights=self._weights,
+                limit=top_k,
+            )
+            for query in range(len(per_index[0]))
+        ]
+
+    def search(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        return self.search_many([vector], top_k, [query_text], include_vectors, filters)[0]
+
+    def search_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        futures = [
+            self._executor.submit(
+                self._search_index,
+                entry,
+                vectors,
+                top_k,
+                query_texts,
+                include_vectors,
+                filters,
+            )
+            for entry in self.indices
+        ]
+        return self._fuse([future.result() for future in futures], top_k)
+
+    async def asearch(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        query_text: str | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        return (
+            await self.asearch_many([vector], top_k, [query_text], include_vectors, filters)
+        )[0]
+
+    async def asearch_many(
+        self,
+        vectors: list[np.ndarray] | np.ndarray,
+        top_k: int,
+        query_texts: list[str | None] | None = None,
+        include_vectors: bool = False,
+        filters: dict | None = None,
+    ) -> list[list[RetrievalResult]]:
+        per_index = await asyncio.gather(
+            *(
+                self._asearch_index(
+                    entry, vectors, top_k, query_texts, include_vectors, filters
+                )
+                for entry in self.indices
+            )
+        )
+        return self._fuse(list(per_index), top_k)
+
+    def generation(self) -> str | None:
+        generations = [entry.backend.generation() for entry in self.indices]
+        if all(generation is None for generation in generations):
+            return None
+        return ",".join(str(generation) for generation in generations)
+
+    async def aclose(self) -> None:
+        for entry in self.indices:
+            await entry.backend.aclose()
+        self._executor.shutdown(wait=False)
+
+
+def _parse_federated_indices(value: str) -> list[tuple[str, float, int | None]]:
+    indices = []
+    for item in value.split(","):
+        parts = [part.strip() for part in item.split(":")]
+        if not parts[0]:
+            continue
+        if len(parts) > 3:
+            raise RuntimeError(f"RAG_INDICES entry must be name[:weight[:top_k]], got {item!r}")
+        try:
+            weight = float(parts[1]) if len(parts) > 1 and parts[1] else 1.0
+            top_k = int(parts[2]) if len(parts) > 2 and parts[2] else None
+        except ValueError as exc:
+            raise RuntimeError(
+                f"RAG_INDICES entry has an invalid weight or top_k: {item!r}"
+            ) from exc
+        indices.append((parts[0], weight, top_k))
+    return indices
+
+
+def read_backend_name() -> str:
+    name = os.getenv("RAG_BACKEND", "opensearch").strip().lower() or "opensearch"
+    if name not in RETRIEVAL_BACKENDS:
+        raise RuntimeError(f"RAG_BACKEND must be one of {', '.join(RETRIEVAL_BACKENDS)}")
+    return name
+
+
+def retrieval_backend_from_env() -> RetrievalBackend:
+    name = read_backend_name()
+    options = retrieval_options_from_env()
+    if name == "local":
+        path = os.getenv("RAG_LOCAL_STORE_PATH")
+        if not path:
+            raise RuntimeError("RAG_LOCAL_STORE_PATH is required when RAG_BACKEND=local")
+        backend: RetrievalBackend = LocalBackend(LocalVectorStore(path), options)
+    else:
+        backend = OpenSearchBackend.from_config(options=options)
+    federated = _parse_federated_indices(os.getenv("RAG_INDICES", ""))
+    if federated:
+        if name == "local":
+            raise RuntimeError("RAG_INDICES is only supported with RAG_BACKEND=opensearch")
+        backend = FederatedBackend(
+            [
+                FederatedIndex(
+                    OpenSearchBackend(backend.client, index, options, config=backend._config),
+                    weight=weight,
+                    top_k=top_k,
+                )
+                for index, weight, top_k in federated
+            ]
+        )
+    logger.info("Configured retrieval backend backend=%s name=%s", name, backend.name)
+    return backend
@@ -0,0 +1,46 @@
+from .corpus import generate_corpus
+from .fakes import FakeBulkClient, FakeEmbeddingAdapter
+from .ingest import IngestBenchmarkResult, peak_rss_bytes, run_ingest_benchmark
+from .quantization import (
+    BENCHMARK_MODES,
+    QuantizationBenchmarkResult,
+    run_quantization_benchmark,
+    synthetic_vectors,
+)
+from .retrieval import (
+    BenchmarkQuery,
+    RetrievalBenchmarkConfig,
+    RetrievalBenchmarkResult,
+    exact_top_k,
+    load_opensearch_vectors,
+    load_query_set,
+    local_search,
+    opensearch_search,
+    recall_at_k,
+    run_retrieval_benchmark,
+    synthesize_queries,
+)
+
+__all__ = [
+    "BENCHMARK_MODES",
+    "BenchmarkQuery",
+    "FakeBulkClient",
+    "FakeEmbeddingAdapter",
+    "IngestBenchmarkResult",
+    "QuantizationBenchmarkResult",
+    "RetrievalBenchmarkConfig",
+    "RetrievalBenchmarkResult",
+    "exact_top_k",
+    "generate_corpus",
+    "load_opensearch_vectors",
+    "load_query_set",
+    "local_search",
+    "opensearch_search",
+    "peak_rss_bytes",
+    "recall_at_k",
+    "run_ingest_benchmark",
+    "run_quantization_benchmark",
+    "run_retrieval_benchmark",
+    "synthesize_queries",
+    "synthetic_vectors",
+]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import logging
+import random
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_VOCABULARY = (
+    "pod node cluster deployment service ingress namespace container image registry "
+    "restart crash loop backoff probe liveness readiness memory cpu limit request "
+    "quota volume claim secret config map rollout rollback replica scale autoscaler "
+    "latency error rate alert dashboard metric trace log span timeout retry"
+).split()
+
+_SHARED_BLOCK = (
+    "```bash\n"
+    "kubectl get pods -n {namespace}\n"
+    "kubectl describe pod <pod> -n {namespace}\n"
+    "kubectl logs <pod> -n {namespace} --previous\n"
+    "```"
+)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 18)) for _ in range(sentences))
+
+
+def generate_corpus(
+    root: str | Path,
+    documents: int = 100,
+    sections: int = 6,
+    paragraphs_per_section: int = 3,
+    shared_block_ratio: float = 0.3,
+    seed: int = 13,
+) -> list[Path]:
+    rng = random.Random(seed)
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+    for doc_index in range(documents):
+        parts = [f"# Runbook {doc_index}"]
+        for section in range(sections):
+            parts.append(f"## Section {section}")
+            parts.extend(
+                _paragraph(rng, rng.randint(3, 6)) for _ in range(paragraphs_per_section)
+            )
+            if rng.random() < shared_block_ratio:
+                parts.append(_SHARED_BLOCK.format(namespace="ops"))
+        path = root_path / f"runbook-{doc_index:05d}.md"
+        path.write_text("\n\n".join(parts) + "\n", encoding="utf-8")
+        paths.append(path)
+    logger.info("Generated synthetic corpus root=%s documents=%d", root_path, documents)
+    return paths
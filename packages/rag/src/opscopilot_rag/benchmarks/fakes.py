@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import zlib
+
+import numpy as np
+from opensearchpy.exceptions import NotFoundError
+
+from ..embeddings import EmbeddingAdapter
+from ..types import EmbeddingRequest, EmbeddingResult
+from ..vectors import VECTOR_DTYPE
+
+
+class FakeEmbeddingAdapter(EmbeddingAdapter):
+    def __init__(
+        self,
+        dimensions: int = 256,
+        latency_s: float = 0.0,
+        per_text_latency_s: float = 0.0,
+        model: str = "fake-embedding",
+    ) -> None:
+        self.dimensions = dimensions
+        self.latency_s = latency_s
+        self.per_text_latency_s = per_text_latency_s
+        self.model = model
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dimensions).astype(VECTOR_DTYPE)
+        return vector / np.linalg.norm(vector)
+
+    def embed(self, request: EmbeddingRequest) -> EmbeddingResult:
+        delay = self.latency_s + self.per_text_latency_s * len(request.texts)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.calls += 1
+            self.texts += len(request.texts)
+        if not request.texts:
+            vectors = np.empty((0, self.dimensions), dtype=VECTOR_DTYPE)
+        else:
+            vectors = np.stack([self._vector(text) for text in request.texts])
+        return EmbeddingResult(vectors=vectors, model_id=self.model, dimensions=self.dimensions)
+
+
+class FakeIndices:
+    def __init__(self) -> None:
+        self.bodies: dict[str, dict] = {}
+
+    def exists(self, index: str) -> bool:
+        return index in self.bodies
+
+    def create(self, index: str, body: dict) -> dict:
+        self.bodies[index] = json.loads(json.dumps(body))
+        return {"acknowledged": True, "index": index}
+
+    def get_mapping(self, index: str) -> dict:
+        if index not in self.bodies:
+            raise NotFoundError(404, "index_not_found_exception", {})
+        return {index: {"mappings": self.bodies[index].get("mappings", {})}}
+
+    def put_mapping(self, index: str, body: dict) -> dict:
+        mappings = self.bodies.setdefault(index, {}).setdefault("mappings", {})
+        if "_meta" in body:
+            mappings["_meta"] = dict(body["_meta"])
+        mappings.setdefault("properties", {}).update(body.get("properties", {}))
+        return {"acknowledged": True}
+
+    def get_settings(self, index: str) -> dict:
+        return {index: {"settings": self.bodies.get(index, {}).get("settings", {})}}
+
+    def put_settings(self, index: str, body: dict) -> dict:
+        settings = self.bodies.setdefault(index, {}).setdefault("settings", {})
+        settings.setdefault("index", {}).update(body.get("index", {}))
+        return {"acknowledged": True}
+
+    def refresh(self, index: str) -> dict:
+        return {}
+
+    def forcemerge(self, index: str, **_kwargs) -> dict:
+        return {}
+
+
+class FakeBulkClient:
+    def __init__(self, latency_s: float = 0.0, keep_documents: bool = False) -> None:
+        self.latency_s = latency_s
+        self.keep_documents = keep_documents
+        self.indices = FakeIndices()
+        self._lock = threading.Lock()
+        self.documents: dict[str, dict] = {}
+        self.requests = 0
+        self.actions = 0
+        self.bytes_received = 0
+
+    def bulk(self, body: bytes, **_kwargs) -> dict:
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+        lines = body.decode("utf-8").splitlines()
+        items: list[dict] = []
+        position = 0
+        while position < len(lines):
+            header = json.loads(lines[position])
+            op_type = next(iter(header))
+            doc_id = header[op_type]["_id"]
+            source = None
+            if op_type == "delete":
+                position += 1
+            else:
+                source = json.loads(lines[position + 1]) if self.keep_documents else None
+                position += 2
+            with self._lock:
+                if op_type == "delete":
+                    self.documents.pop(doc_id, None)
+                elif source is not None:
+                    if op_type == "update":
+                        self.documents.setdefault(doc_id, {}).update(source.get("doc", {}))
+                    else:
+                        self.documents[doc_id] = source
+            items.append({op_type: {"_id": doc_id, "status": 201 if op_type == "index" else 200}})
+        with self._lock:
+            self.requests += 1
+            self.actions += len(items)
+            self.bytes_received += len(body)
+        return {"errors": False, "items": items}
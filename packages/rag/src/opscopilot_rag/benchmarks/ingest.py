@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import io
+import logging
+import resource
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+from ..cli.ingest import IngestStats, build_arg_parser, ingest_documents
+from ..embeddings import EmbeddingAdapter, EmbeddingCache
+from .fakes import FakeBulkClient, FakeEmbeddingAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass(frozen=True)
+class IngestBenchmarkResult:
+    documents: int
+    chunks: int
+    indexed: int
+    total_seconds: float
+    peak_rss_bytes: int
+    bulk_requests: int
+    bulk_bytes: int
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.total_seconds if self.total_seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.total_seconds if self.total_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        payload = asdict(self)
+        payload["docs_per_second"] = self.docs_per_second
+        payload["chunks_per_second"] = self.chunks_per_second
+        return payload
+
+
+def run_ingest_benchmark(
+    root: str | Path,
+    ingest_args: Sequence[str] = (),
+    adapter: EmbeddingAdapter | None = None,
+    client=None,
+    index_name: str = "benchmark",
+) -> IngestBenchmarkResult:
+    adapter = adapter or FakeEmbeddingAdapter()
+    client = client or FakeBulkClient()
+    args = build_arg_parser().parse_args(
+        [
+            "--root",
+            str(root),
+            "--backend",
+            "opensearch",
+            "--opensearch-index",
+            index_name,
+            *ingest_args,
+        ]
+    )
+    stats = IngestStats()
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()) as report:
+        exit_code = ingest_documents(
+            args, adapter=adapter, client=client, stats=stats, cache=EmbeddingCache()
+        )
+    total_seconds = time.perf_counter() - started
+    if exit_code != 0:
+        raise RuntimeError(f"ingest exited with {exit_code}: {report.getvalue().strip()}")
+
+    result = IngestBenchmarkResult(
+        documents=stats.documents,
+        chunks=stats.chunks,
+        indexed=stats.indexed,
+        total_seconds=total_seconds,
+        peak_rss_bytes=peak_rss_bytes(),
+        bulk_requests=getattr(client, "requests", 0),
+        bulk_bytes=getattr(client, "bytes_received", 0),
+        stage_seconds=dict(stats.stage_seconds),
+    )
+    logger.info(
+        "Ingest benchmark completed documents=%d chunks=%d seconds=%.3f",
+        result.documents,
+        result.chunks,
+        result.total_seconds,
+    )
+    return result
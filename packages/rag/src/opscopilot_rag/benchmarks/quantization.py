@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import asdict, dataclass, replace
+
+import numpy as np
+
+from ..indexing import bulk_upsert_chunks
+from ..opensearch_client import ensure_index
+from ..quantization import (
+    bytes_per_vector,
+    calibrate_byte_scale,
+    estimate_native_memory_bytes,
+    quantize_matrix,
+)
+from ..retrieval import retrieve_knn
+from ..types import IndexedChunk, KnnMethodConfig, RetrievalOptions
+from ..vectors import as_matrix
+from .retrieval import exact_top_k, percentile_ms, recall_at_k
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_MODES = ("none", "fp16", "byte", "pq")
+
+
+def synthetic_vectors(
+    count: int,
+    dimensions: int,
+    clusters: int = 32,
+    spread: float = 0.35,
+    seed: int = 13,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions))
+    assignments = rng.integers(0, clusters, size=count)
+    vectors = centers[assignments] + spread * rng.standard_normal((count, dimensions))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return as_matrix(vectors)
+
+
+@dataclass(frozen=True)
+class QuantizationBenchmarkResult:
+    mode: str
+    top_k: int
+    recall_at_k: float
+    p50_ms: float
+    p95_ms: float
+    bytes_per_vector: float
+    native_memory_bytes: int
+    scale: float | None = None
+    live: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _offline_search(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    space_type: str,
+) -> tuple[list[list[int]], list[float]]:
+    found: list[list[int]] = []
+    latencies: list[float] = []
+    for query in queries:
+        started = time.perf_counter()
+        found.append(exact_top_k(corpus, query[np.newaxis, :], top_k, space_type)[0].tolist())
+        latencies.append(time.perf_counter() - started)
+    return found, latencies
+
+
+def _live_search(
+    client,
+    index_name: str,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    knn: KnnMethodConfig,
+) -> tuple[list[list[int]], list[float]]:
+    ensure_index(client, index_name, corpus.shape[1], knn=knn)
+    documents = (
+        IndexedChunk(
+            document_id=f"vector-{position}",
+            chunk_id=str(position),
+            chunk_index=0,
+            source="benchmark",
+            text="",
+            metadata={},
+            embedding=vector,
+        )
+        for position, vector in enumerate(corpus)
+    )
+    bulk_upsert_chunks(client, index_name, documents)
+    client.indices.refresh(index=index_name)
+    options = RetrievalOptions(
+        source_fields=("chunk_id",),
+        quantization=knn.quantization,
+        quantization_scale=knn.quantization_scale,
+    )
+    found: list[list[int]] = []
+    latencies: list[float] = []
+    for query in queries:
+        started = time.perf_counter()
+        results = retrieve_knn(client, index_name, query, top_k, options=options)
+        latencies.append(time.perf_counter() - started)
+        found.append([int(result.chunk_id) for result in results])
+    return found, latencies
+
+
+def run_quantization_benchmark(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int = 10,
+    modes: tuple[str, ...] = ("none", "fp16", "byte"),
+    knn: KnnMethodConfig | None = None,
+    projected_count: int | None = None,
+    client=None,
+    index_prefix: str = "opscopilot-quantization-bench",
+) -> list[QuantizationBenchmarkResult]:
+    corpus = as_matrix(corpus)
+    queries = as_matrix(queries)
+    knn = knn or KnnMethodConfig()
+    space_type = knn.space_type or "cosinesimil"
+    truth = exact_top_k(corpus, queries, top_k, space_type)
+    count = projected_count or len(corpus)
+    results: list[QuantizationBenchmarkResult] = []
+    for mode in modes:
+        if mode not in BENCHMARK_MODES:
+            raise ValueError(f"unsupported benchmark mode: {mode}")
+        quantization = None if mode == "none" else mode
+        scale = knn.quantization_scale
+        if mode == "byte" and scale is None:
+            scale = calibrate_byte_scale(corpus)
+        mode_knn = replace(knn, quantization=quantization, quantization_scale=scale)
+        if client is not None:
+            index_name = f"{index_prefix}-{mode}"
+            try:
+                found, latencies = _live_search(
+                    client, index_name, quantize_matrix(corpus, quantization, scale),
+                    queries, top_k, mode_knn,
+                )
+            finally:
+                client.indices.delete(index=index_name, ignore_unavailable=True)
+        elif mode == "pq":
+            logger.warning("Skipping pq offline; it needs a trained model on a live cluster")
+            continue
+        else:
+            found, latencies = _offline_search(
+                quantize_matrix(corpus, quantization, scale),
+                quantize_matrix(queries, quantization, scale),
+                top_k,
+                space_type,
+            )
+        result = QuantizationBenchmarkResult(
+            mode=mode,
+            top_k=top_k,
+            recall_at_k=recall_at_k(truth, found),
+            p50_ms=percentile_ms(latencies, 50),
+            p95_ms=percentile_ms(latencies, 95),
+            bytes_per_vector=bytes_per_vector(corpus.shape[1], quantization),
+            native_memory_bytes=estimate_native_memory_bytes(
+                count, corpus.shape[1], quantization, m=knn.m or 16
+            ),
+            scale=scale if mode == "byte" else None,
+            live=client is not None,
+        )
+        logger.info(
+            "Quantization benchmark mode=%s recall@%d=%.4f p50_ms=%.2f",
+            mode,
+            top_k,
+            result.recall_at_k,
+            result.p50_ms,
+        )
+        results.append(result)
+    return results
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+from opensearchpy.helpers import scan
+
+from ..local_store import LocalVectorStore
+from ..retrieval import retrieve_knn, truncate_text
+from ..types import RetrievalOptions, RetrievalResult
+from ..vectors import as_matrix, as_vector
+
+logger = logging.getLogger(__name__)
+
+_GROUND_TRUTH_BATCH = 32
+
+SearchFn = Callable[
+    [np.ndarray, str | None, "RetrievalBenchmarkConfig"],
+    tuple[list[RetrievalResult], int],
+]
+
+
+def _similarity(corpus: np.ndarray, queries: np.ndarray, space_type: str) -> np.ndarray:
+    corpus = corpus.astype(np.float32, copy=False)
+    queries = queries.astype(np.float32, copy=False)
+    scores = queries @ corpus.T
+    if space_type == "cosinesimil":
+        corpus_norms = np.linalg.norm(corpus, axis=1)
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        denominator = query_norms * corpus_norms
+        return scores / np.where(denominator == 0, 1.0, denominator)
+    if space_type == "l2":
+        return 2 * scores - (corpus * corpus).sum(axis=1) - (queries * queries).sum(
+            axis=1, keepdims=True
+        )
+    return scores
+
+
+def exact_top_k(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    space_type: str = "cosinesimil",
+) -> np.ndarray:
+    batches = []
+    for start in range(0, len(queries), _GROUND_TRUTH_BATCH):
+        similarity = _similarity(corpus, queries[start : start + _GROUND_TRUTH_BATCH], space_type)
+        k = min(top_k, similarity.shape[1])
+        candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(similarity, candidates, axis=1).argsort(axis=1)[:, ::-1]
+        batches.append(np.take_along_axis(candidates, order, axis=1))
+    if not batches:
+        return np.empty((0, min(top_k, len(corpus))), dtype=np.int64)
+    return np.concatenate(batches)
+
+
+def recall_at_k(truth: Sequence[Sequence], found: Sequence[Sequence]) -> float:
+    expected_total = sum(len(expected) for expected in truth)
+    if expected_total == 0:
+        return 0.0
+    hits = sum(len(set(expected) & set(actual)) for expected, actual in zip(truth, found))
+    return hits / expected_total
+
+
+def percentile_ms(samples: list[float], percentile: float) -> float:
+    return float(np.percentile(samples, percentile) * 1000.0) if samples else 0.0
+
+
+@dataclass(frozen=True)
+class BenchmarkQuery:
+    vector: np.ndarray
+    text: str | None = None
+    relevant_chunk_ids: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class RetrievalBenchmarkConfig:
+    top_k: int = 10
+    ef_search: int | None = None
+    text_mode: str = "full"
+
+
+@dataclass(frozen=True)
+class RetrievalBenchmarkResult:
+    top_k: int
+    ef_search: int | None
+    text_mode: str
+    queries: int
+    recall_at_k: float
+    label_recall: float | None
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_response_bytes: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def load_query_set(path: str | Path) -> list[dict]:
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def synthesize_queries(
+    chunk_ids: list[str],
+    vectors: np.ndarray,
+    count: int,
+    noise: float = 0.05,
+    seed: int = 13,
+) -> list[BenchmarkQuery]:
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(chunk_ids), size=min(count, len(chunk_ids)), replace=False)
+    queries = []
+    for position in positions:
+        vector = as_vector(vectors[position])
+        if noise:
+            scale = noise * (np.linalg.norm(vector) or 1.0) / np.sqrt(len(vector))
+            vector = vector + scale * rng.standard_normal(len(vector)).astype(vector.dtype)
+        queries.append(
+            BenchmarkQuery(vector=vector, relevant_chunk_ids=(chunk_ids[int(position)],))
+        )
+    return queries
+
+
+def load_opensearch_vectors(
+    client,
+    index_name: str,
+    batch_size: int = 500,
+) -> tuple[list[str], np.ndarray]:
+    chunk_ids: list[str] = []
+    vectors: list[list[float]] = []
+    hits = scan(
+        client,
+        index=index_name,
+        query={"query": {"match_all": {}}, "_source": ["chunk_id", "embedding"]},
+        size=batch_size,
+    )
+    for hit in hits:
+        source = hit.get("_source", {})
+        if source.get("embedding") is None:
+            continue
+        chunk_ids.append(source.get("chunk_id", hit.get("_id", "")))
+        vectors.append(source["embedding"])
+    logger.info("Loaded %d vectors from index=%s for ground truth", len(chunk_ids), index_name)
+    return chunk_ids, as_matrix(vectors)
+
+
+class _ResponseSizeClient:
+    def __init__(self, client) -> None:
+        self._client = client
+        self.last_bytes = 0
+
+    def search(self, index, body):
+        response = self._client.search(index=index, body=body)
+        self.last_bytes = len(json.dumps(response, separators=(",", ":")).encode("utf-8"))
+        return response
+
+
+def _options_for(base: RetrievalOptions, config: RetrievalBenchmarkConfig) -> RetrievalOptions:
+    return replace(base, ef_search=config.ef_search, text_mode=config.text_mode)
+
+
+def opensearch_search(
+    client,
+    index_name: str,
+    options: RetrievalOptions | None = None,
+) -> SearchFn:
+    measured = _ResponseSizeClient(client)
+    base = options or RetrievalOptions()
+
+    def _search(vector, query_text, config):
+        results = retrieve_knn(
+            measured,
+            index_name,
+            vector,
+            config.top_k,
+            options=_options_for(base, config),
+            query_text=query_text,
+        )
+        return results, measured.last_bytes
+
+    return _search
+
+
+def local_search(store: LocalVectorStore, options: RetrievalOptions | None = None) -> SearchFn:
+    base = options or RetrievalOptions()
+
+    def _search(vector, query_text, config):
+        results = store.search(vector, config.top_k, ef_search=config.ef_search)
+        if config.text_mode != "full":
+            results = [
+                replace(result, text=truncate_text(result.text, base.max_text_chars))
+                for result in results
+            ]
+        payload = [
+            {
+                "chunk_id": result.chunk_id,
+                "source": result.source,
+                "text": result.text,
+                "metadata": result.metadata,
+                "score": result.score,
+            }
+            for result in results
+        ]
+        return results, len(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    return _search
+
+
+def run_retrieval_benchmark(
+    chunk_ids: list[str],
+    vectors: np.ndarray,
+    queries: list[BenchmarkQuery],
+    configurations: list[RetrievalBenchmarkConfig],
+    search: SearchFn,
+    space_type: str = "cosinesimil",
+) -> list[RetrievalBenchmarkResult]:
+    if not queries:
+        raise ValueError("retrieval benchmark needs at least one query")
+    query_matrix = as_matrix([query.vector for query in queries])
+    max_k = max(config.top_k for config in configurations)
+    exact = exact_top_k(as_matrix(vectors), query_matrix, max_k, space_type)
+    labelled = [query for query in queries if query.relevant_chunk_ids]
+    results: list[RetrievalBenchmarkResult] = []
+    for config in configurations:
+        truth = [[chunk_ids[int(position)] for position in row[: config.top_k]] for row in exact]
+        found: list[list[str]] = []
+        latencies: list[float] = []
+        response_bytes: list[int] = []
+        for query in queries:
+            started = time.perf_counter()
+            hits, size = search(query.vector, query.text, config)
+            latencies.append(time.perf_counter() - started)
+            response_bytes.append(size)
+            found.append([hit.chunk_id for hit in hits])
+        label_recall = None
+        if labelled:
+            label_recall = recall_at_k(
+                [query.relevant_chunk_ids for query in queries if query.relevant_chunk_ids],
+                [ids for ids, query in zip(found, queries) if query.relevant_chunk_ids],
+            )
+        result = RetrievalBenchmarkResult(
+            top_k=config.top_k,
+            ef_search=config.ef_search,
+            text_mode=config.text_mode,
+            queries=len(queries),
+            recall_at_k=recall_at_k(truth, found),
+            label_recall=label_recall,
+            p50_ms=percentile_ms(latencies, 50),
+            p95_ms=percentile_ms(latencies, 95),
+            p99_ms=percentile_ms(latencies, 99),
+            mean_response_bytes=float(np.mean(response_bytes)),
+        )
+        logger.info(
+            "Retrieval benchmark top_k=%d ef_search=%s text_mode=%s recall=%.4f p95_ms=%.2f",
+            config.top_k,
+            config.ef_search,
+            config.text_mode,
+            result.recall_at_k,
+            result.p95_ms,
+        )
+        results.append(result)
+    return results
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .embeddings import EmbeddingCache
+from .manifest import chunk_hash
+from .types import Chunk
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCheckpoint(EmbeddingCache):
+    def __init__(
+        self,
+        path: str | Path,
+        settings: dict,
+        resume: bool = False,
+        max_entries: int = 1_000,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(max_entries=max_entries, path=str(self.path))
+        self.settings = dict(settings)
+        self.skipped_chunks = 0
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS indexed_chunks ("
+            "chunk_id TEXT PRIMARY KEY, digest TEXT NOT NULL)"
+        )
+        self._db.commit()
+        previous = self.get_meta("settings")
+        if resume and previous is not None and json.loads(previous) != self.settings:
+            raise RuntimeError(
+                f"checkpoint {self.path} was written with different ingest settings; "
+                "rerun without --resume"
+            )
+        if not resume:
+            self._reset()
+        self.set_meta("settings", json.dumps(self.settings, sort_keys=True))
+        logger.info(
+            "Opened ingest checkpoint path=%s resume=%s indexed_chunks=%d",
+            self.path,
+            resume,
+            self.indexed_count(),
+        )
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM meta")
+            self._db.execute("DELETE FROM indexed_chunks")
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+            self._memory.clear()
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+            self._db.commit()
+
+    def indexed_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM indexed_chunks").fetchone()[0]
+
+    def _indexed_digests(self, chunk_ids: list[str]) -> dict[str, str]:
+        placeholders = ",".join("?" for _ in chunk_ids)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT chunk_id, digest FROM indexed_chunks WHERE chunk_id IN ({placeholders})",
+                chunk_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def pending(self, chunks: Iterable[Chunk], lookup_size: int = 500) -> Iterator[Chunk]:
+        batch: list[Chunk] = []
+
+        def _flush() -> Iterator[Chunk]:
+            indexed = self._indexed_digests([chunk.chunk_id for chunk in batch])
+            for chunk in batch:
+                if indexed.get(chunk.chunk_id) == chunk_hash(chunk):
+                    self.skipped_chunks += 1
+                    continue
+                yield chunk
+
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= lookup_size:
+                yield from _flush()
+                batch = []
+        if batch:
+            yield from _flush()
+
+    def mark_indexed(self, chunks: Iterable[Chunk]) -> None:
+        rows = [(chunk.chunk_id, chunk_hash(chunk)) for chunk in chunks]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO indexed_chunks (chunk_id, digest) VALUES (?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def discard(self) -> None:
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            candidate = self.path.with_name(self.path.name + suffix)
+            if candidate.exists():
+                os.remove(candidate)
+        logger.info("Removed completed ingest checkpoint path=%s", self.path)
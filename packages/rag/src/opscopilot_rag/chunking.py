@@ -1,11 +1,20 @@
 from __future__ import annotations
 
 import logging
+import re
+from typing import Iterator
 
-from .types import Chunk
+from .types import Chunk, ChunkingConfig, Document
 
 logger = logging.getLogger(__name__)
 
+CHUNKING_STRATEGIES = ("fixed", "markdown")
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
 
 def chunk_text(
     document_id: str,
@@ -59,3 +68,202 @@ def chunk_text(
         len(chunks),
     )
     return chunks
+
+
+def estimate_tokens(text: str) -> int:
+    return sum(1 for _ in _TOKEN_PATTERN.finditer(text))
+
+
+def _iter_blocks(text: str) -> Iterator[tuple[str, str, tuple[str, ...]]]:
+    headings: list[str] = []
+    lines: list[str] = []
+    fence: str | None = None
+
+    def _flush(kind: str) -> tuple[str, str, tuple[str, ...]] | None:
+        block = "\n".join(lines).strip("\n")
+        lines.clear()
+        if not block.strip():
+            return None
+        return kind, block, tuple(headings)
+
+    for line in text.split("\n"):
+        fence_match = _FENCE_PATTERN.match(line)
+        if fence is not None:
+            lines.append(line)
+            if fence_match and fence_match.group(1) == fence:
+                fence = None
+                block = _flush("code")
+                if block:
+                    yield block
+            continue
+        if fence_match:
+            block = _flush("paragraph")
+            if block:
+                yield block
+            fence = fence_match.group(1)
+            lines.append(line)
+            continue
+        heading_match = _HEADING_PATTERN.match(line)
+        if heading_match:
+            block = _flush("paragraph")
+            if block:
+                yield block
+            level = len(heading_match.group(1))
+            del headings[level - 1 :]
+            headings.extend([""] * (level - 1 - len(headings)))
+            headings.append(heading_match.group(2))
+            yield "heading", line, tuple(headings)
+            continue
+        if not line.strip():
+            block = _flush("paragraph")
+            if block:
+                yield block
+            continue
+        lines.append(line)
+    block = _flush("code" if fence is not None else "paragraph")
+    if block:
+        yield block
+
+
+def _split_tokens(text: str, max_tokens: int) -> Iterator[str]:
+    starts = [match.start() for match in _TOKEN_PATTERN.finditer(text)]
+    for offset in range(0, len(starts), max_tokens):
+        end = starts[offset + max_tokens] if offset + max_tokens < len(starts) else len(text)
+        yield text[starts[offset] : end]
+
+
+def _split_oversized(kind: str, block: str, max_tokens: int) -> Iterator[str]:
+    if kind == "code":
+        pieces = block.split("\n")
+        separator = "\n"
+    else:
+        pieces = _SENTENCE_PATTERN.split(block)
+        separator = " "
+    current: list[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if piece_tokens > max_tokens:
+            if current:
+                yield separator.join(current)
+                current, current_tokens = [], 0
+            words = piece.split(" ")
+            window: list[str] = []
+            window_tokens = 0
+            for word in words:
+                word_tokens = estimate_tokens(word)
+                if word_tokens > max_tokens:
+                    if window:
+                        yield " ".join(window)
+                        window, window_tokens = [], 0
+                    yield from _split_tokens(word, max_tokens)
+                    continue
+                if window and window_tokens + word_tokens > max_tokens:
+                    yield " ".join(window)
+                    window, window_tokens = [], 0
+                window.append(word)
+                window_tokens += word_tokens
+            if window:
+                yield " ".join(window)
+            continue
+        if current and current_tokens + piece_tokens > max_tokens:
+            yield separator.join(current)
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        yield separator.join(current)
+
+
+def chunk_markdown(
+    document_id: str,
+    text: str,
+    max_tokens: int,
+    metadata: dict | None = None,
+) -> list[Chunk]:
+    logger.debug(
+        "Chunking markdown document document_id=%s text_length=%d max_tokens=%d",
+        document_id,
+        len(text),
+        max_tokens,
+    )
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+
+    base_metadata = metadata or {}
+    chunks: list[Chunk] = []
+    parts: list[str] = []
+    parts_tokens = 0
+    section: tuple[str, ...] = ()
+    only_headings = True
+
+    def _emit() -> None:
+        nonlocal parts_tokens, only_headings
+        if not parts:
+            return
+        index = len(chunks)
+        chunk_metadata = {**base_metadata, "chunk_index": index}
+        heading_path = " > ".join(title for title in section if title)
+        if heading_path:
+            chunk_metadata["section"] = heading_path
+        chunks.append(
+            Chunk(
+                document_id=document_id,
+                chunk_id=f"{document_id}::chunk-{index}",
+                index=index,
+                text="\n\n".join(parts),
+                metadata=chunk_metadata,
+            )
+        )
+        parts.clear()
+        parts_tokens = 0
+        only_headings = True
+
+    def _add(piece: str, piece_tokens: int, headings: tuple[str, ...]) -> None:
+        nonlocal parts_tokens, section
+        if parts and parts_tokens + piece_tokens > max_tokens:
+            _emit()
+        if only_headings:
+            section = headings
+        parts.append(piece)
+        parts_tokens += piece_tokens
+
+    for kind, block, headings in _iter_blocks(text):
+        if kind == "heading" and not only_headings:
+            _emit()
+        block_tokens = estimate_tokens(block)
+        if block_tokens > max_tokens:
+            for piece in _split_oversized(kind, block, max_tokens):
+                _add(piece, estimate_tokens(piece), headings)
+                only_headings = False
+            continue
+        _add(block, block_tokens, headings)
+        if kind != "heading":
+            only_headings = False
+    _emit()
+
+    logger.info(
+        "Markdown chunking completed document_id=%s chunks=%d",
+        document_id,
+        len(chunks),
+    )
+    return chunks
+
+
+def chunk_document(document: Document, config: ChunkingConfig) -> list[Chunk]:
+    if config.strategy == "fixed":
+        return chunk_text(
+            document.document_id,
+            document.content,
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            metadata=document.metadata,
+        )
+    if config.strategy == "markdown":
+        return chunk_markdown(
+            document.document_id,
+            document.content,
+            max_tokens=config.max_tokens,
+            metadata=document.metadata,
+        )
+    raise ValueError(f"unknown chunking strategy: {config.strategy}")
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from opscopilot_rag.benchmarks import (
+    FakeBulkClient,
+    FakeEmbeddingAdapter,
+    generate_corpus,
+    run_ingest_benchmark,
+)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark the RAG ingest pipeline offline with fake embedding and OpenSearch "
+            "backends. Unrecognised flags (e.g. --workers, --chunker, --dedup, --bulk-workers) "
+            "are passed through to the ingest CLI."
+        ),
+        allow_abbrev=False,
+    )
+    parser.add_argument(
+        "--root",
+        help="Existing corpus to ingest; a synthetic corpus is generated when omitted",
+    )
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--bulk-latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def run(args: argparse.Namespace, ingest_args: list[str]) -> int:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    with tempfile.TemporaryDirectory(prefix="opscopilot-rag-bench-") as scratch:
+        root = args.root
+        if root is None:
+            root = scratch
+            generate_corpus(root, documents=args.documents, sections=args.sections, seed=args.seed)
+        result = run_ingest_benchmark(
+            root,
+            ingest_args=ingest_args,
+            adapter=FakeEmbeddingAdapter(
+                dimensions=args.dimensions,
+                latency_s=args.embedding_latency_ms / 1000,
+            ),
+            client=FakeBulkClient(latency_s=args.bulk_latency_ms / 1000),
+        )
+
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2, sort_keys=True))
+        return 0
+    print(f"documents: {result.documents} ({result.docs_per_second:.1f} docs/sec)")
+    print(f"chunks: {result.chunks} ({result.chunks_per_second:.1f} chunks/sec)")
+    print(f"indexed: {result.indexed} in {result.bulk_requests} bulk requests")
+    print(f"bulk payload: {result.bulk_bytes / 1024 / 1024:.1f} MiB")
+    print(f"peak RSS: {result.peak_rss_bytes / 1024 / 1024:.1f} MiB")
+    for stage, seconds in result.stage_seconds.items():
+        print(f"stage {stage}: {seconds:.3f}s")
+    print(f"total: {result.total_seconds:.3f}s")
+    return 0
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args, ingest_args = parser.parse_known_args()
+    try:
+        raise SystemExit(run(args, ingest_args))
+    except Exception as exc:  # pragma: no cover - CLI safety
+        print(f"benchmark failed: {exc}", file=sys.stderr)
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from opscopilot_rag.benchmarks import (
+    BENCHMARK_MODES,
+    run_quantization_benchmark,
+    synthetic_vectors,
+)
+from opscopilot_rag.opensearch_client import OpenSearchClient
+from opscopilot_rag.types import KnnMethodConfig
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Report kNN recall, latency and native memory per vector quantization mode."
+    )
+    parser.add_argument(
+        "--vectors-file",
+        help="Corpus embeddings as a .npy matrix; synthetic vectors are generated when omitted",
+    )
+    parser.add_argument("--queries-file", help="Query embeddings as a .npy matrix")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--modes",
+        default="none,fp16,byte",
+        help=f"Comma-separated modes from {', '.join(BENCHMARK_MODES)}",
+    )
+    parser.add_argument("--space-type", default="cosinesimil")
+    parser.add_argument("--engine", help="kNN engine for the live run, e.g. faiss or lucene")
+    parser.add_argument("--m", type=int, default=16, help="HNSW graph degree")
+    parser.add_argument("--ef-search", type=int)
+    parser.add_argument("--byte-scale", type=float, help="Byte scale; calibrated when omitted")
+    parser.add_argument("--model-id", help="Trained kNN model id for the pq mode")
+    parser.add_argument(
+        "--projected-count",
+        type=int,
+        help="Deployment corpus size used for the native memory estimate",
+    )
+    parser.add_argument(
+        "--opensearch",
+        action="store_true",
+        help="Measure against the OPENSEARCH_URL cluster instead of exact NumPy search",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def _load_vectors(args: argparse.Namespace) -> tuple[np.ndarray, np.ndarray]:
+    if args.vectors_file:
+        corpus = np.load(args.vectors_file)
+        if args.queries_file:
+            queries = np.load(args.queries_file)
+        else:
+            rng = np.random.default_rng(args.seed)
+            queries = corpus[rng.choice(len(corpus), size=min(args.queries, len(corpus)))]
+        return corpus, queries
+    vectors = synthetic_vectors(args.count + args.queries, args.dimensions, seed=args.seed)
+    return vectors[: args.count], vectors[args.count :]
+
+
+def run(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    corpus, queries = _load_vectors(args)
+    knn = KnnMethodConfig(
+        engine=args.engine,
+        space_type=args.space_type,
+        m=args.m,
+        ef_search=args.ef_search,
+        quantization_scale=args.byte_scale,
+        model_id=args.model_id,
+    )
+    client = OpenSearchClient().client if args.opensearch else None
+    results = run_quantization_benchmark(
+        corpus,
+        queries,
+        top_k=args.top_k,
+        modes=tuple(mode.strip() for mode in args.modes.split(",") if mode.strip()),
+        knn=knn,
+        projected_count=args.projected_count,
+        client=client,
+    )
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2, sort_keys=True))
+        return 0
+    count = args.projected_count or len(corpus)
+    print(f"corpus: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries")
+    print(f"search: {'opensearch' if client is not None else 'exact numpy'}")
+    print(f"{'mode':<6} {'recall@' + str(args.top_k):>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'bytes/vec':>10} {'memory @ ' + str(count):>18}")
+    for result in results:
+        print(
+            f"{result.mode:<6} {result.recall_at_k:>10.4f} {result.p50_ms:>8.2f} "
+            f"{result.p95_ms:>8.2f} {result.bytes_per_vector:>10.0f} "
+            f"{result.native_memory_bytes / 1024 / 1024:>15.1f} MiB"
+        )
+        if result.scale is not None:
+            print(f"       byte scale {result.scale:.2f} (set RAG_KNN_QUANTIZATION_SCALE)")
+    return 0
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    try:
+        raise SystemExit(run(args))
+    except Exception as exc:  # pragma: no cover - CLI safety
+        print(f"benchmark failed: {exc}", file=sys.stderr)
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from opscopilot_rag.backends import RETRIEVAL_BACKENDS, read_backend_name
+from opscopilot_rag.benchmarks import (
+    BenchmarkQuery,
+    RetrievalBenchmarkConfig,
+    load_opensearch_vectors,
+    load_query_set,
+    local_search,
+    opensearch_search,
+    run_retrieval_benchmark,
+    synthesize_queries,
+)
+from opscopilot_rag.embeddings import OpenAIEmbeddingAdapter
+from opscopilot_rag.local_store import LocalVectorStore
+from opscopilot_rag.opensearch_client import OpenSearchClient
+from opscopilot_rag.retrieval import TEXT_MODES, retrieval_options_from_env
+from opscopilot_rag.types import EmbeddingRequest
+from opscopilot_rag.vectors import as_vector
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measure kNN recall against exact search, latency and response size."
+    )
+    parser.add_argument("--backend", choices=RETRIEVAL_BACKENDS)
+    parser.add_argument("--local-store", default=os.getenv("RAG_LOCAL_STORE_PATH"))
+    parser.add_argument(
+        "--queries-file",
+        help="JSONL rows with query text or a vector and optional relevant_chunk_ids",
+    )
+    parser.add_argument(
+        "--synthesize",
+        type=int,
+        default=100,
+        help="Number of queries sampled from indexed chunks when --queries-file is omitted",
+    )
+    parser.add_argument("--noise", type=float, default=0.05, help="Noise added to sampled vectors")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--top-k", type=_int_list, default=[3, 5, 10])
+    parser.add_argument(
+        "--ef-search",
+        type=_int_list,
+        default=[],
+        help="Comma-separated per-query ef_search values; the index default is always measured",
+    )
+    parser.add_argument("--text-modes", default="full", help=f"Comma-separated {TEXT_MODES}")
+    parser.add_argument(
+        "--space-type",
+        default=os.getenv("RAG_KNN_SPACE_TYPE", "cosinesimil"),
+        help="Similarity used for the exact ground truth",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def _load_queries(args: argparse.Namespace, chunk_ids, vectors) -> list[BenchmarkQuery]:
+    if not args.queries_file:
+        return synthesize_queries(chunk_ids, vectors, args.synthesize, args.noise, args.seed)
+    rows = load_query_set(args.queries_file)
+    pending = [row["query"] for row in rows if "vector" not in row]
+    embedded = iter(())
+    if pending:
+        request = EmbeddingRequest(texts=pending, input_type="query")
+        embedded = iter(OpenAIEmbeddingAdapter().embed(request).vectors)
+    queries = []
+    for row in rows:
+        vector = as_vector(row["vector"]) if "vector" in row else next(embedded)
+        queries.append(
+            BenchmarkQuery(
+                vector=vector,
+                text=row.get("query"),
+                relevant_chunk_ids=tuple(row.get("relevant_chunk_ids", ())),
+            )
+        )
+    return queries
+
+
+def run(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    options = retrieval_options_from_env()
+    backend = args.backend or read_backend_name()
+    space_type = args.space_type
+    if backend == "local":
+        if not args.local_store:
+            raise RuntimeError("--backend local requires --local-store or RAG_LOCAL_STORE_PATH")
+        store = LocalVectorStore(args.local_store)
+        chunk_ids, vectors, space_type = store.snapshot()
+        search = local_search(store, options)
+        target = args.local_store
+    else:
+        os_client = OpenSearchClient()
+        target = os_client.config.index
+        chunk_ids, vectors = load_opensearch_vectors(os_client.client, target)
+        search = opensearch_search(os_client.client, target, options)
+    if not chunk_ids:
+        raise RuntimeError(f"no vectors found in {target}")
+    text_modes = [mode.strip() for mode in args.text_modes.split(",") if mode.strip()]
+    configurations = [
+        RetrievalBenchmarkConfig(top_k=top_k, ef_search=ef_search, text_mode=text_mode)
+        for top_k in args.top_k
+        for ef_search in [None, *args.ef_search]
+        for text_mode in text_modes
+    ]
+    queries = _load_queries(args, chunk_ids, vectors)
+    results = run_retrieval_benchmark(
+        chunk_ids, vectors, queries, configurations, search, space_type=space_type
+    )
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2, sort_keys=True))
+        return 0
+    print(f"{backend} {target}: {len(chunk_ids)} vectors, {len(queries)} queries, {space_type}")
+    print(f"{'top_k':>5} {'ef':>5} {'text':<9} {'recall':>7} {'labels':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'bytes':>9}")
+    for result in results:
+        labels = f"{result.label_recall:.4f}" if result.label_recall is not None else "-"
+        print(
+            f"{result.top_k:>5} {result.ef_search or '-':>5} {result.text_mode:<9} "
+            f"{result.recall_at_k:>7.4f} {labels:>7} {result.p50_ms:>8.2f} "
+            f"{result.p95_ms:>8.2f} {result.p99_ms:>8.2f} {result.mean_response_bytes:>9.0f}"
+        )
+    return 0
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    try:
+        raise SystemExit(run(args))
+    except Exception as exc:  # pragma: no cover - CLI safety
+        print(f"benchmark failed: {exc}", file=sys.stderr)
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
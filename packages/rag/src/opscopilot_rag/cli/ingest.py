@@ -4,14 +4,69 @@ import argparse
 import logging
 import os
 import sys
-from typing import Iterable
+import time
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from opscopilot_rag.chunking import chunk_text
-from opscopilot_rag.embeddings import OpenAIEmbeddingAdapter
-from opscopilot_rag.indexing import build_index_documents, bulk_upsert_chunks
-from opscopilot_rag.ingestion import load_documents
-from opscopilot_rag.opensearch_client import OpenSearchClient
-from opscopilot_rag.types import EmbeddingRequest, EmbeddingResult, OpenSearchConfig
+import numpy as np
+
+from opscopilot_rag.checkpoint import IngestCheckpoint
+from opscopilot_rag.embeddings import (
+    CachedEmbeddingAdapter,
+    ConcurrentEmbeddingExecutor,
+    EmbeddingAdapter,
+    EmbeddingCache,
+    OpenAIEmbeddingAdapter,
+    embedding_cache_from_env,
+)
+from opscopilot_rag.dedup import NearDuplicateFilter
+from opscopilot_rag.filters import parse_filter_fields
+from opscopilot_rag.indexing import (
+    build_index_documents,
+    bulk_delete_chunks,
+    bulk_update_chunk_metadata,
+    bulk_upsert_chunks,
+)
+from opscopilot_rag.ingestion import discover_document_paths
+from opscopilot_rag.local_store import LocalVectorStoreWriter
+from opscopilot_rag.manifest import IncrementalPlanner, IngestManifest
+from opscopilot_rag.opensearch_client import (
+    OpenSearchClient,
+    bulk_load_settings,
+    ensure_index,
+    generation_index_name,
+    knn_method_config_from_env,
+    opensearch_config_from_env,
+    mark_index_generation,
+    check_alias_target,
+    filtered_knn_engine,
+    prune_index_generations,
+    read_quantization_scale,
+    swap_alias,
+    warm_index,
+)
+from opscopilot_rag.backends import RETRIEVAL_BACKENDS
+from opscopilot_rag.chunking import CHUNKING_STRATEGIES
+from opscopilot_rag.pipeline import iter_batches, iter_chunked_documents, prefetch
+from opscopilot_rag.quantization import (
+    BYTE_CALIBRATION_QUANTILE,
+    QUANTIZATION_MODES,
+    calibrate_byte_scale,
+    count_clipped,
+)
+from opscopilot_rag.types import (
+    BulkIndexConfig,
+    Chunk,
+    ChunkingConfig,
+    EmbeddingRequest,
+    EmbeddingResult,
+    FilterField,
+    IndexedChunk,
+    KnnMethodConfig,
+    OpenSearchConfig,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +77,6 @@ def _parse_bool(value: str | None) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
-def _iter_batches(items: list[str], batch_size: int) -> Iterable[list[str]]:
-    for i in range(0, len(items), batch_size):
-        yield items[i : i + batch_size]
-
-
 def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Ingest documents into OpenSearch for RAG retrieval."
@@ -36,9 +86,172 @@ def build_arg_parser() -> argparse.ArgumentParser:
         "--extensions",
         help="Comma-separated list of allowed file extensions (e.g. .md,.txt)",
     )
+    parser.add_argument(
+        "--chunker",
+        choices=CHUNKING_STRATEGIES,
+        default="fixed",
+        help="fixed: character windows; markdown: heading/paragraph/code-fence aware",
+    )
     parser.add_argument("--chunk-size", type=int, default=1200)
     parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=300,
+        help="Approximate token budget per chunk for the markdown chunker",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Collapse near-duplicate chunks (MinHash/LSH) into one canonical indexed chunk",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.85,
+        help="Estimated Jaccard similarity above which chunks count as duplicates",
+    )
     parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to load, normalize and chunk documents",
+    )
+    parser.add_argument(
+        "--max-pending-batches",
+        type=int,
+        default=2,
+        help="Batches buffered between the load, embed and index stages",
+    )
+    parser.add_argument(
+        "--embedding-concurrency",
+        type=int,
+        default=int(os.getenv("RAG_EMBEDDING_CONCURRENCY", "4")),
+        help="Embedding batches kept in flight at once",
+    )
+    parser.add_argument(
+        "--bulk-max-bytes",
+        type=int,
+        default=10 * 1024 * 1024,
+        help="Upper bound on the size of one OpenSearch _bulk request body",
+    )
+    parser.add_argument("--bulk-max-actions", type=int, default=500)
+    parser.add_argument(
+        "--bulk-workers",
+        type=int,
+        default=2,
+        help="Parallel _bulk requests in flight",
+    )
+    parser.add_argument(
+        "--bulk-max-retries",
+        type=int,
+        default=3,
+        help="Retries for items rejected with 429/5xx",
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        default=os.getenv("RAG_EMBEDDING_CACHE_PATH"),
+        help="SQLite file used to reuse embeddings of previously seen texts",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed and index chunks that changed since the manifest was written",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=os.getenv("RAG_INGEST_MANIFEST_PATH"),
+        help="Path of the content-hash manifest used by --incremental",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=os.getenv("RAG_INGEST_CHECKPOINT_PATH"),
+        help="SQLite spill file recording embedded vectors and indexed chunks of this run",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from --checkpoint, skipping chunks that were already embedded or indexed",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Build a fresh index generation and atomically point the index alias at it",
+    )
+    parser.add_argument(
+        "--keep-generations",
+        type=int,
+        default=1,
+        help="Previous index generations kept after a --rebuild (for rollback)",
+    )
+    parser.add_argument(
+        "--replace-concrete-index",
+        action="store_true",
+        help=(
+            "One-time migration for --rebuild when the index name is still a concrete index: "
+            "delete it in the same atomic swap that turns the name into an alias"
+        ),
+    )
+    parser.add_argument(
+        "--bulk-load",
+        action="store_true",
+        help="Disable refresh and replicas while loading, restore them afterwards",
+    )
+    parser.add_argument(
+        "--force-merge-segments",
+        type=int,
+        help="Force-merge the index down to N segments after a --bulk-load run",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=RETRIEVAL_BACKENDS,
+        default=os.getenv("RAG_BACKEND", "opensearch"),
+        help="opensearch: index into OpenSearch; local: write a memory-mapped vector store",
+    )
+    parser.add_argument(
+        "--local-store",
+        default=os.getenv("RAG_LOCAL_STORE_PATH"),
+        help="Directory of the local vector store written by --backend local",
+    )
+    parser.add_argument(
+        "--local-hnsw",
+        action="store_true",
+        help="Also build an HNSW graph for the local store (requires hnswlib)",
+    )
+    parser.add_argument(
+        "--knn-engine",
+        help=(
+            "kNN engine, e.g. faiss, lucene or nmslib. Defaults to lucene with --filter-fields, "
+            "since nmslib (the OpenSearch default) rejects filtered kNN queries"
+        ),
+    )
+    parser.add_argument("--knn-space-type", help="kNN space type, e.g. l2, cosinesimil, innerproduct")
+    parser.add_argument("--knn-m", type=int, help="HNSW graph degree")
+    parser.add_argument("--knn-ef-construction", type=int, help="HNSW ef_construction")
+    parser.add_argument("--knn-ef-search", type=int, help="HNSW ef_search")
+    parser.add_argument(
+        "--knn-quantization",
+        choices=QUANTIZATION_MODES,
+        help="Store vectors as fp16 (faiss SQ), byte (int8) or pq (trained model)",
+    )
+    parser.add_argument(
+        "--knn-quantization-scale",
+        type=float,
+        help=(
+            "Multiplier applied before rounding byte vectors. Calibrated from the first batch "
+            "when unset and stored in the index _meta, where retrieval reads it back"
+        ),
+    )
+    parser.add_argument("--knn-model-id", help="Trained kNN model id used by pq vectors")
+    parser.add_argument(
+        "--filter-fields",
+        default=os.getenv("RAG_FILTER_FIELDS"),
+        help=(
+            "Keyword metadata fields for filtered kNN, e.g. team=path:0,product=path:1,section. "
+            "Requires the lucene or faiss engine; new indices default to lucene"
+        ),
+    )
     parser.add_argument("--opensearch-url")
     parser.add_argument("--opensearch-index")
     parser.add_argument("--opensearch-username")
@@ -50,7 +263,390 @@ def build_arg_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def ingest_documents(args: argparse.Namespace) -> int:
+_BYTE_CALIBRATION_SAMPLE = 4096
+
+
+def _calibrate_byte_scale(
+    client,
+    index_name: str,
+    embedded: Iterable[tuple[list[Chunk], EmbeddingResult]],
+    knn: KnnMethodConfig,
+) -> tuple[KnnMethodConfig, list[tuple[list[Chunk], EmbeddingResult]]]:
+    stored = read_quantization_scale(client, index_name)
+    if stored is not None:
+        return replace(knn, quantization_scale=stored), []
+    sample: list[tuple[list[Chunk], EmbeddingResult]] = []
+    sampled = 0
+    for batch, embeddings in embedded:
+        sample.append((batch, embeddings))
+        sampled += len(embeddings.vectors)
+        if sampled >= _BYTE_CALIBRATION_SAMPLE:
+            break
+    if not sample:
+        return knn, sample
+    scale = calibrate_byte_scale(np.vstack([embeddings.vectors for _, embeddings in sample]))
+    logger.info(
+        "Calibrated byte quantization scale=%.4f index=%s vectors=%d",
+        scale,
+        index_name,
+        sampled,
+    )
+    return replace(knn, quantization_scale=scale), sample
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    chunks: int = 0
+    indexed: int = 0
+    deleted: int = 0
+    clipped: int = 0
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+
+def _count(items: Iterable, stats: IngestStats, name: str) -> Iterator:
+    for item in items:
+        setattr(stats, name, getattr(stats, name) + 1)
+        yield item
+
+
+def _timed(items: Iterable, record: Callable[[float], None]) -> Iterator:
+    iterator = iter(items)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record(time.perf_counter() - started)
+        yield item
+
+
+def _knn_method_config(args: argparse.Namespace) -> KnnMethodConfig | None:
+    base = knn_method_config_from_env() or KnnMethodConfig()
+    config = KnnMethodConfig(
+        engine=args.knn_engine or base.engine,
+        space_type=args.knn_space_type or base.space_type,
+        m=args.knn_m if args.knn_m is not None else base.m,
+        ef_construction=(
+            args.knn_ef_construction
+            if args.knn_ef_construction is not None
+            else base.ef_construction
+        ),
+        ef_search=args.knn_ef_search if args.knn_ef_search is not None else base.ef_search,
+        quantization=args.knn_quantization or base.quantization,
+        quantization_scale=(
+            args.knn_quantization_scale
+            if args.knn_quantization_scale is not None
+            else base.quantization_scale
+        ),
+        model_id=args.knn_model_id or base.model_id,
+    )
+    if config == KnnMethodConfig():
+        return None
+    return config
+
+
+def _validate_args(args: argparse.Namespace, knn: KnnMethodConfig | None) -> None:
+    if args.incremental and not args.manifest:
+        raise RuntimeError("--incremental requires --manifest or RAG_INGEST_MANIFEST_PATH")
+    if args.incremental and args.rebuild:
+        raise RuntimeError("--incremental and --rebuild cannot be combined")
+    if args.incremental and args.dedup:
+        raise RuntimeError("--incremental and --dedup cannot be combined")
+    if args.resume and not args.checkpoint:
+        raise RuntimeError("--resume requires --checkpoint or RAG_INGEST_CHECKPOINT_PATH")
+    if args.backend != "local":
+        if args.filter_fields and (knn is None or knn.quantization != "pq"):
+            filtered_knn_engine(knn)
+        return
+    if not args.local_store:
+        raise RuntimeError("--backend local requires --local-store or RAG_LOCAL_STORE_PATH")
+    if args.incremental or args.resume:
+        raise RuntimeError(
+            "--backend local rebuilds the store on every run; drop --incremental/--resume"
+        )
+    if knn is not None and knn.quantization:
+        raise RuntimeError(
+            "--knn-quantization applies to the OpenSearch mapping; drop it for --backend local"
+        )
+
+
+def _opensearch_config(args: argparse.Namespace) -> OpenSearchConfig | None:
+    if not (args.opensearch_url and args.opensearch_index):
+        return None
+    return OpenSearchConfig(
+        url=args.opensearch_url,
+        index=args.opensearch_index,
+        username=args.opensearch_username,
+        password=args.opensearch_password,
+        verify_certs=_parse_bool(args.opensearch_verify_certs),
+    )
+
+
+def _chunking_config(args: argparse.Namespace) -> ChunkingConfig:
+    return ChunkingConfig(
+        strategy=args.chunker,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        max_tokens=args.chunk_tokens,
+    )
+
+
+def _bulk_config(args: argparse.Namespace) -> BulkIndexConfig:
+    return BulkIndexConfig(
+        max_bytes=args.bulk_max_bytes,
+        max_actions=args.bulk_max_actions,
+        workers=args.bulk_workers,
+        max_retries=args.bulk_max_retries,
+    )
+
+
+def _mapping_settings(knn: KnnMethodConfig | None, filter_fields: tuple[FilterField, ...]) -> dict:
+    settings: dict = {}
+    if knn is not None and knn.quantization:
+        settings["quantization"] = knn.quantization
+    if filter_fields:
+        settings["filter_fields"] = [asdict(field) for field in filter_fields]
+    return settings
+
+
+def _build_planner(
+    args: argparse.Namespace, run_settings: dict
+) -> IncrementalPlanner | None:
+    if not args.incremental:
+        return None
+    return IncrementalPlanner(IngestManifest.load(args.manifest), settings=run_settings)
+
+
+def _build_checkpoint(
+    args: argparse.Namespace, run_settings: dict
+) -> IngestCheckpoint | None:
+    if not args.checkpoint:
+        return None
+    return IngestCheckpoint(
+        args.checkpoint,
+        settings={**run_settings, "rebuild": args.rebuild, "dedup": args.dedup},
+        resume=args.resume,
+    )
+
+
+def _chunk_stage(
+    args: argparse.Namespace,
+    root: Path,
+    paths: list[Path],
+    chunking: ChunkingConfig,
+    stats: IngestStats,
+    planner: IncrementalPlanner | None,
+) -> Iterator[Chunk]:
+    chunked = iter_chunked_documents(
+        root,
+        chunking,
+        workers=args.workers,
+        paths=paths,
+        known_hashes=planner.known_content_hashes() if planner is not None else None,
+        timings=stats.stage_seconds,
+    )
+    chunked_documents = _count(chunked, stats, "documents")
+    if planner is not None:
+        return _count(planner.iter_changed_chunks(chunked_documents), stats, "chunks")
+    return _count(
+        (chunk for _, document_chunks in chunked_documents for chunk in document_chunks),
+        stats,
+        "chunks",
+    )
+
+
+def _embed_stage(
+    args: argparse.Namespace,
+    chunks: Iterable[Chunk],
+    executor: ConcurrentEmbeddingExecutor,
+) -> Iterator[tuple[list[Chunk], EmbeddingResult]]:
+    batches = prefetch(
+        iter_batches(chunks, args.batch_size),
+        max_pending=args.max_pending_batches,
+        name="chunk",
+    )
+    requests = (
+        (batch, EmbeddingRequest(texts=[chunk.text for chunk in batch])) for batch in batches
+    )
+    return prefetch(executor.map(requests), max_pending=args.max_pending_batches, name="embed")
+
+
+def _target_index(
+    args: argparse.Namespace, alias: str, checkpoint: IngestCheckpoint | None
+) -> str:
+    target_index = alias
+    if args.rebuild:
+        target_index = generation_index_name(alias)
+        if checkpoint is not None:
+            target_index = checkpoint.get_meta("target_index") or target_index
+    if checkpoint is not None:
+        checkpoint.set_meta("target_index", target_index)
+    return target_index
+
+
+def _write_local(
+    embedded: Iterable[tuple[list[Chunk], EmbeddingResult]],
+    local_writer: LocalVectorStoreWriter,
+    knn: KnnMethodConfig | None,
+    filter_fields: tuple[FilterField, ...],
+    checkpoint: IngestCheckpoint | None,
+    stats: IngestStats,
+) -> None:
+    for batch, embeddings in embedded:
+        started = time.perf_counter()
+        if embeddings.dimensions == 0:
+            raise RuntimeError("Embedding dimensions not detected")
+        stats.indexed += local_writer.add(
+            build_index_documents(
+                batch, embeddings=embeddings, knn=knn, filter_fields=filter_fields
+            )
+        )
+        if checkpoint is not None:
+            checkpoint.mark_indexed(batch)
+        stats.add_time("index", time.perf_counter() - started)
+
+
+def _index_stage(
+    args: argparse.Namespace,
+    embedded: Iterable[tuple[list[Chunk], EmbeddingResult]],
+    stack: ExitStack,
+    client,
+    target_index: str,
+    knn: KnnMethodConfig | None,
+    filter_fields: tuple[FilterField, ...],
+    bulk_config: BulkIndexConfig,
+    checkpoint: IngestCheckpoint | None,
+    stats: IngestStats,
+) -> bool:
+    index_ready = False
+    unacknowledged: dict[str, Chunk] = {}
+    waited = 0.0
+
+    def _wait(seconds: float) -> None:
+        nonlocal waited
+        waited += seconds
+
+    def _batches() -> Iterator[tuple[list[Chunk], EmbeddingResult]]:
+        nonlocal knn
+        batches = iter(_timed(embedded, _wait))
+        if knn is not None and knn.quantization == "byte" and knn.quantization_scale is None:
+            knn, sample = _calibrate_byte_scale(client, target_index, batches, knn)
+            yield from sample
+        yield from batches
+
+    def _documents() -> Iterator[IndexedChunk]:
+        nonlocal index_ready
+        for batch, embeddings in _batches():
+            if embeddings.dimensions == 0:
+                raise RuntimeError("Embedding dimensions not detected")
+            if knn is not None and knn.quantization == "byte":
+                clipped = count_clipped(embeddings.vectors, knn.quantization_scale)
+                stats.clipped += clipped
+                expected = (1 - BYTE_CALIBRATION_QUANTILE) * embeddings.vectors.size
+                if clipped:
+                    logger.log(
+                        logging.WARNING if clipped > expected else logging.DEBUG,
+                        "Byte quantization clipped %d of %d values in batch index=%s scale=%.4f",
+                        clipped,
+                        embeddings.vectors.size,
+                        target_index,
+                        knn.quantization_scale,
+                    )
+            if not index_ready:
+                ensure_index(
+                    client,
+                    target_index,
+                    embeddings.dimensions,
+                    knn=knn,
+                    filter_fields=filter_fields,
+                )
+                index_ready = True
+                if args.bulk_load:
+                    stack.enter_context(
+                        bulk_load_settings(
+                            client,
+                            target_index,
+                            force_merge_segments=args.force_merge_segments,
+                        )
+                    )
+            if checkpoint is not None:
+                unacknowledged.update((chunk.chunk_id, chunk) for chunk in batch)
+            yield from build_index_documents(
+                batch, embeddings=embeddings, knn=knn, filter_fields=filter_fields
+            )
+
+    def _acknowledge(chunk_ids: list[str]) -> None:
+        if checkpoint is not None:
+            checkpoint.mark_indexed(
+                unacknowledged.pop(chunk_id)
+                for chunk_id in chunk_ids
+                if chunk_id in unacknowledged
+            )
+        logger.debug(
+            "ingest: documents=%d chunks=%d acknowledged=%d",
+            stats.documents,
+            stats.chunks,
+            len(chunk_ids),
+        )
+
+    started = time.perf_counter()
+    stats.indexed += bulk_upsert_chunks(
+        client,
+        target_index,
+        _documents(),
+        config=bulk_config,
+        on_indexed=_acknowledge,
+    )
+    stats.add_time("index", time.perf_counter() - started - waited)
+    return index_ready
+
+
+def _publish_rebuild(args: argparse.Namespace, client, alias: str, target_index: str) -> None:
+    warm_index(client, target_index)
+    swap_alias(client, alias, target_index, replace_concrete=args.replace_concrete_index)
+    pruned = prune_index_generations(client, alias, keep=args.keep_generations)
+    print(
+        f"Alias '{alias}' now points at '{target_index}' "
+        f"({len(pruned)} old generations deleted)."
+    )
+
+
+def _print_run_stats(
+    cache: EmbeddingCache,
+    executor: ConcurrentEmbeddingExecutor,
+    checkpoint: IngestCheckpoint | None,
+    dedup: NearDuplicateFilter | None,
+) -> None:
+    if checkpoint is not None:
+        print(
+            f"Checkpoint: {checkpoint.skipped_chunks} chunks already indexed, "
+            f"{checkpoint.hits} embeddings reused."
+        )
+    print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses.")
+    print(
+        f"Embedded {executor.texts_embedded} texts in {executor.elapsed_s:.1f}s "
+        f"({executor.texts_per_second:.1f} texts/sec, {executor.throttled} throttled retries)."
+    )
+    if dedup is not None:
+        print(
+            f"Near-duplicate filtering: {dedup.duplicate_chunks} of {dedup.seen} chunks "
+            f"collapsed into {len(dedup.duplicates)} canonical chunks."
+        )
+
+
+def ingest_documents(
+    args: argparse.Namespace,
+    adapter: EmbeddingAdapter | None = None,
+    client=None,
+    stats: IngestStats | None = None,
+    cache: EmbeddingCache | None = None,
+) -> int:
     logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     extensions = None
     if args.extensions:
@@ -58,66 +654,132 @@ def ingest_documents(args: argparse.Namespace) -> int:
 
     logger.debug("ingest: root=%s", args.root)
     logger.debug("ingest: extensions=%s", extensions)
-    documents = load_documents(args.root, extensions=extensions)
-    if not documents:
+
+    knn = _knn_method_config(args)
+    _validate_args(args, knn)
+    root = Path(args.root).resolve()
+    paths = discover_document_paths(
+        root, {ext.lower() for ext in extensions} if extensions else None
+    )
+    if not paths:
         print("No documents found to ingest.")
         return 1
-    logger.debug("ingest: documents=%d", len(documents))
-
-    chunks = []
-    for doc in documents:
-        chunks.extend(
-            chunk_text(
-                doc.document_id,
-                doc.content,
-                chunk_size=args.chunk_size,
-                chunk_overlap=args.chunk_overlap,
-                metadata=doc.metadata,
-            )
+
+    local = args.backend == "local"
+    filter_fields = parse_filter_fields(args.filter_fields)
+    mapping_settings = _mapping_settings(knn, filter_fields)
+    chunking = _chunking_config(args)
+    bulk_config = _bulk_config(args)
+    if local:
+        client = None
+        alias = args.local_store
+    elif client is None:
+        os_client = OpenSearchClient(_opensearch_config(args))
+        client, alias = os_client.client, os_client.config.index
+    else:
+        alias = args.opensearch_index or opensearch_config_from_env().index
+    if client is not None and args.rebuild:
+        check_alias_target(client, alias, args.replace_concrete_index)
+    adapter = adapter or OpenAIEmbeddingAdapter()
+
+    run_settings = {
+        "index": alias,
+        "model_id": adapter.model,
+        **asdict(chunking),
+        **mapping_settings,
+    }
+    stats = stats if stats is not None else IngestStats()
+    planner = _build_planner(args, run_settings)
+    chunks = _chunk_stage(args, root, paths, chunking, stats, planner)
+    dedup: NearDuplicateFilter | None = None
+    if args.dedup:
+        dedup = NearDuplicateFilter(threshold=args.dedup_threshold)
+        chunks = dedup.filter(chunks)
+    checkpoint = _build_checkpoint(args, run_settings)
+    if checkpoint is not None:
+        chunks = checkpoint.pending(chunks)
+
+    cache = cache if cache is not None else embedding_cache_from_env(args.embedding_cache)
+    embedder = CachedEmbeddingAdapter(adapter, cache)
+    if checkpoint is not None:
+        embedder = CachedEmbeddingAdapter(embedder, checkpoint)
+    executor = ConcurrentEmbeddingExecutor(embedder, max_in_flight=args.embedding_concurrency)
+    embedded = _embed_stage(args, chunks, executor)
+
+    local_writer: LocalVectorStoreWriter | None = None
+    if local:
+        local_writer = LocalVectorStoreWriter(
+            args.local_store,
+            knn=knn,
+            build_hnsw=args.local_hnsw,
+            keep_generations=args.keep_generations,
         )
+    target_index = _target_index(args, alias, checkpoint)
+    index_ready = False
+    with ExitStack() as stack:
+        if local_writer is not None:
+            _write_local(embedded, local_writer, knn, filter_fields, checkpoint, stats)
+        else:
+            index_ready = _index_stage(
+                args,
+                embedded,
+                stack,
+                client,
+                target_index,
+                knn,
+                filter_fields,
+                bulk_config,
+                checkpoint,
+                stats,
+            )
+        if planner is not None:
+            orphaned = planner.orphaned_chunk_ids()
+            if orphaned and client.indices.exists(index=target_index):
+                stats.deleted = bulk_delete_chunks(
+                    client, target_index, orphaned, config=bulk_config
+                )
+        if dedup is not None and local_writer is not None:
+            local_writer.update_metadata(dedup.duplicate_metadata())
+        elif dedup is not None and dedup.duplicates and index_ready:
+            bulk_update_chunk_metadata(
+                client,
+                target_index,
+                dedup.duplicate_metadata(),
+                config=bulk_config,
+            )
 
-    if not chunks:
+    stats.add_time("embed", executor.busy_s)
+    indexed, deleted = stats.indexed, stats.deleted
+    if local_writer is not None:
+        if indexed:
+            generation = local_writer.commit()
+            print(f"Local vector store '{alias}' now serves generation '{generation}'.")
+        else:
+            local_writer.abort()
+    elif index_ready or deleted:
+        mark_index_generation(client, target_index)
+    if args.rebuild and index_ready:
+        _publish_rebuild(args, client, alias, target_index)
+
+    cache.close()
+    _print_run_stats(cache, executor, checkpoint, dedup)
+    if stats.clipped:
+        print(f"Byte quantization clipped {stats.clipped} vector values.")
+    if checkpoint is not None:
+        checkpoint.discard()
+    if planner is not None:
+        planner.current.save(args.manifest)
+        print(
+            f"Incremental ingest into index '{target_index}': "
+            f"{indexed} chunks upserted, {deleted} chunks deleted, "
+            f"{planner.unchanged_documents} documents unchanged."
+        )
+        return 0
+    if stats.chunks == 0:
         print("No chunks created from documents.")
         return 1
-    logger.debug("ingest: chunks=%d", len(chunks))
-
-    if args.opensearch_url and args.opensearch_index:
-        config = OpenSearchConfig(
-            url=args.opensearch_url,
-            index=args.opensearch_index,
-            username=args.opensearch_username,
-            password=args.opensearch_password,
-            verify_certs=_parse_bool(args.opensearch_verify_certs),
-        )
-    else:
-        config = None
-    os_client = OpenSearchClient(config)
-
-    adapter = OpenAIEmbeddingAdapter()
-    texts = [chunk.text for chunk in chunks]
-    vectors: list[list[float]] = []
-    dimensions = 0
-    model_id: str | None = None
-    for batch in _iter_batches(texts, args.batch_size):
-        embeddings = adapter.embed(EmbeddingRequest(texts=batch))
-        vectors.extend(embeddings.vectors)
-        dimensions = embeddings.dimensions or dimensions
-        model_id = model_id or embeddings.model_id
-
-    if dimensions == 0:
-        raise RuntimeError("Embedding dimensions not detected")
-
-    os_client.ensure_index(dimensions)
-    embeddings_result = EmbeddingResult(
-        vectors=vectors,
-        model_id=model_id or "unknown",
-        dimensions=dimensions,
-    )
-    logger.debug("ingest: embeddings=%d dims=%d", len(vectors), dimensions)
-    documents_to_index = build_index_documents(chunks, embeddings=embeddings_result)
-    indexed = bulk_upsert_chunks(os_client.client, os_client.config.index, documents_to_index)
-    logger.debug("ingest: indexed=%d index=%s", indexed, os_client.config.index)
-    print(f"Ingested {indexed} chunks into index '{os_client.config.index}'.")
+    logger.debug("ingest: indexed=%d index=%s", indexed, target_index)
+    print(f"Ingested {indexed} chunks into index '{target_index}'.")
     return 0
 
 
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import replace
+
+import numpy as np
+
+from .chunking import estimate_tokens
+from .types import ContextAssemblyConfig, RetrievalResult
+from .vectors import as_matrix, as_vector
+
+logger = logging.getLogger(__name__)
+
+_MAX_OVERLAP_CHARS = 2000
+
+
+def _read_number_env(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number") from exc
+
+
+def context_assembly_config_from_env(top_k: int) -> ContextAssemblyConfig:
+    candidates = int(_read_number_env("RAG_CANDIDATES", top_k * 4))
+    mmr_lambda = _read_number_env("RAG_MMR_LAMBDA", 0.7)
+    if not 0.0 <= mmr_lambda <= 1.0:
+        raise RuntimeError("RAG_MMR_LAMBDA must be between 0 and 1")
+    return ContextAssemblyConfig(
+        candidates=max(candidates, top_k),
+        max_chunks=top_k,
+        token_budget=int(_read_number_env("RAG_CONTEXT_TOKEN_BUDGET", 1500)),
+        mmr_lambda=mmr_lambda,
+        merge_neighbors=os.getenv("RAG_MERGE_NEIGHBORS", "true").strip().lower()
+        in {"1", "true", "yes", "y", "on"},
+    )
+
+
+def format_context_line(result: RetrievalResult) -> str:
+    return f"[{result.source}] {result.text}"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def mmr_order(
+    query_vector: np.ndarray | list[float],
+    results: list[RetrievalResult],
+    mmr_lambda: float,
+) -> list[RetrievalResult]:
+    if mmr_lambda >= 1.0 or len(results) < 2 or any(r.embedding is None for r in results):
+        return list(results)
+    candidates = _normalize_rows(as_matrix([result.embedding for result in results]))
+    query = as_vector(query_vector)
+    query = query / (np.linalg.norm(query) or 1.0)
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    remaining = list(range(len(results)))
+    selected: list[int] = []
+    redundancy = np.zeros(len(results), dtype=candidates.dtype)
+    while remaining:
+        scores = mmr_lambda * relevance[remaining] - (1.0 - mmr_lambda) * redundancy[remaining]
+        best = remaining.pop(int(np.argmax(scores)))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, similarity[best])
+    return [results[position] for position in selected]
+
+
+def _join_overlapping(left: str, right: str) -> str:
+    window = min(len(left), len(right), _MAX_OVERLAP_CHARS)
+    for size in range(window, 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n{right}"
+
+
+def _document_key(result: RetrievalResult) -> tuple[str, str]:
+    return str(result.metadata.get("index") or ""), result.document_id
+
+
+def merge_adjacent(results: list[RetrievalResult]) -> list[RetrievalResult]:
+    by_position = sorted(
+        enumerate(results),
+        key=lambda item: (_document_key(item[1]), item[1].chunk_index),
+    )
+    groups: list[list[tuple[int, RetrievalResult]]] = []
+    for rank, result in by_position:
+        previous = groups[-1][-1][1] if groups else None
+        if (
+            previous is not None
+            and _document_key(previous) == _document_key(result)
+            and result.chunk_index == previous.chunk_index + 1
+        ):
+            groups[-1].append((rank, result))
+        else:
+            groups.append([(rank, result)])
+    merged: list[tuple[int, RetrievalResult]] = []
+    for group in groups:
+        first_rank = min(rank for rank, _ in group)
+        head = group[0][1]
+        if len(group) == 1:
+            merged.append((first_rank, head))
+            continue
+        text = head.text
+        for _, result in group[1:]:
+            text = _join_overlapping(text, result.text)
+        metadata = dict(head.metadata)
+        metadata["merged_chunk_ids"] = [result.chunk_id for _, result in group]
+        merged.append(
+            (
+                first_rank,
+                replace(
+                    head,
+                    text=text,
+                    metadata=metadata,
+                    score=max(result.score for _, result in group),
+                ),
+            )
+        )
+    merged.sort(key=lambda item: item[0])
+    return [result for _, result in merged]
+
+
+def assemble_context(
+    query_vector: np.ndarray | list[float],
+    candidates: list[RetrievalResult],
+    config: ContextAssemblyConfig,
+) -> list[RetrievalResult]:
+    ordered = mmr_order(query_vector, candidates, config.mmr_lambda)
+    selected: list[RetrievalResult] = []
+    used_tokens = 0
+    for result in ordered:
+        if len(selected) >= config.max_chunks:
+            break
+        tokens = estimate_tokens(format_context_line(result))
+        if config.token_budget > 0 and used_tokens + tokens > config.token_budget:
+            continue
+        selected.append(replace(result, embedding=None))
+        used_tokens += tokens
+    if config.merge_neighbors:
+        selected = merge_adjacent(selected)
+    logger.debug(
+        "Assembled RAG context candidates=%d selected=%d tokens=%d budget=%d",
+        len(candidates),
+        len(selected),
+        used_tokens,
+        config.token_budget,
+    )
+    return selected
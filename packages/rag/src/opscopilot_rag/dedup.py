@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import re
+import zlib
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .types import Chunk
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64(4294967291)
+_SEED = 1729
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i : i + shingle_size]) for i in range(len(words) - shingle_size + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5) -> None:
+        rng = np.random.default_rng(_SEED)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingle_hashes(text, self.shingle_size)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+
+class NearDuplicateFilter:
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+    ) -> None:
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self._hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self._threshold = threshold
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._buckets: list[dict[bytes, str]] = [{} for _ in range(bands)]
+        self._signatures: dict[str, np.ndarray] = {}
+        self.duplicates: dict[str, list[Chunk]] = {}
+        self.seen = 0
+        self.duplicate_chunks = 0
+
+    def _find_canonical(self, signature: np.ndarray) -> tuple[str | None, list[bytes]]:
+        keys: list[bytes] = []
+        candidates: list[str] = []
+        for band in range(self._bands):
+            key = signature[band * self._rows : (band + 1) * self._rows].tobytes()
+            keys.append(key)
+            candidate = self._buckets[band].get(key)
+            if candidate is not None and candidate not in candidates:
+                candidates.append(candidate)
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self._threshold:
+                return candidate, keys
+        return None, keys
+
+    def filter(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        for chunk in chunks:
+            self.seen += 1
+            signature = self._hasher.signature(chunk.text)
+            canonical, keys = self._find_canonical(signature)
+            if canonical is not None:
+                self.duplicates.setdefault(canonical, []).append(chunk)
+                self.duplicate_chunks += 1
+                continue
+            self._signatures[chunk.chunk_id] = signature
+            for band, key in enumerate(keys):
+                self._buckets[band].setdefault(key, chunk.chunk_id)
+            yield chunk
+        logger.info(
+            "Near-duplicate filtering completed chunks=%d canonical=%d duplicates=%d",
+            self.seen,
+            len(self._signatures),
+            self.duplicate_chunks,
+        )
+
+    def duplicate_metadata(self) -> Iterator[tuple[str, dict]]:
+        for canonical, duplicates in self.duplicates.items():
+            yield canonical, {
+                "duplicate_sources": sorted(
+                    {chunk.metadata.get("source", chunk.document_id) for chunk in duplicates}
+                ),
+                "duplicate_chunk_ids": [chunk.chunk_id for chunk in duplicates],
+            }
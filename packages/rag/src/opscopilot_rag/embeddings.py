@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
+import random
+import sqlite3
+import threading
+import time
 import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, TypeVar
+
+import numpy as np
 
 from opscopilot_llm_gateway.accounting import CostLedger
 from opscopilot_llm_gateway.budgets import BudgetEnforcer, BudgetState
@@ -13,9 +23,14 @@ from opscopilot_llm_gateway.types import EmbeddingRequest, EmbeddingResponse, Ll
 
 from .types import EmbeddingRequest as RagEmbeddingRequest
 from .types import EmbeddingResult
+from .vectors import VECTOR_DTYPE, as_matrix
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "rate_limit_exceeded"}
+
 
 def _read_env(name: str) -> str:
     value = os.getenv(name)
@@ -32,6 +47,14 @@ def _read_budget() -> float:
         raise RuntimeError("RAG_EMBEDDING_MAX_BUDGET_USD must be a number") from exc
 
 
+def _read_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer") from exc
+
+
 def read_cost_table_path() -> str:
     return _read_env("LLM_COST_TABLE_PATH")
 
@@ -44,6 +67,12 @@ class EmbeddingAdapter:
     def embed(self, request: RagEmbeddingRequest) -> EmbeddingResult:
         raise NotImplementedError("embedding adapter is not configured")
 
+    def fork(self) -> "EmbeddingAdapter":
+        return self
+
+    def reset_budget(self) -> None:
+        return None
+
 
 class OpenAIEmbeddingAdapter(EmbeddingAdapter):
     def __init__(
@@ -54,15 +83,31 @@ class OpenAIEmbeddingAdapter(EmbeddingAdapter):
         budget: BudgetEnforcer | None = None,
         ledger: CostLedger | None = None,
         bedrock_client=None,
+        cost_table: dict | None = None,
     ) -> None:
         self.provider = provider or build_embedding_provider(client=bedrock_client)
         self.model = model or read_embedding_model_id()
-        self.cost_table = load_cost_table(cost_table_path or read_cost_table_path())
+        if cost_table is None:
+            cost_table = load_cost_table(cost_table_path or read_cost_table_path())
+        self.cost_table = cost_table
         self.budget = budget or BudgetEnforcer(
             BudgetState(max_usd=_read_budget(), total_usd=0.0)
         )
         self.ledger = ledger or CostLedger()
 
+    def fork(self) -> "OpenAIEmbeddingAdapter":
+        return OpenAIEmbeddingAdapter(
+            provider=self.provider,
+            model=self.model,
+            cost_table=self.cost_table,
+        )
+
+    def reset_budget(self) -> None:
+        self.budget = BudgetEnforcer(
+            BudgetState(max_usd=self.budget.state().max_usd, total_usd=0.0)
+        )
+        self.ledger = CostLedger()
+
     def embed(self, request: RagEmbeddingRequest) -> EmbeddingResult:
         logger.info(
             "Running embedding request model=%s texts=%d",
@@ -75,6 +120,7 @@ class OpenAIEmbeddingAdapter(EmbeddingAdapter):
             texts=request.texts,
             idempotency_key=str(uuid.uuid4()),
             tags=tags,
+            input_type=request.input_type,
         )
         response: EmbeddingResponse = run_embedding_call(
             provider=self.provider,
@@ -83,15 +129,333 @@ class OpenAIEmbeddingAdapter(EmbeddingAdapter):
             budget=self.budget,
             ledger=self.ledger,
         )
-        dimensions = len(response.vectors[0]) if response.vectors else 0
+        vectors = as_matrix(response.vectors)
+        dimensions = vectors.shape[1]
         logger.debug(
             "Embedding request completed model=%s vectors=%d dimensions=%d",
             self.model,
-            len(response.vectors),
+            len(vectors),
             dimensions,
         )
         return EmbeddingResult(
-            vectors=response.vectors,
+            vectors=vectors,
             model_id=self.model,
             dimensions=dimensions,
         )
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    status_code = getattr(exc, "status_code", None)
+    if status_code == 429:
+        return True
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        error_code = response.get("Error", {}).get("Code")
+        http_status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if error_code in _THROTTLE_CODES or http_status == 429:
+            return True
+    code = getattr(exc, "code", None)
+    if code in _THROTTLE_CODES:
+        return True
+    message = str(exc).lower()
+    return "throttl" in message or "rate limit" in message or "too many requests" in message
+
+
+class ConcurrentEmbeddingExecutor:
+    def __init__(
+        self,
+        adapter: EmbeddingAdapter,
+        max_in_flight: int = 4,
+        max_retries: int = 5,
+        initial_backoff_s: float = 1.0,
+        max_backoff_s: float = 30.0,
+    ) -> None:
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self._adapter = adapter
+        self._max_in_flight = max_in_flight
+        self._max_retries = max_retries
+        self._initial_backoff_s = initial_backoff_s
+        self._max_backoff_s = max_backoff_s
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self.texts_embedded = 0
+        self.batches_embedded = 0
+        self.throttled = 0
+        self.elapsed_s = 0.0
+        self.busy_s = 0.0
+        self._in_flight = 0
+        self._busy_since = 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        if self.elapsed_s <= 0:
+            return 0.0
+        return self.texts_embedded / self.elapsed_s
+
+    def _wait_for_cooldown(self) -> None:
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _back_off(self, attempt: int) -> float:
+        delay = min(self._max_backoff_s, self._initial_backoff_s * (2**attempt))
+        delay = random.uniform(delay / 2, delay)
+        with self._lock:
+            self.throttled += 1
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def _begin_request(self) -> None:
+        with self._lock:
+            if self._in_flight == 0:
+                self._busy_since = time.perf_counter()
+            self._in_flight += 1
+
+    def _end_request(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self.busy_s += time.perf_counter() - self._busy_since
+
+    def _embed(self, request: RagEmbeddingRequest) -> EmbeddingResult:
+        attempt = 0
+        while True:
+            self._wait_for_cooldown()
+            self._begin_request()
+            try:
+                result = self._adapter.embed(request)
+            except Exception as exc:
+                self._end_request()
+                if not is_throttling_error(exc) or attempt >= self._max_retries:
+                    raise
+                delay = self._back_off(attempt)
+                logger.warning(
+                    "Embedding request throttled; backing off attempt=%d delay_s=%.2f texts=%d",
+                    attempt + 1,
+                    delay,
+                    len(request.texts),
+                )
+                attempt += 1
+                continue
+            self._end_request()
+            with self._lock:
+                self.texts_embedded += len(request.texts)
+                self.batches_embedded += 1
+            return result
+
+    def map(
+        self,
+        requests: Iterable[tuple[T, RagEmbeddingRequest]],
+    ) -> Iterator[tuple[T, EmbeddingResult]]:
+        started = time.perf_counter()
+        pending: deque[tuple[T, Future]] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self._max_in_flight,
+            thread_name_prefix="opscopilot-rag-embed",
+        ) as pool:
+            try:
+                for payload, request in requests:
+                    pending.append((payload, pool.submit(self._embed, request)))
+                    if len(pending) >= self._max_in_flight:
+                        payload_done, future = pending.popleft()
+                        yield payload_done, future.result()
+                while pending:
+                    payload_done, future = pending.popleft()
+                    yield payload_done, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+                self.elapsed_s += time.perf_counter() - started
+                logger.info(
+                    "Embedding executor finished batches=%d texts=%d throttled=%d texts_per_sec=%.1f",
+                    self.batches_embedded,
+                    self.texts_embedded,
+                    self.throttled,
+                    self.texts_per_second,
+                )
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries: int = 10_000, path: str | None = None) -> None:
+        self._max_entries = max_entries
+        self._memory: OrderedDict[tuple[str, int, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._dimensions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model_id TEXT NOT NULL, dimensions INTEGER NOT NULL, digest TEXT NOT NULL, "
+                "vector BLOB NOT NULL, PRIMARY KEY (model_id, dimensions, digest))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS model_dimensions ("
+                "model_id TEXT PRIMARY KEY, dimensions INTEGER NOT NULL)"
+            )
+            if self._db.execute("SELECT 1 FROM model_dimensions LIMIT 1").fetchone() is None:
+                self._db.execute(
+                    "INSERT INTO model_dimensions (model_id, dimensions) "
+                    "SELECT model_id, MAX(dimensions) FROM embeddings GROUP BY model_id"
+                )
+            self._db.commit()
+            self._dimensions = dict(
+                self._db.execute("SELECT model_id, dimensions FROM model_dimensions")
+            )
+            logger.info("Opened embedding cache path=%s", path)
+
+    def _remember(self, key: tuple[str, int, str], vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def dimensions(self, model_id: str) -> int:
+        with self._lock:
+            return self._dimensions.get(model_id, 0)
+
+    def get_many(self, model_id: str, dimensions: int, digests: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        if dimensions <= 0:
+            with self._lock:
+                self.misses += len(digests)
+            return found
+        with self._lock:
+            missing: list[str] = []
+            for digest in digests:
+                key = (model_id, dimensions, digest)
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(digest)
+                    continue
+                self._memory.move_to_end(key)
+                found[digest] = vector
+            if missing and self._db is not None:
+                placeholders = ",".join("?" for _ in missing)
+                rows = self._db.execute(
+                    "SELECT digest, vector FROM embeddings "
+                    f"WHERE model_id = ? AND dimensions = ? AND digest IN ({placeholders})",
+                    [model_id, dimensions, *missing],
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = np.frombuffer(blob, dtype=VECTOR_DTYPE)
+                    found[digest] = vector
+                    self._remember((model_id, dimensions, digest), vector)
+            self.hits += len(found)
+            self.misses += len(digests) - len(found)
+        return found
+
+    def put_many(self, model_id: str, dimensions: int, vectors: dict[str, np.ndarray]) -> None:
+        vectors = {
+            digest: np.array(vector, dtype=VECTOR_DTYPE) for digest, vector in vectors.items()
+        }
+        with self._lock:
+            resized = self._dimensions.get(model_id) != dimensions
+            self._dimensions[model_id] = dimensions
+            for digest, vector in vectors.items():
+                self._remember((model_id, dimensions, digest), vector)
+            if self._db is not None and resized:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO model_dimensions (model_id, dimensions) VALUES (?, ?)",
+                    (model_id, dimensions),
+                )
+                self._db.commit()
+            if self._db is not None and vectors:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model_id, dimensions, digest, vector) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (model_id, dimensions, digest, vector.tobytes())
+                        for digest, vector in vectors.items()
+                    ],
+                )
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def embedding_cache_from_env(path: str | None = None) -> EmbeddingCache:
+    return EmbeddingCache(
+        max_entries=_read_int_env("RAG_EMBEDDING_CACHE_MAX_ENTRIES", 10_000),
+        path=path or os.getenv("RAG_EMBEDDING_CACHE_PATH") or None,
+    )
+
+
+class CachedEmbeddingAdapter(EmbeddingAdapter):
+    def __init__(
+        self,
+        adapter: EmbeddingAdapter,
+        cache: EmbeddingCache,
+        model_id: str | None = None,
+        dimensions: int = 0,
+    ) -> None:
+        self._adapter = adapter
+        self._cache = cache
+        self.model = model_id or getattr(adapter, "model", None) or "unknown"
+        self._dimensions = dimensions or getattr(adapter, "dimensions", 0)
+
+    def _cache_model(self, input_type: str) -> str:
+        return self.model if input_type == "document" else f"{self.model}#{input_type}"
+
+    def _embed_live(
+        self,
+        cache_model: str,
+        texts: dict[str, str],
+        input_type: str,
+        dimensions: int,
+    ) -> dict[str, np.ndarray]:
+        result = self._adapter.embed(
+            RagEmbeddingRequest(texts=list(texts.values()), input_type=input_type)
+        )
+        vectors = as_matrix(result.vectors)
+        if len(vectors) != len(texts):
+            raise RuntimeError("embedding provider returned an unexpected number of vectors")
+        if dimensions and vectors.shape[1] != dimensions:
+            raise RuntimeError(
+                f"embedding model {self.model} returned {vectors.shape[1]}-dimensional "
+                f"vectors, expected {dimensions}"
+            )
+        fresh = dict(zip(texts, vectors))
+        self._cache.put_many(cache_model, vectors.shape[1], fresh)
+        return fresh
+
+    def embed(self, request: RagEmbeddingRequest) -> EmbeddingResult:
+        digests = [text_digest(text) for text in request.texts]
+        unique: dict[str, str] = dict(zip(digests, request.texts))
+        if not unique:
+            return EmbeddingResult(vectors=as_matrix([]), model_id=self.model, dimensions=0)
+        cache_model = self._cache_model(request.input_type)
+        dimensions = self._dimensions or self._cache.dimensions(cache_model)
+        cached = self._cache.get_many(cache_model, dimensions, list(unique))
+        misses = {digest: text for digest, text in unique.items() if digest not in cached}
+        logger.debug(
+            "Embedding cache lookup model=%s texts=%d unique=%d hits=%d misses=%d",
+            self.model,
+            len(request.texts),
+            len(unique),
+            len(cached),
+            len(misses),
+        )
+        vectors = dict(cached)
+        if misses:
+            fresh = self._embed_live(cache_model, misses, request.input_type, self._dimensions)
+            width = len(next(iter(fresh.values())))
+            if cached and width != dimensions:
+                stale = {digest: unique[digest] for digest in cached}
+                fresh.update(self._embed_live(cache_model, stale, request.input_type, width))
+            vectors.update(fresh)
+        matrix = np.stack([vectors[digest] for digest in digests]).astype(VECTOR_DTYPE, copy=False)
+        return EmbeddingResult(vectors=matrix, model_id=self.model, dimensions=matrix.shape[1])
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import PurePosixPath
+from typing import Mapping, Sequence
+
+from .types import FilterField
+
+TOP_LEVEL_FILTER_FIELDS = ("document_id", "source")
+
+NormalizedFilters = tuple[tuple[str, tuple[str, ...]], ...]
+
+
+def parse_filter_fields(value: str | None) -> tuple[FilterField, ...]:
+    fields: list[FilterField] = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, spec = (part.strip() for part in item.partition("="))
+        if not name or name in TOP_LEVEL_FILTER_FIELDS:
+            raise ValueError(f"filter field must be name or name=path:N, got {item!r}")
+        segment = None
+        if spec:
+            kind, _, position = spec.partition(":")
+            if kind != "path":
+                raise ValueError(f"filter field must be name or name=path:N, got {item!r}")
+            try:
+                segment = int(position)
+            except ValueError as exc:
+                raise ValueError(f"filter field path segment must be an integer: {item!r}") from exc
+        fields.append(FilterField(name=name, path_segment=segment))
+    return tuple(fields)
+
+
+def apply_filter_fields(metadata: dict, fields: Sequence[FilterField]) -> dict:
+    directories = PurePosixPath(metadata.get("source", "")).parts[:-1]
+    derived = {}
+    for field in fields:
+        if field.path_segment is None:
+            continue
+        if -len(directories) <= field.path_segment < len(directories):
+            derived[field.name] = directories[field.path_segment]
+    return {**metadata, **derived} if derived else metadata
+
+
+def normalize_filters(filters: Mapping | None) -> NormalizedFilters:
+    normalized = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        values = (value,) if isinstance(value, str) else tuple(value)
+        if not values:
+            continue
+        normalized.append((str(key), tuple(sorted({str(item) for item in values}))))
+    return tuple(sorted(normalized))
+
+
+def _field_path(key: str) -> str:
+    return key if key in TOP_LEVEL_FILTER_FIELDS else f"metadata.{key}"
+
+
+def build_metadata_filter(filters: Mapping | None) -> dict | None:
+    clauses = []
+    for key, values in normalize_filters(filters):
+        if len(values) == 1:
+            clauses.append({"term": {_field_path(key): values[0]}})
+        else:
+            clauses.append({"terms": {_field_path(key): list(values)}})
+    if not clauses:
+        return None
+    return {"bool": {"filter": clauses}}
+
+
+def matches_filters(row: Mapping, filters: NormalizedFilters) -> bool:
+    for key, values in filters:
+        if key in TOP_LEVEL_FILTER_FIELDS:
+            actual = row.get(key)
+        else:
+            actual = row.get("metadata", {}).get(key)
+        candidates = actual if isinstance(actual, list) else [actual]
+        if not any(candidate is not None and str(candidate) in values for candidate in candidates):
+            return False
+    return True
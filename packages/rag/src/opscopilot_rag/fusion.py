@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Sequence
+
+from .types import RetrievalResult
+
+RRF_K = 60
+
+_ResultKey = tuple[str | None, str]
+
+
+def result_key(result: RetrievalResult) -> _ResultKey:
+    return result.metadata.get("index"), result.chunk_id
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[RetrievalResult]],
+    k: int = RRF_K,
+    weights: Sequence[float] | None = None,
+    limit: int | None = None,
+) -> list[RetrievalResult]:
+    if weights is not None and len(weights) != len(result_lists):
+        raise ValueError("weights must match the number of result lists")
+    scores: dict[_ResultKey, float] = {}
+    best: dict[_ResultKey, RetrievalResult] = {}
+    for position, results in enumerate(result_lists):
+        weight = 1.0 if weights is None else weights[position]
+        for rank, result in enumerate(results, start=1):
+            key = result_key(result)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            current = best.get(key)
+            if current is None or (current.embedding is None and result.embedding is not None):
+                best[key] = result
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [replace(best[key], score=scores[key]) for key in ordered]
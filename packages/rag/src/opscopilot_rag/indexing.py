@@ -1,18 +1,43 @@
 from __future__ import annotations
 
+import json
 import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
 
 from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
+from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers import BulkIndexError
 
-from .types import Chunk, EmbeddingResult, IndexedChunk
+from .filters import apply_filter_fields
+from .quantization import quantize_matrix
+from .types import (
+    BulkIndexConfig,
+    BulkIndexResult,
+    BulkItemFailure,
+    Chunk,
+    EmbeddingResult,
+    FilterField,
+    IndexedChunk,
+    KnnMethodConfig,
+)
+from .vectors import as_matrix, vector_to_list
 
 logger = logging.getLogger(__name__)
 
+_RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+_BulkItem = tuple[str, str, bytes]
+
 
 def build_index_documents(
     chunks: list[Chunk],
     embeddings: EmbeddingResult,
+    knn: KnnMethodConfig | None = None,
+    filter_fields: tuple[FilterField, ...] = (),
 ) -> list[IndexedChunk]:
     logger.info(
         "Building index documents chunks=%d embedding_vectors=%d",
@@ -22,8 +47,13 @@ def build_index_documents(
     if len(chunks) != len(embeddings.vectors):
         raise ValueError("chunks and embeddings length mismatch")
 
+    matrix = as_matrix(embeddings.vectors)
+    if knn is not None and knn.quantization == "byte" and knn.quantization_scale is None:
+        raise ValueError("byte vectors need a quantization scale shared with retrieval")
+    if knn is not None and knn.quantization:
+        matrix = quantize_matrix(matrix, knn.quantization, knn.quantization_scale)
     documents: list[IndexedChunk] = []
-    for chunk, vector in zip(chunks, embeddings.vectors):
+    for chunk, vector in zip(chunks, matrix):
         documents.append(
             IndexedChunk(
                 document_id=chunk.document_id,
@@ -31,45 +61,243 @@ def build_index_documents(
                 chunk_index=chunk.index,
                 source=chunk.metadata.get("source", ""),
                 text=chunk.text,
-                metadata=chunk.metadata,
+                metadata=apply_filter_fields(chunk.metadata, filter_fields),
                 embedding=vector,
             )
         )
     return documents
 
 
-def bulk_upsert_chunks(
+def _build_upsert_action(index_name: str, doc: IndexedChunk) -> dict:
+    return {
+        "_op_type": "index",
+        "_index": index_name,
+        "_id": doc.chunk_id,
+        "_source": {
+            "document_id": doc.document_id,
+            "chunk_id": doc.chunk_id,
+            "chunk_index": doc.chunk_index,
+            "source": doc.source,
+            "text": doc.text,
+            "metadata": doc.metadata,
+            "embedding": vector_to_list(doc.embedding),
+        },
+    }
+
+
+def _build_delete_action(index_name: str, chunk_id: str) -> dict:
+    return {"_op_type": "delete", "_index": index_name, "_id": chunk_id}
+
+
+def _build_metadata_update_action(index_name: str, chunk_id: str, metadata: dict) -> dict:
+    return {
+        "_op_type": "update",
+        "_index": index_name,
+        "_id": chunk_id,
+        "_source": {"doc": {"metadata": metadata}},
+    }
+
+
+def _serialize_action(action: dict) -> _BulkItem:
+    op_type = action["_op_type"]
+    header = {op_type: {"_index": action["_index"], "_id": action["_id"]}}
+    payload = json.dumps(header, separators=(",", ":")) + "\n"
+    if op_type != "delete":
+        payload += json.dumps(action["_source"], separators=(",", ":")) + "\n"
+    return action["_id"], op_type, payload.encode("utf-8")
+
+
+def _iter_requests(actions: Iterable[dict], config: BulkIndexConfig) -> Iterator[list[_BulkItem]]:
+    request: list[_BulkItem] = []
+    request_bytes = 0
+    for action in actions:
+        item = _serialize_action(action)
+        size = len(item[2])
+        if request and (
+            request_bytes + size > config.max_bytes or len(request) >= config.max_actions
+        ):
+            yield request
+            request, request_bytes = [], 0
+        request.append(item)
+        request_bytes += size
+    if request:
+        yield request
+
+
+def _item_error(result: dict) -> str:
+    error = result.get("error")
+    if isinstance(error, dict):
+        return f"{error.get('type', 'error')}: {error.get('reason', '')}"
+    return str(error or "")
+
+
+def _send_request(
+    client: OpenSearch,
+    items: list[_BulkItem],
+    config: BulkIndexConfig,
+) -> tuple[BulkIndexResult, list[str]]:
+    succeeded: list[str] = []
+    retries = 0
+    failures: list[BulkItemFailure] = []
+    attempt = 0
+    while items:
+        retry: list[_BulkItem] = []
+        try:
+            response = client.bulk(body=b"".join(payload for _, _, payload in items))
+        except TransportError as exc:
+            if exc.status_code not in _RETRYABLE_STATUSES or attempt >= config.max_retries:
+                raise
+            retry = items
+            response = None
+        if response is not None:
+            entries = response.get("items", [])
+            if len(entries) != len(items):
+                logger.warning(
+                    "OpenSearch bulk response covered %d of %d items; treating the rest as failed",
+                    len(entries),
+                    len(items),
+                )
+            missing = {"status": 503, "error": "item missing from bulk response"}
+            for index, (chunk_id, op_type, payload) in enumerate(items):
+                if index < len(entries):
+                    result = entries[index].get(op_type, {})
+                else:
+                    result = missing
+                status = int(result.get("status", 500))
+                if 200 <= status < 300 or (op_type == "delete" and status == 404):
+                    succeeded.append(chunk_id)
+                elif status in _RETRYABLE_STATUSES and attempt < config.max_retries:
+                    retry.append((chunk_id, op_type, payload))
+                else:
+                    failures.append(
+                        BulkItemFailure(
+                            chunk_id=chunk_id,
+                            op_type=op_type,
+                            status=status,
+                            error=_item_error(result),
+                        )
+                    )
+        if not retry:
+            break
+        delay = min(config.max_backoff_s, config.initial_backoff_s * 2**attempt)
+        delay = random.uniform(delay / 2, delay)
+        attempt += 1
+        retries += len(retry)
+        logger.warning(
+            "OpenSearch bulk items rejected; retrying items=%d attempt=%d delay_s=%.2f",
+            len(retry),
+            attempt,
+            delay,
+        )
+        time.sleep(delay)
+        items = retry
+    result = BulkIndexResult(success=len(succeeded), failures=failures, retries=retries)
+    return result, succeeded
+
+
+def stream_bulk(
     client: OpenSearch,
     index_name: str,
-    documents: list[IndexedChunk],
-) -> int:
-    logger.info(
-        "Upserting chunks into OpenSearch index=%s documents=%d",
-        index_name,
-        len(documents),
-    )
-    actions = []
-    for doc in documents:
-        actions.append(
-            {
-                "_op_type": "index",
-                "_index": index_name,
-                "_id": doc.chunk_id,
-                "_source": {
-                    "document_id": doc.document_id,
-                    "chunk_id": doc.chunk_id,
-                    "chunk_index": doc.chunk_index,
-                    "source": doc.source,
-                    "text": doc.text,
-                    "metadata": doc.metadata,
-                    "embedding": doc.embedding,
-                },
-            }
+    actions: Iterable[dict],
+    config: BulkIndexConfig | None = None,
+    on_indexed: Callable[[list[str]], None] | None = None,
+) -> BulkIndexResult:
+    config = config or BulkIndexConfig()
+    success = 0
+    retries = 0
+    requests = 0
+    failures: list[BulkItemFailure] = []
+
+    def _collect(sent: tuple[BulkIndexResult, list[str]]) -> None:
+        nonlocal success, retries
+        result, succeeded = sent
+        success += result.success
+        retries += result.retries
+        failures.extend(result.failures)
+        if on_indexed is not None and succeeded:
+            on_indexed(succeeded)
+
+    if config.workers <= 1:
+        for items in _iter_requests(actions, config):
+            requests += 1
+            _collect(_send_request(client, items, config))
+    else:
+        pending: deque[Future] = deque()
+        with ThreadPoolExecutor(
+            max_workers=config.workers,
+            thread_name_prefix="opscopilot-rag-bulk",
+        ) as pool:
+            for items in _iter_requests(actions, config):
+                requests += 1
+                pending.append(pool.submit(_send_request, client, items, config))
+                if len(pending) >= config.workers * 2:
+                    _collect(pending.popleft().result())
+            while pending:
+                _collect(pending.popleft().result())
+
+    for failure in failures[:10]:
+        logger.warning(
+            "OpenSearch bulk item failed index=%s id=%s op=%s status=%d error=%s",
+            index_name,
+            failure.chunk_id,
+            failure.op_type,
+            failure.status,
+            failure.error,
         )
-    success, _ = bulk(client, actions)
     logger.debug(
-        "OpenSearch bulk upsert completed index=%s success=%d",
+        "OpenSearch bulk request completed index=%s requests=%d success=%d failed=%d retries=%d",
         index_name,
+        requests,
         success,
+        len(failures),
+        retries,
+    )
+    return BulkIndexResult(success=success, failures=failures, retries=retries)
+
+
+def _raise_on_failures(result: BulkIndexResult) -> int:
+    if result.failures:
+        raise BulkIndexError(
+            f"{len(result.failures)} document(s) failed to index.",
+            result.failures,
+        )
+    return result.success
+
+
+def bulk_upsert_chunks(
+    client: OpenSearch,
+    index_name: str,
+    documents: Iterable[IndexedChunk],
+    config: BulkIndexConfig | None = None,
+    on_indexed: Callable[[list[str]], None] | None = None,
+) -> int:
+    logger.info("Upserting chunks into OpenSearch index=%s", index_name)
+    actions = (_build_upsert_action(index_name, doc) for doc in documents)
+    return _raise_on_failures(
+        stream_bulk(client, index_name, actions, config, on_indexed=on_indexed)
+    )
+
+
+def bulk_delete_chunks(
+    client: OpenSearch,
+    index_name: str,
+    chunk_ids: Iterable[str],
+    config: BulkIndexConfig | None = None,
+) -> int:
+    logger.info("Deleting chunks from OpenSearch index=%s", index_name)
+    actions = (_build_delete_action(index_name, chunk_id) for chunk_id in chunk_ids)
+    return _raise_on_failures(stream_bulk(client, index_name, actions, config))
+
+
+def bulk_update_chunk_metadata(
+    client: OpenSearch,
+    index_name: str,
+    updates: Iterable[tuple[str, dict]],
+    config: BulkIndexConfig | None = None,
+) -> int:
+    logger.info("Updating chunk metadata in OpenSearch index=%s", index_name)
+    actions = (
+        _build_metadata_update_action(index_name, chunk_id, metadata)
+        for chunk_id, metadata in updates
     )
-    return success
+    return _raise_on_failures(stream_bulk(client, index_name, actions, config))
@@ -39,6 +39,18 @@ def discover_document_paths(root_dir: Path, extensions: set[str] | None) -> list
     return sorted(paths)
 
 
+def load_document(path: Path, root: Path, encoding: str = "utf-8") -> Document:
+    raw = path.read_text(encoding=encoding)
+    content = normalize_text(raw)
+    relative_path = path.relative_to(root).as_posix()
+    return Document(
+        document_id=relative_path,
+        source_path=str(path),
+        content=content,
+        metadata={"source": relative_path},
+    )
+
+
 def load_documents(
     root_dir: str | Path,
     extensions: list[str] | None = None,
@@ -51,19 +63,10 @@ def load_documents(
         root,
         sorted(extension_set) if extension_set else "*",
     )
-    documents: list[Document] = []
-    for path in discover_document_paths(root, extension_set):
-        raw = path.read_text(encoding=encoding)
-        content = normalize_text(raw)
-        relative_path = path.relative_to(root).as_posix()
-        documents.append(
-            Document(
-                document_id=relative_path,
-                source_path=str(path),
-                content=content,
-                metadata={"source": relative_path},
-            )
-        )
+    documents = [
+        load_document(path, root, encoding=encoding)
+        for path in discover_document_paths(root, extension_set)
+    ]
     logger.info("Loaded documents count=%d", len(documents))
     if documents:
         logger.debug("First loaded document id=%s", documents[0].document_id)
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from .filters import NormalizedFilters, matches_filters, normalize_filters
+from .types import IndexedChunk, KnnMethodConfig, RetrievalResult
+from .vectors import VECTOR_DTYPE, as_matrix, as_vector
+
+logger = logging.getLogger(__name__)
+
+LOCAL_SPACE_TYPES = ("cosinesimil", "innerproduct", "l2")
+
+_CURRENT = "CURRENT"
+_MANIFEST = "manifest.json"
+_VECTORS = "vectors.f32"
+_CHUNKS = "chunks.jsonl"
+_HNSW = "hnsw.bin"
+_HNSW_SPACES = {"cosinesimil": "cosine", "innerproduct": "ip", "l2": "l2"}
+_FILTERED_EXACT_MAX_ROWS = 10_000
+_FILTER_MASK_CACHE = 64
+
+
+def _import_hnswlib():
+    try:
+        import hnswlib
+    except ImportError as exc:
+        raise RuntimeError("hnswlib is required for HNSW search in the local vector store") from exc
+    return hnswlib
+
+
+def _to_score(similarity: np.ndarray, space_type: str) -> np.ndarray:
+    if space_type == "cosinesimil":
+        return (1.0 + similarity) / 2.0
+    if space_type == "innerproduct":
+        return np.where(similarity >= 0, similarity + 1.0, 1.0 / (1.0 - similarity))
+    return 1.0 / (1.0 + np.maximum(-similarity, 0.0))
+
+
+class LocalVectorStoreWriter:
+    def __init__(
+        self,
+        path: str | Path,
+        knn: KnnMethodConfig | None = None,
+        build_hnsw: bool = False,
+        keep_generations: int = 1,
+    ) -> None:
+        knn = knn or KnnMethodConfig()
+        self.path = Path(path)
+        self.space_type = knn.space_type or "cosinesimil"
+        if self.space_type not in LOCAL_SPACE_TYPES:
+            raise ValueError(f"unsupported local space type: {self.space_type}")
+        self._knn = knn
+        self._build_hnsw = build_hnsw
+        self._keep_generations = keep_generations
+        self.generation = datetime.now(timezone.utc).strftime("g%Y%m%d%H%M%S%f")
+        self._directory = self.path / self.generation
+        self._vectors_file = None
+        self._rows: list[dict] = []
+        self._positions: dict[str, int] = {}
+        self.dimensions = 0
+
+    def add(self, documents: Iterable[IndexedChunk]) -> int:
+        documents = list(documents)
+        if not documents:
+            return 0
+        matrix = as_matrix([doc.embedding for doc in documents])
+        if self._vectors_file is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._vectors_file = open(self._directory / _VECTORS, "wb")
+            self.dimensions = matrix.shape[1]
+        elif matrix.shape[1] != self.dimensions:
+            raise ValueError("embedding dimensions changed while writing the local store")
+        self._vectors_file.write(np.ascontiguousarray(matrix).tobytes())
+        for doc in documents:
+            self._positions[doc.chunk_id] = len(self._rows)
+            self._rows.append(
+                {
+                    "document_id": doc.document_id,
+                    "chunk_id": doc.chunk_id,
+                    "chunk_index": doc.chunk_index,
+                    "source": doc.source,
+                    "text": doc.text,
+                    "metadata": dict(doc.metadata),
+                }
+            )
+        return len(documents)
+
+    def update_metadata(self, updates: Iterable[tuple[str, dict]]) -> int:
+        updated = 0
+        for chunk_id, metadata in updates:
+            position = self._positions.get(chunk_id)
+            if position is None:
+                continue
+            self._rows[position]["metadata"].update(metadata)
+            updated += 1
+        return updated
+
+    def _write_hnsw(self) -> None:
+        hnswlib = _import_hnswlib()
+        vectors = np.memmap(
+            self._directory / _VECTORS,
+            dtype=VECTOR_DTYPE,
+            mode="r",
+            shape=(len(self._rows), self.dimensions),
+        )
+        index = hnswlib.Index(space=_HNSW_SPACES[self.space_type], dim=self.dimensions)
+        index.init_index(
+            max_elements=len(self._rows),
+            ef_construction=self._knn.ef_construction or 200,
+            M=self._knn.m or 16,
+        )
+        index.add_items(vectors, np.arange(len(self._rows)))
+        index.save_index(str(self._directory / _HNSW))
+
+    def commit(self) -> str:
+        if self._vectors_file is None:
+            raise RuntimeError("no vectors were written to the local store")
+        self._vectors_file.close()
+        with open(self._directory / _CHUNKS, "w", encoding="utf-8") as handle:
+            for row in self._rows:
+                handle.write(json.dumps(row, separators=(",", ":")) + "\n")
+        if self._build_hnsw:
+            self._write_hnsw()
+        manifest = {
+            "generation": self.generation,
+            "count": len(self._rows),
+            "dimensions": self.dimensions,
+            "space_type": self.space_type,
+            "ef_search": self._knn.ef_search,
+        }
+        (self._directory / _MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+        pointer = self.path / f"{_CURRENT}.tmp"
+        pointer.write_text(self.generation, encoding="utf-8")
+        os.replace(pointer, self.path / _CURRENT)
+        logger.info(
+            "Committed local vector store path=%s generation=%s chunks=%d dimensions=%d",
+            self.path,
+            self.generation,
+            len(self._rows),
+            self.dimensions,
+        )
+        self._prune()
+        return self.generation
+
+    def abort(self) -> None:
+        if self._vectors_file is not None:
+            self._vectors_file.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _prune(self) -> None:
+        generations = sorted(
+            (entry.name for entry in self.path.iterdir() if entry.is_dir()),
+            reverse=True,
+        )
+        retired = [name for name in generations if name != self.generation]
+        for name in retired[max(0, self._keep_generations) :]:
+            shutil.rmtree(self.path / name, ignore_errors=True)
+
+
+class LocalVectorStore:
+    def __init__(self, path: str | Path, reload_interval_s: float = 5.0) -> None:
+        self.path = Path(path)
+        self.name = str(self.path)
+        self._reload_interval_s = reload_interval_s
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._state: dict | None = None
+        self._load()
+
+    def _current_generation(self) -> str:
+        pointer = self.path / _CURRENT
+        if not pointer.exists():
+            raise RuntimeError(f"local vector store not found at {self.path}")
+        return pointer.read_text(encoding="utf-8").strip()
+
+    def _load(self) -> None:
+        generation = self._current_generation()
+        directory = self.path / generation
+        manifest = json.loads((directory / _MANIFEST).read_text(encoding="utf-8"))
+        count, dimensions = manifest["count"], manifest["dimensions"]
+        vectors = np.memmap(
+            directory / _VECTORS,
+            dtype=VECTOR_DTYPE,
+            mode="r",
+            shape=(count, dimensions),
+        )
+        with open(directory / _CHUNKS, encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+        norms = None
+        if manifest["space_type"] in ("cosinesimil", "l2"):
+            norms = np.linalg.norm(vectors, axis=1)
+        hnsw = None
+        if (directory / _HNSW).exists():
+            try:
+                hnswlib = _import_hnswlib()
+            except RuntimeError as exc:
+                logger.warning("Falling back to exact local search: %s", exc)
+            else:
+                hnsw = hnswlib.Index(space=_HNSW_SPACES[manifest["space_type"]], dim=dimensions)
+                hnsw.load_index(str(directory / _HNSW), max_elements=count)
+        self._state = {
+            "generation": generation,
+            "vectors": vectors,
+            "rows": rows,
+            "norms": norms,
+            "space_type": manifest["space_type"],
+            "ef_search": manifest.get("ef_search"),
+            "hnsw": hnsw,
+            "filter_positions": {},
+        }
+        logger.info(
+            "Loaded local vector store path=%s generation=%s chunks=%d dimensions=%d hnsw=%s",
+            self.path,
+            generation,
+            count,
+            dimensions,
+            hnsw is not None,
+        )
+
+    def _refresh(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_check:
+                self._next_check = now + self._reload_interval_s
+                if self._current_generation() != self._state["generation"]:
+                    self._load()
+            return self._state
+
+    def generation(self) -> str:
+        return self._refresh()["generation"]
+
+    def snapshot(self) -> tuple[list[str], np.ndarray, str]:
+        state = self._refresh()
+        return [row["chunk_id"] for row in state["rows"]], state["vectors"], state["space_type"]
+
+    def _filter_positions(self, state: dict, filters: NormalizedFilters) -> np.ndarray:
+        cache = state["filter_positions"]
+        positions = cache.get(filters)
+        if positions is None:
+            positions = np.fromiter(
+                (
+                    position
+                    for position, row in enumerate(state["rows"])
+                    if matches_filters(row, filters)
+                ),
+                dtype=np.int64,
+            )
+            with self._lock:
+                if len(cache) >= _FILTER_MASK_CACHE:
+                    cache.pop(next(iter(cache)))
+                cache[filters] = positions
+        return positions
+
+    def _exact_search(
+        self,
+        state: dict,
+        query: np.ndarray,
+        top_k: int,
+        positions: np.ndarray | None = None,
+    ):
+        vectors, norms = state["vectors"], state["norms"]
+        if positions is not None:
+            vectors = vectors[positions]
+            norms = norms[positions] if norms is not None else None
+        similarity = vectors @ query
+        if state["space_type"] == "cosinesimil":
+            denominator = norms * (np.linalg.norm(query) or 1.0)
+            similarity = similarity / np.where(denominator == 0, 1.0, denominator)
+        elif state["space_type"] == "l2":
+            similarity = -(norms**2 - 2 * similarity + float(query @ query))
+        k = min(top_k, len(similarity))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=VECTOR_DTYPE)
+        candidates = np.argpartition(-similarity, k - 1)[:k]
+        order = candidates[np.argsort(-similarity[candidates])]
+        if positions is not None:
+            return positions[order], similarity[order]
+        return order, similarity[order]
+
+    def _hnsw_search(
+        self,
+        state: dict,
+        query: np.ndarray,
+        top_k: int,
+        ef_search: int | None = None,
+        positions: np.ndarray | None = None,
+    ):
+        index = state["hnsw"]
+        allowed = None
+        k = min(top_k, len(state["rows"]))
+        if positions is not None:
+            mask = np.zeros(len(state["rows"]), dtype=bool)
+            mask[positions] = True
+            allowed = mask.__getitem__
+            k = min(k, len(positions))
+        index.set_ef(max(ef_search or state["ef_search"] or 100, k))
+        labels, distances = index.knn_query(query, k=k, filter=allowed)
+        if state["space_type"] == "l2":
+            similarity = -distances[0]
+        else:
+            similarity = 1.0 - distances[0]
+        return labels[0].astype(np.int64), similarity
+
+    def search(
+        self,
+        vector: np.ndarray | list[float],
+        top_k: int,
+        include_vectors: bool = False,
+        ef_search: int | None = None,
+        filters: dict | None = None,
+    ) -> list[RetrievalResult]:
+        state = self._refresh()
+        query = as_vector(vector)
+        normalized = normalize_filters(filters)
+        positions = self._filter_positions(state, normalized) if normalized else None
+        if positions is not None and len(positions) == 0:
+            return []
+        if state["hnsw"] is not None and (
+            positions is None or len(positions) > _FILTERED_EXACT_MAX_ROWS
+        ):
+            order, similarity = self._hnsw_search(state, query, top_k, ef_search, positions)
+        else:
+            order, similarity = self._exact_search(state, query, top_k, positions)
+        scores = _to_score(np.asarray(similarity, dtype=np.float64), state["space_type"])
+        results: list[RetrievalResult] = []
+        for position, score in zip(order, scores):
+            row = state["rows"][int(position)]
+            results.append(
+                RetrievalResult(
+                    document_id=row["document_id"],
+                    chunk_id=row["chunk_id"],
+                    chunk_index=row["chunk_index"],
+                    source=row["source"],
+                    text=row["text"],
+                    metadata=row["metadata"],
+                    score=float(score),
+                    embedding=(
+                        np.array(state["vectors"][int(position)]) if include_vectors else None
+                    ),
+                )
+            )
+        return results
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .types import Chunk, Document
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_hash(chunk: Chunk) -> str:
+    metadata = json.dumps(chunk.metadata, sort_keys=True, default=str)
+    return content_hash(f"{chunk.text}\0{metadata}")
+
+
+@dataclass
+class ManifestEntry:
+    content_hash: str
+    chunks: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class IngestManifest:
+    settings: dict = field(default_factory=dict)
+    documents: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IngestManifest":
+        manifest_path = Path(path)
+        if not manifest_path.exists():
+            logger.info("Ingest manifest not found path=%s; starting empty", manifest_path)
+            return cls()
+        raw = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if raw.get("version") != MANIFEST_VERSION:
+            logger.warning(
+                "Ignoring ingest manifest with unsupported version path=%s version=%s",
+                manifest_path,
+                raw.get("version"),
+            )
+            return cls()
+        documents = {
+            document_id: ManifestEntry(
+                content_hash=entry["content_hash"],
+                chunks=dict(entry.get("chunks", {})),
+            )
+            for document_id, entry in raw.get("documents", {}).items()
+        }
+        return cls(settings=dict(raw.get("settings", {})), documents=documents)
+
+    def save(self, path: str | Path) -> None:
+        manifest_path = Path(path)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "documents": {
+                document_id: {"content_hash": entry.content_hash, "chunks": entry.chunks}
+                for document_id, entry in sorted(self.documents.items())
+            },
+        }
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+        logger.info(
+            "Saved ingest manifest path=%s documents=%d",
+            manifest_path,
+            len(self.documents),
+        )
+
+
+class IncrementalPlanner:
+    def __init__(self, previous: IngestManifest, settings: dict) -> None:
+        self.previous = previous
+        self.current = IngestManifest(settings=dict(settings))
+        self._settings_match = previous.settings == self.current.settings
+        self._seen: set[str] = set()
+        self._orphaned: list[str] = []
+        self.unchanged_documents = 0
+        self.changed_documents = 0
+        self.unchanged_chunks = 0
+        self.changed_chunks = 0
+        if previous.documents and not self._settings_match:
+            logger.info(
+                "Ingest settings changed; every chunk will be re-embedded previous=%s current=%s",
+                previous.settings,
+                self.current.settings,
+            )
+
+    def known_content_hashes(self) -> dict[str, str]:
+        if not self._settings_match:
+            return {}
+        return {
+            document_id: entry.content_hash
+            for document_id, entry in self.previous.documents.items()
+        }
+
+    def iter_changed_chunks(
+        self,
+        chunked_documents: Iterable[tuple[Document, list[Chunk]]],
+    ) -> Iterator[Chunk]:
+        for document, chunks in chunked_documents:
+            self._seen.add(document.document_id)
+            previous = self.previous.documents.get(document.document_id)
+            document_hash = content_hash(document.content)
+            if (
+                previous is not None
+                and self._settings_match
+                and previous.content_hash == document_hash
+            ):
+                self.current.documents[document.document_id] = previous
+                self.unchanged_documents += 1
+                continue
+            self.changed_documents += 1
+            previous_chunks = previous.chunks if previous and self._settings_match else {}
+            entry = ManifestEntry(content_hash=document_hash)
+            for chunk in chunks:
+                digest = chunk_hash(chunk)
+                entry.chunks[chunk.chunk_id] = digest
+                if previous_chunks.get(chunk.chunk_id) == digest:
+                    self.unchanged_chunks += 1
+                    continue
+                self.changed_chunks += 1
+                yield chunk
+            if previous is not None:
+                self._orphaned.extend(
+                    chunk_id for chunk_id in previous.chunks if chunk_id not in entry.chunks
+                )
+            self.current.documents[document.document_id] = entry
+
+    def orphaned_chunk_ids(self) -> list[str]:
+        orphaned = list(self._orphaned)
+        for document_id, entry in self.previous.documents.items():
+            if document_id not in self._seen:
+                orphaned.extend(entry.chunks)
+        return orphaned
@@ -2,10 +2,17 @@ from __future__ import annotations
 
 import os
 import logging
+import math
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator
 
 from opensearchpy import OpenSearch
+from opensearchpy.exceptions import NotFoundError, RequestError, TransportError
 
-from .types import OpenSearchConfig
+from .quantization import validate_quantization
+from .types import FilterField, KnnMethodConfig, OpenSearchConfig
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +37,52 @@ def _parse_bool(value: str | None) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
+def _read_optional_int_env(name: str) -> int | None:
+    value = _read_env(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer") from exc
+
+
+def _read_optional_float_env(name: str) -> float | None:
+    value = _read_env(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number") from exc
+
+
+def _read_float_env(name: str, default: float) -> float:
+    value = _read_env(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number") from exc
+
+
+def knn_method_config_from_env() -> KnnMethodConfig | None:
+    config = KnnMethodConfig(
+        engine=_read_env("RAG_KNN_ENGINE"),
+        space_type=_read_env("RAG_KNN_SPACE_TYPE"),
+        m=_read_optional_int_env("RAG_KNN_M"),
+        ef_construction=_read_optional_int_env("RAG_KNN_EF_CONSTRUCTION"),
+        ef_search=_read_optional_int_env("RAG_KNN_EF_SEARCH"),
+        quantization=_read_env("RAG_KNN_QUANTIZATION"),
+        quantization_scale=_read_optional_float_env("RAG_KNN_QUANTIZATION_SCALE"),
+        model_id=_read_env("RAG_KNN_MODEL_ID"),
+    )
+    if config == KnnMethodConfig():
+        return None
+    return config
+
+
 def opensearch_config_from_env() -> OpenSearchConfig:
     return OpenSearchConfig(
         url=_read_required_env("OPENSEARCH_URL"),
@@ -37,61 +90,412 @@ def opensearch_config_from_env() -> OpenSearchConfig:
         username=_read_env("OPENSEARCH_USERNAME"),
         password=_read_env("OPENSEARCH_PASSWORD"),
         verify_certs=_parse_bool(_read_env("OPENSEARCH_VERIFY_CERTS", "false")),
+        pool_maxsize=_read_optional_int_env("OPENSEARCH_POOL_MAXSIZE") or 10,
+        timeout_s=_read_float_env("OPENSEARCH_TIMEOUT_S", 10.0),
+        http_compress=_parse_bool(_read_env("OPENSEARCH_HTTP_COMPRESS", "false")),
     )
 
 
+def _client_kwargs(config: OpenSearchConfig) -> dict:
+    http_auth = None
+    if config.username and config.password:
+        http_auth = (config.username, config.password)
+    return {
+        "hosts": [config.url],
+        "http_auth": http_auth,
+        "use_ssl": config.url.startswith("https"),
+        "verify_certs": config.verify_certs,
+        "ssl_assert_hostname": config.verify_certs,
+        "ssl_show_warn": config.verify_certs,
+        "pool_maxsize": config.pool_maxsize,
+        "timeout": config.timeout_s,
+        "http_compress": config.http_compress,
+    }
+
+
+def _import_async_opensearch():
+    try:
+        from opensearchpy import AsyncOpenSearch
+    except ImportError as exc:
+        raise RuntimeError(
+            "AsyncOpenSearch requires aiohttp; install opensearch-py[async]"
+        ) from exc
+    return AsyncOpenSearch
+
+
 class OpenSearchClient:
     def __init__(self, config: OpenSearchConfig | None = None) -> None:
         self.config = config or opensearch_config_from_env()
         logger.info(
-            "Initializing OpenSearch client for index=%s url=%s verify_certs=%s",
+            "Initializing OpenSearch client for index=%s url=%s verify_certs=%s "
+            "pool_maxsize=%d http_compress=%s",
             self.config.index,
             self.config.url,
             self.config.verify_certs,
+            self.config.pool_maxsize,
+            self.config.http_compress,
         )
-        http_auth = None
-        if self.config.username and self.config.password:
-            http_auth = (self.config.username, self.config.password)
-        self.client = OpenSearch(
-            hosts=[self.config.url],
-            http_auth=http_auth,
-            use_ssl=self.config.url.startswith("https"),
-            verify_certs=self.config.verify_certs,
-            ssl_assert_hostname=self.config.verify_certs,
-            ssl_show_warn=self.config.verify_certs,
+        self.client = OpenSearch(**_client_kwargs(self.config))
+
+    def ensure_index(self, dimensions: int, knn: KnnMethodConfig | None = None) -> None:
+        ensure_index(self.client, self.config.index, dimensions, knn=knn)
+
+
+class AsyncOpenSearchClient:
+    def __init__(self, config: OpenSearchConfig | None = None) -> None:
+        self.config = config or opensearch_config_from_env()
+        async_opensearch = _import_async_opensearch()
+        logger.info(
+            "Initializing async OpenSearch client for index=%s url=%s pool_maxsize=%d "
+            "http_compress=%s",
+            self.config.index,
+            self.config.url,
+            self.config.pool_maxsize,
+            self.config.http_compress,
+        )
+        self.client = async_opensearch(**_client_kwargs(self.config))
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+_QUANTIZATION_ENGINES = {"fp16": ("faiss",), "byte": ("lucene", "faiss")}
+FILTERED_KNN_ENGINES = ("lucene", "faiss")
+
+
+def _quantized_engine(knn: KnnMethodConfig, quantization: str) -> str:
+    engines = _QUANTIZATION_ENGINES[quantization]
+    engine = knn.engine or engines[0]
+    if engine not in engines:
+        raise ValueError(
+            f"{quantization} vectors require the {' or '.join(engines)} engine, got {engine}"
+        )
+    return engine
+
+
+def filtered_knn_engine(knn: KnnMethodConfig | None) -> str:
+    engine = knn.engine if knn is not None and knn.engine else FILTERED_KNN_ENGINES[0]
+    if engine not in FILTERED_KNN_ENGINES:
+        raise ValueError(
+            f"metadata filters run inside the kNN query, which the {engine} engine rejects; "
+            f"use --knn-engine {' or '.join(FILTERED_KNN_ENGINES)}"
         )
+    return engine
+
+
+def _build_knn_method(knn: KnnMethodConfig, filtered: bool = False) -> dict | None:
+    parameters = {}
+    if knn.m is not None:
+        parameters["m"] = knn.m
+    if knn.ef_construction is not None:
+        parameters["ef_construction"] = knn.ef_construction
+    quantization = validate_quantization(knn.quantization)
+    method: dict = {"name": "hnsw"}
+    if quantization in _QUANTIZATION_ENGINES:
+        method["engine"] = _quantized_engine(knn, quantization)
+    elif filtered:
+        method["engine"] = filtered_knn_engine(knn)
+    elif knn.engine:
+        method["engine"] = knn.engine
+    if quantization == "fp16":
+        parameters["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+    if knn.space_type:
+        method["space_type"] = knn.space_type
+    if parameters:
+        method["parameters"] = parameters
+    if len(method) == 1:
+        return None
+    return method
 
-    def ensure_index(self, dimensions: int) -> None:
-        ensure_index(self.client, self.config.index, dimensions)
 
+def _metadata_mapping(filter_fields: tuple[FilterField, ...]) -> dict:
+    mapping: dict = {"type": "object"}
+    if filter_fields:
+        mapping["properties"] = {field.name: {"type": "keyword"} for field in filter_fields}
+    return mapping
 
-def build_index_body(dimensions: int) -> dict:
+
+def build_index_body(
+    dimensions: int,
+    knn: KnnMethodConfig | None = None,
+    filter_fields: tuple[FilterField, ...] = (),
+) -> dict:
+    settings: dict = {"index.knn": True}
+    embedding: dict = {
+        "type": "knn_vector",
+        "dimension": dimensions,
+    }
+    if filter_fields and knn is None:
+        knn = KnnMethodConfig()
+    if knn is not None and validate_quantization(knn.quantization) == "pq":
+        if not knn.model_id:
+            raise ValueError("pq vectors require a trained kNN model id (RAG_KNN_MODEL_ID)")
+        embedding = {"type": "knn_vector", "model_id": knn.model_id}
+    elif knn is not None:
+        method = _build_knn_method(knn, filtered=bool(filter_fields))
+        if method is not None:
+            embedding["method"] = method
+        if knn.quantization == "byte":
+            embedding["data_type"] = "byte"
+    if knn is not None and knn.ef_search is not None:
+        settings["index.knn.algo_param.ef_search"] = knn.ef_search
+    mappings: dict = {}
+    if knn is not None and knn.quantization == "byte" and knn.quantization_scale is not None:
+        mappings["_meta"] = {"quantization_scale": knn.quantization_scale}
     return {
-        "settings": {"index.knn": True},
+        "settings": settings,
         "mappings": {
+            **mappings,
             "properties": {
                 "document_id": {"type": "keyword"},
                 "chunk_id": {"type": "keyword"},
                 "chunk_index": {"type": "integer"},
                 "source": {"type": "keyword"},
                 "text": {"type": "text"},
-                "metadata": {"type": "object"},
-                "embedding": {
-                    "type": "knn_vector",
-                    "dimension": dimensions,
-                },
+                "metadata": _metadata_mapping(filter_fields),
+                "embedding": embedding,
             }
         },
     }
 
 
-def ensure_index(client: OpenSearch, index_name: str, dimensions: int) -> None:
+def _check_filtered_knn_engine(client: OpenSearch, index_name: str) -> None:
+    mappings = client.indices.get_mapping(index=index_name)
+    for body in mappings.values():
+        embedding = body.get("mappings", {}).get("properties", {}).get("embedding", {})
+        if "model_id" in embedding:
+            continue
+        engine = embedding.get("method", {}).get("engine", "nmslib")
+        if engine not in FILTERED_KNN_ENGINES:
+            raise RuntimeError(
+                f"{index_name} stores vectors with the {engine} engine, which rejects "
+                "filtered kNN queries; re-ingest with --rebuild"
+            )
+
+
+def ensure_index(
+    client: OpenSearch,
+    index_name: str,
+    dimensions: int,
+    knn: KnnMethodConfig | None = None,
+    filter_fields: tuple[FilterField, ...] = (),
+) -> None:
     if client.indices.exists(index=index_name):
         logger.debug("OpenSearch index already exists index=%s", index_name)
+        if knn is not None and knn.ef_search is not None:
+            client.indices.put_settings(
+                index=index_name,
+                body={"index": {"knn.algo_param.ef_search": knn.ef_search}},
+            )
+        if knn is not None and knn.quantization == "byte" and knn.quantization_scale is not None:
+            _store_quantization_scale(client, index_name, knn.quantization_scale)
+        if filter_fields:
+            _check_filtered_knn_engine(client, index_name)
+            try:
+                client.indices.put_mapping(
+                    index=index_name,
+                    body={"properties": {"metadata": _metadata_mapping(filter_fields)}},
+                )
+            except RequestError as exc:
+                raise RuntimeError(
+                    f"cannot map filter fields as keyword on {index_name}; "
+                    "re-ingest with --rebuild"
+                ) from exc
         return
     logger.info(
-        "Creating OpenSearch index index=%s dimensions=%d",
+        "Creating OpenSearch index index=%s dimensions=%d knn=%s",
         index_name,
         dimensions,
+        knn,
+    )
+    client.indices.create(
+        index=index_name,
+        body=build_index_body(dimensions, knn=knn, filter_fields=filter_fields),
     )
-    client.indices.create(index=index_name, body=build_index_body(dimensions))
+
+
+def _read_index_settings(client: OpenSearch, index_name: str) -> dict:
+    response = client.indices.get_settings(index=index_name)
+    for index_settings in response.values():
+        return index_settings.get("settings", {}).get("index", {})
+    return {}
+
+
+@contextmanager
+def bulk_load_settings(
+    client: OpenSearch,
+    index_name: str,
+    force_merge_segments: int | None = None,
+) -> Iterator[None]:
+    current = _read_index_settings(client, index_name)
+    restore = {
+        "refresh_interval": current.get("refresh_interval"),
+        "number_of_replicas": current.get("number_of_replicas", "1"),
+    }
+    logger.info(
+        "Entering bulk-load mode index=%s restore=%s",
+        index_name,
+        restore,
+    )
+    client.indices.put_settings(
+        index=index_name,
+        body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+    )
+    try:
+        yield
+    finally:
+        client.indices.put_settings(index=index_name, body={"index": restore})
+        client.indices.refresh(index=index_name)
+        logger.info("Restored index settings after bulk load index=%s", index_name)
+    if force_merge_segments:
+        logger.info(
+            "Force-merging index index=%s max_num_segments=%d",
+            index_name,
+            force_merge_segments,
+        )
+        client.indices.forcemerge(
+            index=index_name,
+            max_num_segments=force_merge_segments,
+        )
+
+
+def generation_index_name(alias: str, now: datetime | None = None) -> str:
+    stamp = (now or datetime.now(timezone.utc)).strftime("%Y%m%d%H%M%S%f")
+    return f"{alias}-g{stamp}"
+
+
+def resolve_alias(client: OpenSearch, alias: str) -> list[str]:
+    try:
+        return sorted(client.indices.get_alias(name=alias).keys())
+    except NotFoundError:
+        return []
+
+
+def list_index_generations(client: OpenSearch, alias: str) -> list[str]:
+    try:
+        indices = client.indices.get(index=f"{alias}-g*")
+    except NotFoundError:
+        return []
+    pattern = re.compile(rf"{re.escape(alias)}-g\d{{20}}")
+    return sorted(name for name in indices if pattern.fullmatch(name))
+
+
+def warm_index(client: OpenSearch, index_name: str) -> None:
+    client.indices.refresh(index=index_name)
+    try:
+        client.transport.perform_request("GET", f"/_plugins/_knn/warmup/{index_name}")
+        logger.info("Warmed kNN graphs index=%s", index_name)
+    except TransportError as exc:
+        logger.info("kNN warmup not available index=%s error=%s", index_name, exc)
+
+
+def is_concrete_index(client: OpenSearch, name: str) -> bool:
+    return client.indices.exists(index=name) and not client.indices.exists_alias(name=name)
+
+
+def check_alias_target(client: OpenSearch, alias: str, replace_concrete: bool = False) -> None:
+    if not replace_concrete and is_concrete_index(client, alias):
+        raise RuntimeError(
+            f"{alias} is a concrete index; re-run with --replace-concrete-index to delete it "
+            "in the same atomic alias swap, or delete or rename it first"
+        )
+
+
+def swap_alias(
+    client: OpenSearch,
+    alias: str,
+    index_name: str,
+    replace_concrete: bool = False,
+) -> list[str]:
+    check_alias_target(client, alias, replace_concrete)
+    if is_concrete_index(client, alias):
+        client.indices.update_aliases(
+            body={
+                "actions": [
+                    {"remove_index": {"index": alias}},
+                    {"add": {"index": index_name, "alias": alias}},
+                ]
+            }
+        )
+        logger.info("Replaced concrete index with alias alias=%s index=%s", alias, index_name)
+        return [alias]
+    previous = resolve_alias(client, alias)
+    actions: list[dict] = [
+        {"remove": {"index": old_index, "alias": alias}}
+        for old_index in previous
+        if old_index != index_name
+    ]
+    actions.append({"add": {"index": index_name, "alias": alias}})
+    client.indices.update_aliases(body={"actions": actions})
+    logger.info(
+        "Swapped OpenSearch alias alias=%s index=%s previous=%s",
+        alias,
+        index_name,
+        previous,
+    )
+    return previous
+
+
+def prune_index_generations(client: OpenSearch, alias: str, keep: int = 1) -> list[str]:
+    live = set(resolve_alias(client, alias))
+    retired = [name for name in list_index_generations(client, alias) if name not in live]
+    retired.sort(reverse=True)
+    deleted = retired[max(0, keep) :]
+    for index_name in deleted:
+        client.indices.delete(index=index_name)
+    if deleted:
+        logger.info("Deleted old index generations alias=%s indices=%s", alias, deleted)
+    return deleted
+
+
+def read_index_meta(client: OpenSearch, index_name: str) -> dict:
+    try:
+        mappings = client.indices.get_mapping(index=index_name)
+    except NotFoundError:
+        return {}
+    for _, body in sorted(mappings.items()):
+        return dict(body.get("mappings", {}).get("_meta", {}))
+    return {}
+
+
+def read_quantization_scale(client: OpenSearch, index_name: str) -> float | None:
+    scale = read_index_meta(client, index_name).get("quantization_scale")
+    return float(scale) if scale is not None else None
+
+
+def _store_quantization_scale(client: OpenSearch, index_name: str, scale: float) -> None:
+    meta = read_index_meta(client, index_name)
+    stored = meta.get("quantization_scale")
+    if stored is not None and not math.isclose(float(stored), scale):
+        raise RuntimeError(
+            f"{index_name} stores byte vectors at scale {stored}, not {scale}; ingest and "
+            "retrieval must share one scale, so drop the override or re-ingest with --rebuild"
+        )
+    if stored is None:
+        meta["quantization_scale"] = scale
+        client.indices.put_mapping(index=index_name, body={"_meta": meta})
+
+
+def mark_index_generation(
+    client: OpenSearch,
+    index_name: str,
+    generation: str | None = None,
+) -> str:
+    generation = generation or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+    meta = read_index_meta(client, index_name)
+    meta["generation"] = generation
+    client.indices.put_mapping(index=index_name, body={"_meta": meta})
+    logger.info("Marked index generation index=%s generation=%s", index_name, generation)
+    return generation
+
+
+def read_index_generation(client: OpenSearch, index_name: str) -> str | None:
+    try:
+        mappings = client.indices.get_mapping(index=index_name)
+    except NotFoundError:
+        return None
+    markers = []
+    for physical_index, body in sorted(mappings.items()):
+        meta = body.get("mappings", {}).get("_meta", {})
+        markers.append(f"{physical_index}:{meta.get('generation', '')}")
+    return ",".join(markers)
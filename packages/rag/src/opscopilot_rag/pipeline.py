@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, TypeVar
+
+from .chunking import chunk_document
+from .ingestion import discover_document_paths, load_document
+from .manifest import content_hash
+from .types import Chunk, ChunkingConfig, Document
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def _load_and_chunk(
+    path: Path,
+    root: Path,
+    encoding: str,
+    config: ChunkingConfig,
+    known_hash: str | None,
+    timings: dict[str, float],
+) -> tuple[Document, list[Chunk]]:
+    started = time.perf_counter()
+    document = load_document(path, root, encoding=encoding)
+    loaded = time.perf_counter()
+    timings["load"] = timings.get("load", 0.0) + loaded - started
+    if known_hash is not None and content_hash(document.content) == known_hash:
+        return document, []
+    chunks = chunk_document(document, config)
+    timings["chunk"] = timings.get("chunk", 0.0) + time.perf_counter() - loaded
+    return document, chunks
+
+
+def _load_and_chunk_shard(
+    paths: list[str],
+    root: str,
+    encoding: str,
+    config: ChunkingConfig,
+    known_hashes: dict[str, str],
+) -> tuple[list[tuple[Document, list[Chunk]]], dict[str, float]]:
+    timings: dict[str, float] = {}
+    results = [
+        _load_and_chunk(Path(path), Path(root), encoding, config, known_hashes.get(path), timings)
+        for path in paths
+    ]
+    return results, timings
+
+
+def _merge_timings(timings: dict[str, float] | None, shard: dict[str, float]) -> None:
+    if timings is None:
+        return
+    for stage, seconds in shard.items():
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def iter_chunked_documents(
+    root_dir: str | Path,
+    config: ChunkingConfig,
+    extensions: list[str] | None = None,
+    workers: int = 1,
+    shard_size: int = 16,
+    encoding: str = "utf-8",
+    paths: list[Path] | None = None,
+    known_hashes: dict[str, str] | None = None,
+    timings: dict[str, float] | None = None,
+) -> Iterator[tuple[Document, list[Chunk]]]:
+    root = Path(root_dir).resolve()
+    if paths is None:
+        extension_set = {ext.lower() for ext in extensions} if extensions else None
+        paths = discover_document_paths(root, extension_set)
+    known_hashes = known_hashes or {}
+    logger.info(
+        "Loading and chunking documents root=%s documents=%d workers=%d strategy=%s",
+        root,
+        len(paths),
+        workers,
+        config.strategy,
+    )
+    if workers <= 1:
+        local_timings = timings if timings is not None else {}
+        for path in paths:
+            document_id = path.relative_to(root).as_posix()
+            yield _load_and_chunk(
+                path, root, encoding, config, known_hashes.get(document_id), local_timings
+            )
+        return
+
+    max_pending = workers * 2
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        try:
+            for shard in iter_batches(paths, shard_size):
+                shard_hashes = {}
+                for path in shard:
+                    document_id = path.relative_to(root).as_posix()
+                    if document_id in known_hashes:
+                        shard_hashes[str(path)] = known_hashes[document_id]
+                pending.append(
+                    pool.submit(
+                        _load_and_chunk_shard,
+                        [str(path) for path in shard],
+                        str(root),
+                        encoding,
+                        config,
+                        shard_hashes,
+                    )
+                )
+                if len(pending) >= max_pending:
+                    results, shard_timings = pending.popleft().result()
+                    _merge_timings(timings, shard_timings)
+                    yield from results
+            while pending:
+                results, shard_timings = pending.popleft().result()
+                _merge_timings(timings, shard_timings)
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_batches(items: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def prefetch(items: Iterable[T], max_pending: int, name: str = "prefetch") -> Iterator[T]:
+    if max_pending <= 0:
+        raise ValueError("max_pending must be positive")
+    buffer: queue.Queue = queue.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+
+    def _put(value) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put(item):
+                    return
+        except BaseException as exc:  # propagated to the consuming thread
+            _put(_Failure(exc))
+            return
+        _put(_DONE)
+
+    worker = threading.Thread(target=_produce, name=f"opscopilot-rag-{name}", daemon=True)
+    worker.start()
+    logger.debug("Pipeline stage started name=%s max_pending=%d", name, max_pending)
+    try:
+        while True:
+            value = buffer.get()
+            if value is _DONE:
+                return
+            if isinstance(value, _Failure):
+                raise value.exc
+            yield value
+    finally:
+        stopped.set()
+        worker.join(timeout=1.0)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .vectors import as_matrix, as_vector
+
+QUANTIZATION_MODES = ("fp16", "byte", "pq")
+DEFAULT_BYTE_SCALE = 127.0
+BYTE_CALIBRATION_QUANTILE = 0.999
+_FP16_MAX = float(np.finfo(np.float16).max)
+_BYTE_MIN, _BYTE_MAX = -128, 127
+
+
+def validate_quantization(mode: str | None) -> str | None:
+    if mode in (None, "", "none"):
+        return None
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(
+            f"unsupported vector quantization: {mode} "
+            f"(expected one of {', '.join(QUANTIZATION_MODES)})"
+        )
+    return mode
+
+
+def calibrate_byte_scale(
+    vectors: np.ndarray, quantile: float = BYTE_CALIBRATION_QUANTILE
+) -> float:
+    magnitude = float(np.quantile(np.abs(as_matrix(vectors)), quantile))
+    return _BYTE_MAX / magnitude if magnitude > 0 else DEFAULT_BYTE_SCALE
+
+
+def count_clipped(vectors: np.ndarray, scale: float | None) -> int:
+    scaled = np.rint(as_matrix(vectors) * (scale or DEFAULT_BYTE_SCALE))
+    return int(np.count_nonzero((scaled < _BYTE_MIN) | (scaled > _BYTE_MAX)))
+
+
+def quantize_matrix(
+    vectors: np.ndarray,
+    mode: str | None,
+    scale: float | None = None,
+) -> np.ndarray:
+    matrix = as_matrix(vectors)
+    mode = validate_quantization(mode)
+    if mode == "fp16":
+        return np.clip(matrix, -_FP16_MAX, _FP16_MAX).astype(np.float16).astype(matrix.dtype)
+    if mode == "byte":
+        scaled = np.rint(matrix * (scale or DEFAULT_BYTE_SCALE))
+        return np.clip(scaled, _BYTE_MIN, _BYTE_MAX).astype(np.int8)
+    return matrix
+
+
+def quantize_vector(
+    vector: np.ndarray | list[float],
+    mode: str | None,
+    scale: float | None = None,
+) -> np.ndarray:
+    return quantize_matrix(as_vector(vector)[np.newaxis, :], mode, scale)[0]
+
+
+def bytes_per_vector(
+    dimensions: int,
+    mode: str | None = None,
+    pq_m: int | None = None,
+    pq_code_size: int = 8,
+) -> float:
+    mode = validate_quantization(mode)
+    if mode == "pq":
+        return (pq_m or max(1, dimensions // 8)) * pq_code_size / 8
+    return {"fp16": 2.0, "byte": 1.0}.get(mode, 4.0) * dimensions
+
+
+def estimate_native_memory_bytes(
+    count: int,
+    dimensions: int,
+    mode: str | None = None,
+    m: int = 16,
+    pq_m: int | None = None,
+    pq_code_size: int = 8,
+) -> int:
+    vector_bytes = bytes_per_vector(dimensions, mode, pq_m, pq_code_size)
+    if validate_quantization(mode) == "pq":
+        vector_bytes += 24
+    return int(1.1 * (vector_bytes + 8 * m) * count)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+class QueryResultCache(Generic[V]):
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_s: float = 300.0,
+        generation_check_interval_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._check_interval_s = generation_check_interval_s
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: str | None = None
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl_s > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def refresh_generation(self, loader: Callable[[], str | None]) -> None:
+        now = self._clock()
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self._check_interval_s
+        try:
+            generation = loader()
+        except Exception as exc:
+            logger.warning("Index generation check failed; keeping cached results: %s", exc)
+            return
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    logger.info(
+                        "Index generation changed; clearing query cache previous=%s current=%s",
+                        self._generation,
+                        generation,
+                    )
+                self._entries.clear()
+                self._generation = generation
+
+    def get(self, key: Hashable) -> V | None:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: V) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _read_number_env(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number") from exc
+
+
+def query_cache_from_env() -> QueryResultCache:
+    return QueryResultCache(
+        max_entries=int(_read_number_env("RAG_QUERY_CACHE_MAX_ENTRIES", 256)),
+        ttl_s=_read_number_env("RAG_QUERY_CACHE_TTL_S", 300.0),
+        generation_check_interval_s=_read_number_env("RAG_QUERY_CACHE_GENERATION_CHECK_S", 30.0),
+    )
@@ -1,68 +1,188 @@
 from __future__ import annotations
 
 import logging
+import os
 
 from opentelemetry import trace
+import numpy as np
 from opensearchpy import OpenSearch
 
-from .types import RetrievalResult
+from .filters import build_metadata_filter
+from .quantization import quantize_vector, validate_quantization
+from .types import RetrievalOptions, RetrievalResult
+from .vectors import as_vector, vector_to_list
 
 logger = logging.getLogger(__name__)
 
+RETRIEVAL_SOURCE_FIELDS = ("document_id", "chunk_id", "chunk_index", "source", "text", "metadata")
+TEXT_MODES = ("full", "truncate", "highlight")
+_FRAGMENT_SEPARATOR = " … "
+
+
+def _read_int_env(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer") from exc
+
+
+def _read_optional_float_env(name: str) -> float | None:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number") from exc
+
+
+def retrieval_options_from_env() -> RetrievalOptions:
+    text_mode = os.getenv("RAG_TEXT_MODE", "full").strip().lower() or "full"
+    if text_mode not in TEXT_MODES:
+        raise RuntimeError(f"RAG_TEXT_MODE must be one of {', '.join(TEXT_MODES)}")
+    try:
+        quantization = validate_quantization(os.getenv("RAG_KNN_QUANTIZATION"))
+    except ValueError as exc:
+        raise RuntimeError(f"RAG_KNN_QUANTIZATION is invalid: {exc}") from exc
+    return RetrievalOptions(
+        text_mode=text_mode,
+        max_text_chars=_read_int_env("RAG_TEXT_MAX_CHARS", 600),
+        fragments=_read_int_env("RAG_TEXT_FRAGMENTS", 2),
+        quantization=quantization,
+        quantization_scale=_read_optional_float_env("RAG_KNN_QUANTIZATION_SCALE"),
+        ef_search=_read_int_env("RAG_KNN_QUERY_EF_SEARCH", 0) or None,
+    )
+
+
+def _build_text_highlight(options: RetrievalOptions, query_text: str | None) -> dict | None:
+    if options.text_mode == "full":
+        return None
+    field: dict = {
+        "no_match_size": options.max_text_chars,
+        "fragment_size": options.max_text_chars,
+        "number_of_fragments": 1,
+        "highlight_query": {"match_none": {}},
+    }
+    if options.text_mode == "highlight" and query_text:
+        fragments = max(1, options.fragments)
+        field.update(
+            {
+                "fragment_size": max(1, options.max_text_chars // fragments),
+                "number_of_fragments": fragments,
+                "highlight_query": {"match": {"text": query_text}},
+            }
+        )
+    return {"pre_tags": [""], "post_tags": [""], "fields": {"text": field}}
+
 
 def build_knn_query(
-    vector: list[float],
+    vector: np.ndarray | list[float],
     top_k: int,
     source_includes: list[str] | None = None,
+    options: RetrievalOptions | None = None,
+    query_text: str | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
 ) -> dict:
+    options = options or RetrievalOptions()
     query: dict = {
         "size": top_k,
         "query": {
             "knn": {
                 "embedding": {
-                    "vector": vector,
+                    "vector": vector_to_list(
+                        quantize_vector(vector, options.quantization, options.quantization_scale)
+                        if options.quantization
+                        else vector
+                    ),
                     "k": top_k,
                 }
             }
         },
     }
-    if source_includes:
-        query["_source"] = source_includes
+    if options.ef_search:
+        query["query"]["knn"]["embedding"]["method_parameters"] = {"ef_search": options.ef_search}
+    metadata_filter = build_metadata_filter(filters)
+    if metadata_filter is not None:
+        query["query"]["knn"]["embedding"]["filter"] = metadata_filter
+    includes = list(source_includes or options.source_fields or RETRIEVAL_SOURCE_FIELDS)
+    if include_vectors and "embedding" not in includes:
+        includes.append("embedding")
+    highlight = _build_text_highlight(options, query_text)
+    if highlight is not None:
+        query["highlight"] = highlight
+        includes = [field for field in includes if field != "text"]
+    source: dict = {"includes": includes}
+    if "embedding" not in includes:
+        source["excludes"] = ["embedding"]
+    query["_source"] = source
     return query
 
 
+def _hit_text(hit: dict, source: dict) -> str:
+    fragments = hit.get("highlight", {}).get("text")
+    if fragments:
+        return _FRAGMENT_SEPARATOR.join(fragments)
+    return source.get("text", "")
+
+
+def _parse_hits(response: dict, include_vectors: bool) -> list[RetrievalResult]:
+    results: list[RetrievalResult] = []
+    for hit in response.get("hits", {}).get("hits", []):
+        source = hit.get("_source", {})
+        embedding = source.get("embedding") if include_vectors else None
+        results.append(
+            RetrievalResult(
+                document_id=source.get("document_id", ""),
+                chunk_id=source.get("chunk_id", ""),
+                chunk_index=source.get("chunk_index", 0),
+                source=source.get("source", ""),
+                text=_hit_text(hit, source),
+                metadata=source.get("metadata", {}),
+                score=float(hit.get("_score", 0.0)),
+                embedding=as_vector(embedding) if embedding is not None else None,
+            )
+        )
+    return results
+
+
 def retrieve_knn(
     client: OpenSearch,
     index_name: str,
-    vector: list[float],
+    vector: np.ndarray | list[float],
     top_k: int,
+    options: RetrievalOptions | None = None,
+    query_text: str | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
 ) -> list[RetrievalResult]:
+    options = options or RetrievalOptions()
     logger.info(
-        "Executing KNN retrieval index=%s top_k=%d vector_dims=%d",
+        "Executing KNN retrieval index=%s top_k=%d vector_dims=%d text_mode=%s",
         index_name,
         top_k,
         len(vector),
+        options.text_mode,
     )
     tracer = trace.get_tracer("opscopilot_rag")
     with tracer.start_as_current_span("rag.opensearch.search") as span:
         span.set_attribute("index", index_name)
         span.set_attribute("top_k", top_k)
-        response = client.search(index=index_name, body=build_knn_query(vector, top_k))
-        hits = response.get("hits", {}).get("hits", [])
-        results: list[RetrievalResult] = []
-        for hit in hits:
-            source = hit.get("_source", {})
-            results.append(
-                RetrievalResult(
-                    document_id=source.get("document_id", ""),
-                    chunk_id=source.get("chunk_id", ""),
-                    chunk_index=source.get("chunk_index", 0),
-                    source=source.get("source", ""),
-                    text=source.get("text", ""),
-                    metadata=source.get("metadata", {}),
-                    score=float(hit.get("_score", 0.0)),
-                )
-            )
+        span.set_attribute("text_mode", options.text_mode)
+        span.set_attribute("filtered", bool(filters))
+        body = build_knn_query(
+            vector,
+            top_k,
+            options=options,
+            query_text=query_text,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+        response = client.search(index=index_name, body=body)
+        results = _parse_hits(response, include_vectors)
         span.set_attribute("retrieved_chunks", len(results))
         logger.debug(
             "KNN retrieval completed index=%s retrieved_chunks=%d",
@@ -70,3 +190,150 @@ def retrieve_knn(
             len(results),
         )
         return results
+
+
+async def aretrieve_knn(
+    client,
+    index_name: str,
+    vector: np.ndarray | list[float],
+    top_k: int,
+    options: RetrievalOptions | None = None,
+    query_text: str | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
+) -> list[RetrievalResult]:
+    options = options or RetrievalOptions()
+    logger.info(
+        "Executing async KNN retrieval index=%s top_k=%d vector_dims=%d text_mode=%s",
+        index_name,
+        top_k,
+        len(vector),
+        options.text_mode,
+    )
+    tracer = trace.get_tracer("opscopilot_rag")
+    with tracer.start_as_current_span("rag.opensearch.search") as span:
+        span.set_attribute("index", index_name)
+        span.set_attribute("top_k", top_k)
+        span.set_attribute("text_mode", options.text_mode)
+        span.set_attribute("filtered", bool(filters))
+        span.set_attribute("async", True)
+        body = build_knn_query(
+            vector,
+            top_k,
+            options=options,
+            query_text=query_text,
+            include_vectors=include_vectors,
+            filters=filters,
+        )
+        response = await client.search(index=index_name, body=body)
+        results = _parse_hits(response, include_vectors)
+        span.set_attribute("retrieved_chunks", len(results))
+        logger.debug(
+            "Async KNN retrieval completed index=%s retrieved_chunks=%d",
+            index_name,
+            len(results),
+        )
+        return results
+
+
+def build_msearch_body(
+    index_name: str,
+    vectors: list[np.ndarray] | np.ndarray,
+    top_k: int,
+    options: RetrievalOptions | None = None,
+    query_texts: list[str | None] | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
+) -> list[dict]:
+    texts = query_texts or [None] * len(vectors)
+    body: list[dict] = []
+    for vector, query_text in zip(vectors, texts):
+        body.append({"index": index_name})
+        body.append(
+            build_knn_query(
+                vector,
+                top_k,
+                options=options,
+                query_text=query_text,
+                include_vectors=include_vectors,
+                filters=filters,
+            )
+        )
+    return body
+
+
+def _parse_msearch(response: dict, include_vectors: bool) -> list[list[RetrievalResult]]:
+    results: list[list[RetrievalResult]] = []
+    for item in response.get("responses", []):
+        if "error" in item:
+            raise RuntimeError(f"multi-search sub-query failed: {item['error']}")
+        results.append(_parse_hits(item, include_vectors))
+    return results
+
+
+def retrieve_knn_many(
+    client: OpenSearch,
+    index_name: str,
+    vectors: list[np.ndarray] | np.ndarray,
+    top_k: int,
+    options: RetrievalOptions | None = None,
+    query_texts: list[str | None] | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
+) -> list[list[RetrievalResult]]:
+    logger.info(
+        "Executing multi-query KNN retrieval index=%s queries=%d top_k=%d",
+        index_name,
+        len(vectors),
+        top_k,
+    )
+    tracer = trace.get_tracer("opscopilot_rag")
+    with tracer.start_as_current_span("rag.opensearch.msearch") as span:
+        span.set_attribute("index", index_name)
+        span.set_attribute("top_k", top_k)
+        span.set_attribute("queries", len(vectors))
+        span.set_attribute("filtered", bool(filters))
+        body = build_msearch_body(
+            index_name, vectors, top_k, options, query_texts, include_vectors, filters
+        )
+        results = _parse_msearch(client.msearch(body=body), include_vectors)
+        span.set_attribute("retrieved_chunks", sum(len(hits) for hits in results))
+        return results
+
+
+async def aretrieve_knn_many(
+    client,
+    index_name: str,
+    vectors: list[np.ndarray] | np.ndarray,
+    top_k: int,
+    options: RetrievalOptions | None = None,
+    query_texts: list[str | None] | None = None,
+    include_vectors: bool = False,
+    filters: dict | None = None,
+) -> list[list[RetrievalResult]]:
+    logger.info(
+        "Executing async multi-query KNN retrieval index=%s queries=%d top_k=%d",
+        index_name,
+        len(vectors),
+        top_k,
+    )
+    tracer = trace.get_tracer("opscopilot_rag")
+    with tracer.start_as_current_span("rag.opensearch.msearch") as span:
+        span.set_attribute("index", index_name)
+        span.set_attribute("top_k", top_k)
+        span.set_attribute("queries", len(vectors))
+        span.set_attribute("filtered", bool(filters))
+        span.set_attribute("async", True)
+        body = build_msearch_body(
+            index_name, vectors, top_k, options, query_texts, include_vectors, filters
+        )
+        results = _parse_msearch(await client.msearch(body=body), include_vectors)
+        span.set_attribute("retrieved_chunks", sum(len(hits) for hits in results))
+        return results
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars + 1)
+    return text[: cut if cut > 0 else max_chars]
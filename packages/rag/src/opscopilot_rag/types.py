@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -18,14 +20,23 @@ class Chunk:
     metadata: dict
 
 
+@dataclass(frozen=True)
+class ChunkingConfig:
+    strategy: str = "fixed"
+    chunk_size: int = 1200
+    chunk_overlap: int = 200
+    max_tokens: int = 300
+
+
 @dataclass(frozen=True)
 class EmbeddingRequest:
     texts: list[str]
+    input_type: str = "document"
 
 
 @dataclass(frozen=True)
 class EmbeddingResult:
-    vectors: list[list[float]]
+    vectors: np.ndarray
     model_id: str
     dimensions: int
 
@@ -37,6 +48,27 @@ class OpenSearchConfig:
     username: str | None = None
     password: str | None = None
     verify_certs: bool = False
+    pool_maxsize: int = 10
+    timeout_s: float = 10.0
+    http_compress: bool = False
+
+
+@dataclass(frozen=True)
+class KnnMethodConfig:
+    engine: str | None = None
+    space_type: str | None = None
+    m: int | None = None
+    ef_construction: int | None = None
+    ef_search: int | None = None
+    quantization: str | None = None
+    quantization_scale: float | None = None
+    model_id: str | None = None
+
+
+@dataclass(frozen=True)
+class FilterField:
+    name: str
+    path_segment: int | None = None
 
 
 @dataclass(frozen=True)
@@ -47,7 +79,32 @@ class IndexedChunk:
     source: str
     text: str
     metadata: dict
-    embedding: list[float]
+    embedding: np.ndarray
+
+
+@dataclass(frozen=True)
+class BulkIndexConfig:
+    max_bytes: int = 10 * 1024 * 1024
+    max_actions: int = 500
+    workers: int = 1
+    max_retries: int = 3
+    initial_backoff_s: float = 1.0
+    max_backoff_s: float = 30.0
+
+
+@dataclass(frozen=True)
+class BulkItemFailure:
+    chunk_id: str
+    op_type: str
+    status: int
+    error: str
+
+
+@dataclass(frozen=True)
+class BulkIndexResult:
+    success: int
+    failures: list[BulkItemFailure]
+    retries: int
 
 
 @dataclass(frozen=True)
@@ -59,6 +116,27 @@ class RetrievalResult:
     text: str
     metadata: dict
     score: float
+    embedding: np.ndarray | None = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class RetrievalOptions:
+    source_fields: tuple[str, ...] | None = None
+    text_mode: str = "full"
+    max_text_chars: int = 600
+    fragments: int = 2
+    quantization: str | None = None
+    quantization_scale: float | None = None
+    ef_search: int | None = None
+
+
+@dataclass(frozen=True)
+class ContextAssemblyConfig:
+    candidates: int = 12
+    max_chunks: int = 3
+    token_budget: int = 1500
+    mmr_lambda: float = 0.7
+    merge_neighbors: bool = True
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+VECTOR_DTYPE = np.float32
+
+
+def as_matrix(vectors: np.ndarray | Sequence[Sequence[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=VECTOR_DTYPE)
+    if matrix.size == 0:
+        return np.empty((0, matrix.shape[-1] if matrix.ndim == 2 else 0), dtype=VECTOR_DTYPE)
+    if matrix.ndim != 2:
+        raise ValueError("vectors must be a 2-dimensional batch")
+    return np.ascontiguousarray(matrix)
+
+
+def as_vector(vector: np.ndarray | Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=VECTOR_DTYPE)
+    if array.ndim != 1:
+        raise ValueError("vector must be 1-dimensional")
+    return array
+
+
+def vector_to_list(vector: np.ndarray | Sequence[float]) -> list[float]:
+    if isinstance(vector, np.ndarray):
+        return vector.tolist()
+    return [float(value) for value in vector]
@@ -0,0 +1,113 @@
+from opscopilot_rag.benchmarks import (
+    FakeBulkClient,
+    FakeEmbeddingAdapter,
+    generate_corpus,
+    run_ingest_benchmark,
+)
+from opscopilot_rag.cli.ingest import IngestStats, build_arg_parser, ingest_documents
+from opscopilot_rag.embeddings import EmbeddingCache
+from opscopilot_rag.types import EmbeddingRequest, EmbeddingResult
+
+
+def test_fake_embedding_adapter_is_deterministic():
+    adapter = FakeEmbeddingAdapter(dimensions=8)
+    first = adapter.embed(EmbeddingRequest(texts=["a", "b"]))
+    second = adapter.embed(EmbeddingRequest(texts=["a"]))
+    assert first.vectors.shape == (2, 8)
+    assert (first.vectors[0] == second.vectors[0]).all()
+    assert adapter.calls == 2
+    assert adapter.texts == 3
+
+
+def test_run_ingest_benchmark_reports_throughput(tmp_path):
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, documents=5, sections=2, seed=1)
+    client = FakeBulkClient(keep_documents=True)
+    ingest_args = ["--chunker", "markdown", "--chunk-tokens", "80", "--batch-size", "4"]
+    result = run_ingest_benchmark(
+        corpus,
+        ingest_args=ingest_args,
+        adapter=FakeEmbeddingAdapter(dimensions=4),
+        client=client,
+    )
+    assert result.documents == 5
+    assert result.chunks == result.indexed == len(client.documents)
+    assert client.indices.exists("benchmark")
+    assert set(result.stage_seconds) == {"load", "chunk", "embed", "index"}
+    assert result.peak_rss_bytes > 0
+    assert result.chunks_per_second > 0
+
+
+def test_run_ingest_benchmark_does_not_touch_the_configured_embedding_cache(tmp_path, monkeypatch):
+    cache_path = tmp_path / "cache.sqlite"
+    monkeypatch.setenv("RAG_EMBEDDING_CACHE_PATH", str(cache_path))
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, documents=2, sections=2, seed=4)
+    result = run_ingest_benchmark(corpus)
+    assert result.indexed > 0
+    assert not cache_path.exists()
+
+
+def test_run_ingest_benchmark_drives_the_incremental_pipeline(tmp_path):
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, documents=4, sections=2, seed=2)
+    client = FakeBulkClient()
+    ingest_args = ["--incremental", "--manifest", str(tmp_path / "manifest.json")]
+    first = run_ingest_benchmark(corpus, ingest_args=ingest_args, client=client)
+    second = run_ingest_benchmark(corpus, ingest_args=ingest_args, client=client)
+    assert first.indexed == first.chunks > 0
+    assert second.documents == 4
+    assert second.indexed == second.chunks == 0
+
+
+def test_ingest_streams_every_embedding_batch_through_one_bulk_stream(tmp_path):
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, documents=5, sections=2, seed=3)
+    client = FakeBulkClient()
+    result = run_ingest_benchmark(
+        corpus,
+        ingest_args=["--batch-size", "2", "--bulk-max-actions", "1000", "--bulk-workers", "1"],
+        client=client,
+    )
+    assert result.indexed == result.chunks > 2
+    assert result.bulk_requests == 1
+
+
+class GrowingEmbeddingAdapter(FakeEmbeddingAdapter):
+    def embed(self, request):
+        result = super().embed(request)
+        return EmbeddingResult(
+            vectors=result.vectors * self.calls,
+            model_id=result.model_id,
+            dimensions=result.dimensions,
+        )
+
+
+def test_byte_ingest_calibrates_the_scale_beyond_the_first_batch(tmp_path, capsys):
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, documents=5, sections=2, seed=5)
+    args = build_arg_parser().parse_args(
+        [
+            "--root",
+            str(corpus),
+            "--backend",
+            "opensearch",
+            "--opensearch-index",
+            "benchmark",
+            "--knn-quantization",
+            "byte",
+            "--batch-size",
+            "2",
+        ]
+    )
+    stats = IngestStats()
+    exit_code = ingest_documents(
+        args,
+        adapter=GrowingEmbeddingAdapter(dimensions=8),
+        client=FakeBulkClient(),
+        stats=stats,
+        cache=EmbeddingCache(),
+    )
+    assert exit_code == 0
+    assert stats.indexed > 4
+    assert stats.clipped <= 1
@@ -0,0 +1,146 @@
+import json
+import threading
+
+import numpy as np
+from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers import BulkIndexError
+
+from opscopilot_rag.indexing import (
+    bulk_delete_chunks,
+    bulk_update_chunk_metadata,
+    bulk_upsert_chunks,
+    stream_bulk,
+)
+from opscopilot_rag.types import BulkIndexConfig, IndexedChunk
+
+
+def _doc(index: int) -> IndexedChunk:
+    return IndexedChunk(
+        document_id="doc",
+        chunk_id=f"doc::chunk-{index}",
+        chunk_index=index,
+        source="doc",
+        text="x" * 50,
+        metadata={},
+        embedding=np.ones(8, dtype=np.float32),
+    )
+
+
+class FakeBulkClient:
+    def __init__(self, statuses=None, raise_first=None, truncate_first=0):
+        self.lock = threading.Lock()
+        self.truncate_first = truncate_first
+        self.requests: list[list[dict]] = []
+        self.request_bytes: list[int] = []
+        self.statuses = statuses or {}
+        self.raise_first = raise_first
+
+    def bulk(self, body):
+        lines = body.decode("utf-8").strip().split("\n")
+        with self.lock:
+            if self.raise_first is not None:
+                error, self.raise_first = self.raise_first, None
+                raise error
+            headers = []
+            position = 0
+            while position < len(lines):
+                header = json.loads(lines[position])
+                op_type = next(iter(header))
+                position += 1 if op_type == "delete" else 2
+                headers.append((op_type, header[op_type]["_id"]))
+            self.requests.append(headers)
+            self.request_bytes.append(len(body))
+            items = []
+            for op_type, doc_id in headers:
+                queue = self.statuses.get(doc_id)
+                status = queue.pop(0) if queue else 201
+                items.append({op_type: {"_id": doc_id, "status": status, "error": {"type": "x", "reason": "y"}}})
+            if self.truncate_first:
+                items, self.truncate_first = items[: -self.truncate_first], 0
+        return {"errors": False, "items": items}
+
+
+def test_bulk_upsert_caps_request_bytes():
+    client = FakeBulkClient()
+    config = BulkIndexConfig(max_bytes=1500, max_actions=100)
+    indexed = bulk_upsert_chunks(client, "idx", (_doc(i) for i in range(20)), config=config)
+    assert indexed == 20
+    assert len(client.requests) > 1
+    assert all(size <= 1500 for size in client.request_bytes)
+
+
+def test_stream_bulk_retries_rejected_items():
+    client = FakeBulkClient(statuses={"doc::chunk-1": [429, 429]})
+    config = BulkIndexConfig(initial_backoff_s=0.001, max_retries=3)
+    actions = [
+        {"_op_type": "index", "_index": "idx", "_id": f"doc::chunk-{i}", "_source": {"a": i}}
+        for i in range(3)
+    ]
+    result = stream_bulk(client, "idx", actions, config)
+    assert result.success == 3
+    assert result.retries == 2
+    assert client.requests[-1] == [("index", "doc::chunk-1")]
+
+
+def test_stream_bulk_retries_request_level_throttling():
+    client = FakeBulkClient(raise_first=TransportError(429, "rejected", {}))
+    config = BulkIndexConfig(initial_backoff_s=0.001)
+    indexed = bulk_upsert_chunks(client, "idx", [_doc(0)], config=config)
+    assert indexed == 1
+
+
+def test_bulk_upsert_reports_item_failures():
+    client = FakeBulkClient(statuses={"doc::chunk-0": [400]})
+    try:
+        bulk_upsert_chunks(client, "idx", [_doc(0), _doc(1)])
+    except BulkIndexError as exc:
+        assert exc.errors[0].chunk_id == "doc::chunk-0"
+        assert exc.errors[0].status == 400
+    else:
+        raise AssertionError("expected BulkIndexError")
+
+
+def test_parallel_bulk_workers_index_everything():
+    client = FakeBulkClient()
+    config = BulkIndexConfig(max_actions=3, workers=3)
+    assert bulk_upsert_chunks(client, "idx", [_doc(i) for i in range(10)], config=config) == 10
+    assert len(client.requests) == 4
+
+
+def test_bulk_delete_tolerates_missing_documents():
+    client = FakeBulkClient(statuses={"doc::chunk-0": [404]})
+    assert bulk_delete_chunks(client, "idx", ["doc::chunk-0", "doc::chunk-1"]) == 2
+
+
+def test_bulk_update_chunk_metadata_sends_partial_documents():
+    client = FakeBulkClient()
+    updates = [("doc::chunk-0", {"duplicate_sources": ["a.md"]})]
+    assert bulk_update_chunk_metadata(client, "idx", updates) == 1
+    assert client.requests == [[("update", "doc::chunk-0")]]
+
+
+def test_stream_bulk_retries_items_missing_from_a_short_response():
+    client = FakeBulkClient(truncate_first=2)
+    acknowledged = []
+    indexed = bulk_upsert_chunks(
+        client,
+        "idx",
+        (_doc(i) for i in range(5)),
+        config=BulkIndexConfig(initial_backoff_s=0.0),
+        on_indexed=acknowledged.extend,
+    )
+    assert indexed == 5
+    assert [doc_id for _, doc_id in client.requests[1]] == ["doc::chunk-3", "doc::chunk-4"]
+    assert acknowledged == [f"doc::chunk-{i}" for i in range(5)]
+
+
+def test_stream_bulk_fails_items_still_missing_after_retries():
+    client = FakeBulkClient(truncate_first=1)
+    result = stream_bulk(
+        client,
+        "idx",
+        ({"_op_type": "delete", "_index": "idx", "_id": f"d{i}"} for i in range(3)),
+        config=BulkIndexConfig(max_retries=0),
+    )
+    assert result.success == 2
+    assert [(failure.chunk_id, failure.status) for failure in result.failures] == [("d2", 503)]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from opscopilot_rag.checkpoint import IngestCheckpoint
+from opscopilot_rag.types import Chunk
+
+
+def _chunk(index: int, text: str = "text") -> Chunk:
+    return Chunk(
+        document_id="doc",
+        chunk_id=f"doc::chunk-{index}",
+        text=f"{text} {index}",
+        index=index,
+        metadata={"source": "doc"},
+    )
+
+
+def test_resume_skips_indexed_chunks_and_reuses_vectors(tmp_path):
+    path = tmp_path / "ingest.ckpt"
+    checkpoint = IngestCheckpoint(path, settings={"index": "idx"})
+    checkpoint.mark_indexed([_chunk(0), _chunk(1)])
+    checkpoint.put_many("m", 3, {"digest": np.ones(3, dtype=np.float32)})
+    checkpoint.close()
+
+    resumed = IngestCheckpoint(path, settings={"index": "idx"}, resume=True)
+    pending = list(resumed.pending([_chunk(0), _chunk(1, "edited"), _chunk(2)]))
+    assert [chunk.chunk_id for chunk in pending] == ["doc::chunk-1", "doc::chunk-2"]
+    assert resumed.skipped_chunks == 1
+    assert resumed.get_many("m", 3, ["digest"])["digest"].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_fresh_run_resets_checkpoint(tmp_path):
+    path = tmp_path / "ingest.ckpt"
+    checkpoint = IngestCheckpoint(path, settings={"index": "idx"})
+    checkpoint.mark_indexed([_chunk(0)])
+    checkpoint.close()
+    assert IngestCheckpoint(path, settings={"index": "idx"}).indexed_count() == 0
+
+
+def test_resume_rejects_changed_settings(tmp_path):
+    path = tmp_path / "ingest.ckpt"
+    IngestCheckpoint(path, settings={"index": "idx"}).close()
+    with pytest.raises(RuntimeError):
+        IngestCheckpoint(path, settings={"index": "other"}, resume=True)
+
+
+def test_discard_removes_spill_file(tmp_path):
+    path = tmp_path / "ingest.ckpt"
+    checkpoint = IngestCheckpoint(path, settings={})
+    checkpoint.discard()
+    assert not path.exists()
@@ -1,4 +1,5 @@
-from opscopilot_rag.chunking import chunk_text
+from opscopilot_rag.chunking import chunk_document, chunk_markdown, chunk_text, estimate_tokens
+from opscopilot_rag.types import ChunkingConfig, Document
 
 
 def test_chunk_text_applies_overlap():
@@ -14,3 +15,65 @@ def test_chunk_text_validates_overlap():
         assert "chunk_overlap" in str(exc)
     else:
         raise AssertionError("expected ValueError")
+
+
+MARKDOWN = """# Runbook
+
+Intro paragraph for the runbook.
+
+## Restart a deployment
+
+Step one. Step two.
+
+```bash
+kubectl rollout restart deployment/api
+
+kubectl rollout status deployment/api
+```
+
+## Check events
+
+Look at recent events.
+"""
+
+
+def test_chunk_markdown_keeps_code_fences_and_sections_together():
+    chunks = chunk_markdown("doc", MARKDOWN, max_tokens=40, metadata={"source": "doc"})
+    texts = [chunk.text for chunk in chunks]
+    fenced = [text for text in texts if "```bash" in text]
+    assert len(fenced) == 1
+    assert "kubectl rollout status deployment/api\n```" in fenced[0]
+    assert any(text.startswith("## Check events") for text in texts)
+    sections = [chunk.metadata.get("section") for chunk in chunks]
+    assert "Runbook > Check events" in sections
+    assert [chunk.chunk_id for chunk in chunks] == [f"doc::chunk-{i}" for i in range(len(chunks))]
+
+
+def test_chunk_markdown_respects_token_budget():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(10))
+    chunks = chunk_markdown("doc", text, max_tokens=50)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk.text) <= 50 for chunk in chunks)
+
+
+def test_chunk_markdown_splits_oversized_text_without_spaces():
+    url = "https://example.com/" + "/".join(f"segment{i}" for i in range(60))
+    text = f"See {url} for details.\n\n```\n{'x=1;' * 40}\n```"
+    chunks = chunk_markdown("doc", text, max_tokens=16)
+    assert all(estimate_tokens(chunk.text) <= 16 for chunk in chunks)
+    joined = "".join(chunk.text for chunk in chunks)
+    assert "segment59" in joined and joined.count("x=1;") == 40
+
+
+def test_chunk_markdown_is_deterministic():
+    first = chunk_markdown("doc", MARKDOWN, max_tokens=20)
+    second = chunk_markdown("doc", MARKDOWN, max_tokens=20)
+    assert first == second
+
+
+def test_chunk_document_dispatches_on_strategy():
+    document = Document(document_id="doc", source_path="doc", content=MARKDOWN, metadata={})
+    fixed = chunk_document(document, ChunkingConfig(strategy="fixed", chunk_size=50, chunk_overlap=0))
+    markdown = chunk_document(document, ChunkingConfig(strategy="markdown", max_tokens=40))
+    assert all(len(chunk.text) <= 50 for chunk in fixed)
+    assert "section" in markdown[0].metadata
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from opscopilot_rag.context import (
+    assemble_context,
+    context_assembly_config_from_env,
+    merge_adjacent,
+    mmr_order,
+)
+from opscopilot_rag.types import ContextAssemblyConfig, RetrievalResult
+
+
+def _result(chunk_index, text, score, embedding=None, document_id="doc"):
+    return RetrievalResult(
+        document_id=document_id,
+        chunk_id=f"{document_id}::chunk-{chunk_index}",
+        chunk_index=chunk_index,
+        source=f"{document_id}.md",
+        text=text,
+        metadata={},
+        score=score,
+        embedding=None if embedding is None else np.asarray(embedding, dtype=np.float32),
+    )
+
+
+def test_mmr_prefers_diverse_candidates():
+    query = [1.0, 0.0]
+    results = [
+        _result(0, "a", 0.9, [1.0, 0.05], document_id="a"),
+        _result(0, "b", 0.89, [1.0, 0.06], document_id="b"),
+        _result(0, "c", 0.7, [0.6, 0.8], document_id="c"),
+    ]
+    ordered = mmr_order(query, results, mmr_lambda=0.3)
+    assert [r.document_id for r in ordered] == ["a", "c", "b"]
+    assert mmr_order(query, results, mmr_lambda=1.0) == results
+
+
+def test_mmr_keeps_score_order_without_vectors():
+    results = [_result(0, "a", 0.9), _result(1, "b", 0.8, [1.0, 0.0])]
+    assert mmr_order([1.0, 0.0], results, mmr_lambda=0.5) == results
+
+
+def test_merge_adjacent_drops_overlap_and_keeps_rank():
+    results = [
+        _result(3, "disk alert", 0.95, document_id="other"),
+        _result(1, "scale the pods then restart", 0.9),
+        _result(0, "drain the node and scale the pods", 0.8),
+    ]
+    merged = merge_adjacent(results)
+    assert [r.document_id for r in merged] == ["other", "doc"]
+    assert merged[1].text == "drain the node and scale the pods then restart"
+    assert merged[1].score == 0.9
+    assert merged[1].metadata["merged_chunk_ids"] == ["doc::chunk-0", "doc::chunk-1"]
+
+
+def test_assemble_context_respects_budget_and_strips_vectors():
+    results = [
+        _result(0, "word " * 100, 0.9, [1.0, 0.0], document_id="a"),
+        _result(0, "word " * 1000, 0.8, [0.0, 1.0], document_id="b"),
+        _result(0, "word " * 10, 0.7, [0.7, 0.7], document_id="c"),
+    ]
+    config = ContextAssemblyConfig(candidates=3, max_chunks=3, token_budget=200, mmr_lambda=0.7)
+    selected = assemble_context([1.0, 0.0], results, config)
+    assert [r.document_id for r in selected] == ["a", "c"]
+    assert all(r.embedding is None for r in selected)
+
+
+def test_context_assembly_config_from_env(monkeypatch):
+    monkeypatch.setenv("RAG_MMR_LAMBDA", "1")
+    monkeypatch.setenv("RAG_MERGE_NEIGHBORS", "false")
+    monkeypatch.delenv("RAG_CANDIDATES", raising=False)
+    config = context_assembly_config_from_env(top_k=3)
+    assert config.candidates == 12
+    assert config.max_chunks == 3
+    assert config.mmr_lambda == 1.0
+    assert config.merge_neighbors is False
+    monkeypatch.setenv("RAG_MMR_LAMBDA", "2")
+    with pytest.raises(RuntimeError):
+        context_assembly_config_from_env(top_k=3)
@@ -0,0 +1,56 @@
+from opscopilot_rag.dedup import MinHasher, NearDuplicateFilter
+from opscopilot_rag.types import Chunk
+
+RUNBOOK = (
+    "If the pod is stuck in CrashLoopBackOff run kubectl describe pod to inspect events, "
+    "then kubectl logs with the previous flag to read the last container output and check "
+    "the liveness probe configuration and resource limits for the deployment."
+)
+
+
+def _chunk(document_id: str, text: str) -> Chunk:
+    return Chunk(
+        document_id=document_id,
+        chunk_id=f"{document_id}::chunk-0",
+        text=text,
+        index=0,
+        metadata={"source": f"{document_id}.md"},
+    )
+
+
+def test_minhash_signature_is_deterministic():
+    first = MinHasher(num_perm=32).signature(RUNBOOK)
+    second = MinHasher(num_perm=32).signature(RUNBOOK)
+    assert first.shape == (32,)
+    assert (first == second).all()
+
+
+def test_filter_collapses_near_duplicates_and_keeps_sources():
+    dedup = NearDuplicateFilter(threshold=0.7)
+    chunks = [
+        _chunk("a", RUNBOOK),
+        _chunk("b", RUNBOOK.replace("deployment.", "deployment!")),
+        _chunk("c", "Rotate the database credentials through the secrets manager console."),
+        _chunk("d", RUNBOOK),
+    ]
+    kept = list(dedup.filter(chunks))
+    assert [chunk.chunk_id for chunk in kept] == ["a::chunk-0", "c::chunk-0"]
+    assert dedup.seen == 4
+    assert dedup.duplicate_chunks == 2
+    assert dict(dedup.duplicate_metadata()) == {
+        "a::chunk-0": {
+            "duplicate_sources": ["b.md", "d.md"],
+            "duplicate_chunk_ids": ["b::chunk-0", "d::chunk-0"],
+        }
+    }
+
+
+def test_filter_keeps_distinct_chunks():
+    dedup = NearDuplicateFilter()
+    chunks = [
+        _chunk("a", RUNBOOK),
+        _chunk("b", "kubectl get nodes shows NotReady after the kernel upgrade on the workers"),
+        _chunk("c", "Rotate the database credentials through the secrets manager console."),
+    ]
+    assert len(list(dedup.filter(chunks))) == 3
+    assert dedup.duplicates == {}
@@ -0,0 +1,119 @@
+import sqlite3
+
+import numpy as np
+
+from opscopilot_rag.embeddings import CachedEmbeddingAdapter, EmbeddingAdapter, EmbeddingCache
+from opscopilot_rag.types import EmbeddingRequest, EmbeddingResult
+
+
+class CountingAdapter(EmbeddingAdapter):
+    model = "model-a"
+
+    def __init__(self, width: int = 2) -> None:
+        self.width = width
+        self.requests: list[list[str]] = []
+
+    def embed(self, request: EmbeddingRequest) -> EmbeddingResult:
+        self.requests.append(list(request.texts))
+        vectors = [[float(len(text))] + [0.5] * (self.width - 1) for text in request.texts]
+        return EmbeddingResult(vectors=vectors, model_id=self.model, dimensions=self.width)
+
+
+def test_cached_adapter_dedupes_batch_and_reuses_vectors():
+    provider = CountingAdapter()
+    adapter = CachedEmbeddingAdapter(provider, EmbeddingCache(max_entries=10))
+    first = adapter.embed(EmbeddingRequest(texts=["aa", "b", "aa"]))
+    assert first.vectors.tolist() == [[2.0, 0.5], [1.0, 0.5], [2.0, 0.5]]
+    assert provider.requests == [["aa", "b"]]
+
+    second = adapter.embed(EmbeddingRequest(texts=["b", "ccc"]))
+    assert second.vectors.tolist() == [[1.0, 0.5], [3.0, 0.5]]
+    assert provider.requests[-1] == ["ccc"]
+
+
+def test_cached_adapter_separates_query_and_document_embeddings():
+    provider = CountingAdapter()
+    adapter = CachedEmbeddingAdapter(provider, EmbeddingCache(max_entries=10))
+    adapter.embed(EmbeddingRequest(texts=["restart"]))
+    adapter.embed(EmbeddingRequest(texts=["restart"], input_type="query"))
+    assert provider.requests == [["restart"], ["restart"]]
+
+
+def test_cache_persists_vectors_on_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    provider = CountingAdapter()
+    cache = EmbeddingCache(path=path)
+    CachedEmbeddingAdapter(provider, cache).embed(EmbeddingRequest(texts=["hello"]))
+    cache.close()
+
+    reopened = EmbeddingCache(path=path)
+    adapter = CachedEmbeddingAdapter(provider, reopened, dimensions=2)
+    result = adapter.embed(EmbeddingRequest(texts=["hello"]))
+    assert result.vectors.tolist() == [[5.0, 0.5]]
+    assert result.vectors.dtype == np.float32
+    assert len(provider.requests) == 1
+    assert reopened.hits == 1
+
+
+def test_cache_keys_include_model_and_dimensions():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many("model-a", 1, {"digest": [1.0]})
+    assert cache.get_many("model-b", 1, ["digest"]) == {}
+    assert cache.get_many("model-a", 256, ["digest"]) == {}
+    assert cache.get_many("model-a", 0, ["digest"]) == {}
+    assert cache.get_many("model-a", 1, ["digest"])["digest"].tolist() == [1.0]
+    assert cache.dimensions("model-a") == 1
+    assert cache.dimensions("model-b") == 0
+
+
+def test_cached_adapter_keys_on_returned_dimensions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(path=path)
+    CachedEmbeddingAdapter(CountingAdapter(width=2), cache).embed(
+        EmbeddingRequest(texts=["hello"])
+    )
+    cache.close()
+
+    resized = CountingAdapter(width=3)
+    adapter = CachedEmbeddingAdapter(resized, EmbeddingCache(path=path))
+    assert adapter.embed(EmbeddingRequest(texts=["hello", "world"])).vectors.shape == (2, 3)
+    assert adapter.embed(EmbeddingRequest(texts=["hello"])).vectors.shape == (1, 3)
+    assert resized.requests == [["world"], ["hello"]]
+
+
+def test_persisted_dimensions_let_a_fresh_process_hit_the_sqlite_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = EmbeddingCache(path=path)
+    CachedEmbeddingAdapter(CountingAdapter(), cache).embed(
+        EmbeddingRequest(texts=["aa", "bbb", "c"])
+    )
+    cache.close()
+
+    provider = CountingAdapter()
+    reopened = EmbeddingCache(path=path)
+    assert reopened.dimensions("model-a") == 2
+    adapter = CachedEmbeddingAdapter(provider, reopened)
+    assert adapter.embed(EmbeddingRequest(texts=["bbb"])).vectors.tolist() == [[3.0, 0.5]]
+    result = adapter.embed(EmbeddingRequest(texts=["aa", "bbb", "c", "dddd"]))
+    assert result.vectors[:, 0].tolist() == [2.0, 3.0, 1.0, 4.0]
+    assert provider.requests == [["dddd"]]
+    assert (reopened.hits, reopened.misses) == (4, 1)
+
+
+def test_cache_backfills_dimensions_for_existing_databases(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(path=str(path))
+    cache.put_many("model-a", 2, {"digest": [1.0, 2.0]})
+    cache.close()
+    with sqlite3.connect(path) as db:
+        db.execute("DROP TABLE model_dimensions")
+
+    assert EmbeddingCache(path=str(path)).dimensions("model-a") == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many("m", 1, {"a": [1.0], "b": [2.0]})
+    cache.get_many("m", 1, ["a"])
+    cache.put_many("m", 1, {"c": [3.0]})
+    assert set(cache.get_many("m", 1, ["a", "b", "c"])) == {"a", "c"}
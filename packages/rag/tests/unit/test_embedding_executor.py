@@ -0,0 +1,77 @@
+import threading
+import time
+
+from opscopilot_rag.embeddings import ConcurrentEmbeddingExecutor, EmbeddingAdapter, is_throttling_error
+from opscopilot_rag.types import EmbeddingRequest, EmbeddingResult
+
+
+class ThrottledError(Exception):
+    status_code = 429
+
+
+class SlowAdapter(EmbeddingAdapter):
+    def __init__(self, throttle_first: int = 0) -> None:
+        self._lock = threading.Lock()
+        self._throttle_remaining = throttle_first
+        self.active = 0
+        self.max_active = 0
+
+    def embed(self, request: EmbeddingRequest) -> EmbeddingResult:
+        with self._lock:
+            if self._throttle_remaining:
+                self._throttle_remaining -= 1
+                raise ThrottledError("slow down")
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02 * (len(request.texts) % 3))
+        with self._lock:
+            self.active -= 1
+        vectors = [[float(len(text))] for text in request.texts]
+        return EmbeddingResult(vectors=vectors, model_id="m", dimensions=1)
+
+
+def test_executor_preserves_order_and_runs_concurrently():
+    adapter = SlowAdapter()
+    executor = ConcurrentEmbeddingExecutor(adapter, max_in_flight=3)
+    batches = [["a" * n for n in range(1, size + 1)] for size in (3, 1, 2, 4, 2)]
+    requests = ((index, EmbeddingRequest(texts=batch)) for index, batch in enumerate(batches))
+    results = list(executor.map(requests))
+    assert [index for index, _ in results] == [0, 1, 2, 3, 4]
+    assert results[3][1].vectors == [[1.0], [2.0], [3.0], [4.0]]
+    assert adapter.max_active > 1
+    assert executor.texts_embedded == 12
+    assert executor.texts_per_second > 0
+    assert 0 < executor.busy_s <= executor.elapsed_s
+
+
+def test_executor_backs_off_on_throttling():
+    adapter = SlowAdapter(throttle_first=2)
+    executor = ConcurrentEmbeddingExecutor(adapter, max_in_flight=1, initial_backoff_s=0.01)
+    results = list(executor.map([("only", EmbeddingRequest(texts=["x"]))]))
+    assert results[0][1].vectors == [[1.0]]
+    assert executor.throttled == 2
+
+
+def test_executor_does_not_retry_other_errors():
+    class BrokenAdapter(EmbeddingAdapter):
+        calls = 0
+
+        def embed(self, request):
+            BrokenAdapter.calls += 1
+            raise ValueError("bad input")
+
+    executor = ConcurrentEmbeddingExecutor(BrokenAdapter(), max_in_flight=2)
+    try:
+        list(executor.map([(0, EmbeddingRequest(texts=["x"]))]))
+    except ValueError:
+        assert BrokenAdapter.calls == 1
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_is_throttling_error_understands_bedrock_errors():
+    class ClientError(Exception):
+        response = {"Error": {"Code": "ThrottlingException"}, "ResponseMetadata": {}}
+
+    assert is_throttling_error(ClientError("x"))
+    assert not is_throttling_error(ValueError("nope"))
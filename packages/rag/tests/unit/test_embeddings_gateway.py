@@ -1,10 +1,12 @@
 from pathlib import Path
 
+import numpy as np
+
 from opscopilot_llm_gateway.accounting import CostLedger
 from opscopilot_llm_gateway.budgets import BudgetEnforcer, BudgetState
 from opscopilot_llm_gateway.types import EmbeddingRequest, EmbeddingResponse
 
-from opscopilot_rag.embeddings import OpenAIEmbeddingAdapter
+from opscopilot_rag.embeddings import EmbeddingAdapter, OpenAIEmbeddingAdapter
 from opscopilot_rag.types import EmbeddingRequest as RagEmbeddingRequest
 
 
@@ -32,5 +34,45 @@ def test_openai_embedding_adapter_uses_gateway():
         ledger=CostLedger(),
     )
     result = adapter.embed(RagEmbeddingRequest(texts=["hello"]))
-    assert result.vectors
+    assert result.vectors.shape == (1, 2)
+    assert result.vectors.dtype == np.float32
     assert result.dimensions == 2
+
+
+def test_fork_shares_provider_with_fresh_budget():
+    repo_root = Path(__file__).resolve().parents[3]
+    cost_table_path = repo_root / "llm-gateway/src/opscopilot_llm_gateway/costs.json"
+    adapter = OpenAIEmbeddingAdapter(
+        provider=FakeEmbeddingProvider(),
+        model="text-embedding-3-small",
+        cost_table_path=str(cost_table_path),
+    )
+    adapter.embed(RagEmbeddingRequest(texts=["hello"]))
+
+    forked = adapter.fork()
+    assert forked.provider is adapter.provider
+    assert forked.cost_table is adapter.cost_table
+    assert forked.budget.state().total_usd == 0.0
+    assert forked.ledger.records() == []
+
+
+def test_reset_budget_starts_a_fresh_budget_and_ledger():
+    repo_root = Path(__file__).resolve().parents[3]
+    cost_table_path = repo_root / "llm-gateway/src/opscopilot_llm_gateway/costs.json"
+    adapter = OpenAIEmbeddingAdapter(
+        provider=FakeEmbeddingProvider(),
+        model="text-embedding-3-small",
+        cost_table_path=str(cost_table_path),
+    )
+    adapter.embed(RagEmbeddingRequest(texts=["hello"]))
+    max_usd = adapter.budget.state().max_usd
+
+    adapter.reset_budget()
+    assert adapter.budget.state().total_usd == 0.0
+    assert adapter.budget.state().max_usd == max_usd
+    assert adapter.ledger.records() == []
+
+
+def test_base_adapter_fork_returns_itself():
+    adapter = EmbeddingAdapter()
+    assert adapter.fork() is adapter
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+
+from opscopilot_rag.backends import (
+    FederatedBackend,
+    FederatedIndex,
+    RetrievalBackend,
+    _parse_federated_indices,
+)
+from opscopilot_rag.context import merge_adjacent
+from opscopilot_rag.types import RetrievalResult
+
+
+class SlowBackend(RetrievalBackend):
+    def __init__(self, name, chunk_ids, delay_s=0.0):
+        self.name = name
+        self.chunk_ids = chunk_ids
+        self.delay_s = delay_s
+        self.requested_top_k = []
+        self.requested_filters = []
+
+    def search(self, vector, top_k, query_text=None, include_vectors=False, filters=None):
+        time.sleep(self.delay_s)
+        self.requested_top_k.append(top_k)
+        self.requested_filters.append(filters)
+        return [
+            RetrievalResult(
+                document_id=chunk_id.split("::")[0],
+                chunk_id=chunk_id,
+                chunk_index=0,
+                source=f"{self.name}.md",
+                text=chunk_id,
+                metadata={},
+                score=1.0,
+            )
+            for chunk_id in self.chunk_ids[:top_k]
+        ]
+
+    def generation(self):
+        return f"{self.name}-g1"
+
+
+def test_federated_search_runs_indices_concurrently():
+    runbooks = SlowBackend("runbooks", ["rb::0", "rb::1"], delay_s=0.2)
+    faqs = SlowBackend("faqs", ["faq::0", "faq::1"], delay_s=0.2)
+    backend = FederatedBackend(
+        [FederatedIndex(runbooks, weight=1.0), FederatedIndex(faqs, weight=2.0, top_k=1)]
+    )
+    observed = []
+    backend.observe(lambda index, latency_ms, hits: observed.append((index, hits)))
+    started = time.perf_counter()
+    results = backend.search([0.1], top_k=3)
+    assert time.perf_counter() - started < 0.35
+    assert [result.chunk_id for result in results] == ["faq::0", "rb::0", "rb::1"]
+    assert results[0].metadata["index"] == "faqs"
+    assert faqs.requested_top_k == [1]
+    assert sorted(observed) == [("faqs", 1), ("runbooks", 2)]
+    assert backend.name == "runbooks+faqs"
+    assert backend.generation() == "runbooks-g1,faqs-g1"
+
+
+def test_federated_search_forwards_filters_to_every_index():
+    runbooks = SlowBackend("runbooks", ["rb::0"])
+    faqs = SlowBackend("faqs", ["faq::0"])
+    backend = FederatedBackend([FederatedIndex(runbooks), FederatedIndex(faqs)])
+    backend.search([0.1], top_k=2, filters={"team": "payments"})
+    assert runbooks.requested_filters == [{"team": "payments"}]
+    assert faqs.requested_filters == [{"team": "payments"}]
+
+
+def test_federated_async_search_fuses_per_query():
+    backend = FederatedBackend(
+        [
+            FederatedIndex(SlowBackend("runbooks", ["rb::0"])),
+            FederatedIndex(SlowBackend("faqs", ["faq::0"])),
+        ]
+    )
+    results = asyncio.run(backend.asearch_many([[0.1], [0.2]], top_k=2))
+    assert [[result.chunk_id for result in hits] for hits in results] == [
+        ["rb::0", "faq::0"],
+        ["rb::0", "faq::0"],
+    ]
+
+
+def test_parse_federated_indices():
+    assert _parse_federated_indices("runbooks, faqs:0.5, postmortems:0.8:2") == [
+        ("runbooks", 1.0, None),
+        ("faqs", 0.5, None),
+        ("postmortems", 0.8, 2),
+    ]
+    with pytest.raises(RuntimeError):
+        _parse_federated_indices("runbooks:heavy")
+
+
+def test_federated_search_keeps_colliding_chunk_ids_from_each_index():
+    runbooks = SlowBackend("runbooks", ["README.md::chunk-0"])
+    faqs = SlowBackend("faqs", ["README.md::chunk-0"])
+    backend = FederatedBackend([FederatedIndex(runbooks), FederatedIndex(faqs)])
+    results = backend.search([0.1], top_k=4)
+    assert sorted(result.metadata["index"] for result in results) == ["faqs", "runbooks"]
+    merged = merge_adjacent(
+        [replace(result, chunk_index=position) for position, result in enumerate(results)]
+    )
+    assert len(merged) == 2
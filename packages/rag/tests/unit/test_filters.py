@@ -0,0 +1,189 @@
+import numpy as np
+import pytest
+from opensearchpy.exceptions import RequestError
+
+from opscopilot_rag.filters import (
+    apply_filter_fields,
+    build_metadata_filter,
+    matches_filters,
+    normalize_filters,
+    parse_filter_fields,
+)
+from opscopilot_rag.indexing import build_index_documents
+from opscopilot_rag.local_store import LocalVectorStore, LocalVectorStoreWriter
+from opscopilot_rag.opensearch_client import build_index_body, ensure_index, filtered_knn_engine
+from opscopilot_rag.retrieval import build_knn_query
+from opscopilot_rag.types import (
+    Chunk,
+    EmbeddingResult,
+    FilterField,
+    IndexedChunk,
+    KnnMethodConfig,
+)
+
+
+def test_parse_filter_fields_reads_path_segments_and_bare_names():
+    fields = parse_filter_fields("team=path:0, product=path:-1,section")
+    assert fields == (
+        FilterField("team", 0),
+        FilterField("product", -1),
+        FilterField("section"),
+    )
+    assert parse_filter_fields(None) == ()
+
+
+@pytest.mark.parametrize("value", ["team=tag:0", "team=path:x", "=path:0", "source"])
+def test_parse_filter_fields_rejects_invalid_specs(value):
+    with pytest.raises(ValueError):
+        parse_filter_fields(value)
+
+
+def test_apply_filter_fields_derives_keywords_from_directories():
+    fields = parse_filter_fields("team=path:0,product=path:1,area=path:5")
+    metadata = apply_filter_fields({"source": "payments/checkout/runbook.md"}, fields)
+    assert metadata == {
+        "source": "payments/checkout/runbook.md",
+        "team": "payments",
+        "product": "checkout",
+    }
+
+
+def test_build_metadata_filter_uses_terms_for_lists():
+    clause = build_metadata_filter(
+        {"team": "payments", "source": ["b.md", "a.md"], "product": [], "area": None}
+    )
+    assert clause == {
+        "bool": {
+            "filter": [
+                {"terms": {"source": ["a.md", "b.md"]}},
+                {"term": {"metadata.team": "payments"}},
+            ]
+        }
+    }
+    assert build_metadata_filter({}) is None
+    assert normalize_filters({"team": ["b", "a"]}) == normalize_filters({"team": ["a", "b"]})
+
+
+def test_matches_filters_checks_top_level_and_metadata_fields():
+    row = {"source": "a.md", "metadata": {"team": "payments", "tags": ["db", "oncall"]}}
+    assert matches_filters(row, normalize_filters({"team": "payments", "tags": "db"}))
+    assert not matches_filters(row, normalize_filters({"source": "b.md"}))
+    assert not matches_filters(row, normalize_filters({"product": "checkout"}))
+
+
+def test_knn_query_applies_filter_inside_knn_clause():
+    query = build_knn_query([0.1, 0.2], top_k=4, filters={"team": "payments"})
+    knn = query["query"]["knn"]["embedding"]
+    assert knn["filter"] == {"bool": {"filter": [{"term": {"metadata.team": "payments"}}]}}
+    assert "post_filter" not in query
+    assert "filter" not in build_knn_query([0.1, 0.2], top_k=4)["query"]["knn"]["embedding"]
+
+
+def test_index_body_maps_filter_fields_as_keywords():
+    body = build_index_body(8, filter_fields=parse_filter_fields("team=path:0,section"))
+    assert body["mappings"]["properties"]["metadata"] == {
+        "type": "object",
+        "properties": {"team": {"type": "keyword"}, "section": {"type": "keyword"}},
+    }
+    assert build_index_body(8)["mappings"]["properties"]["metadata"] == {"type": "object"}
+
+
+class FakeIndices:
+    def __init__(self, conflict=False, engine="lucene"):
+        self.conflict = conflict
+        self.engine = engine
+        self.mappings = []
+
+    def exists(self, index):
+        return True
+
+    def get_mapping(self, index):
+        method = {"name": "hnsw", "engine": self.engine} if self.engine else {"name": "hnsw"}
+        embedding = {"type": "knn_vector", "dimension": 8, "method": method}
+        return {index: {"mappings": {"properties": {"embedding": embedding}}}}
+
+    def put_mapping(self, index, body):
+        if self.conflict:
+            raise RequestError(400, "illegal_argument_exception", {})
+        self.mappings.append(body)
+
+
+class FakeClient:
+    def __init__(self, conflict=False, engine="lucene"):
+        self.indices = FakeIndices(conflict, engine)
+
+
+def test_ensure_index_adds_filter_fields_to_existing_index():
+    client = FakeClient()
+    ensure_index(client, "docs", 8, filter_fields=(FilterField("team", 0),))
+    metadata = {"type": "object", "properties": {"team": {"type": "keyword"}}}
+    assert client.indices.mappings == [{"properties": {"metadata": metadata}}]
+    with pytest.raises(RuntimeError, match="--rebuild"):
+        ensure_index(FakeClient(conflict=True), "docs", 8, filter_fields=(FilterField("team"),))
+
+
+@pytest.mark.parametrize("engine", ["nmslib", None])
+def test_ensure_index_rejects_filter_fields_on_nmslib_index(engine):
+    client = FakeClient(engine=engine)
+    with pytest.raises(RuntimeError, match="nmslib engine"):
+        ensure_index(client, "docs", 8, filter_fields=(FilterField("team"),))
+    assert client.indices.mappings == []
+
+
+def test_index_body_with_filter_fields_uses_a_filtering_engine():
+    fields = parse_filter_fields("team=path:0")
+    method = build_index_body(8, filter_fields=fields)["mappings"]["properties"]["embedding"]
+    assert method["method"] == {"name": "hnsw", "engine": "lucene"}
+    faiss = build_index_body(8, knn=KnnMethodConfig(engine="faiss", m=16), filter_fields=fields)
+    assert faiss["mappings"]["properties"]["embedding"]["method"]["engine"] == "faiss"
+    assert "method" not in build_index_body(8)["mappings"]["properties"]["embedding"]
+    with pytest.raises(ValueError, match="nmslib engine rejects"):
+        build_index_body(8, knn=KnnMethodConfig(engine="nmslib"), filter_fields=fields)
+    with pytest.raises(ValueError, match="lucene or faiss"):
+        filtered_knn_engine(KnnMethodConfig(engine="nmslib"))
+
+
+def test_index_documents_carry_derived_filter_fields():
+    chunk = Chunk(
+        document_id="payments/runbook.md",
+        chunk_id="payments/runbook.md::chunk-0",
+        index=0,
+        text="restart the worker",
+        metadata={"source": "payments/runbook.md", "chunk_index": 0},
+    )
+    embeddings = EmbeddingResult(vectors=np.ones((1, 4)), model_id="test", dimensions=4)
+    documents = build_index_documents(
+        [chunk], embeddings, filter_fields=parse_filter_fields("team=path:0")
+    )
+    assert documents[0].metadata["team"] == "payments"
+
+
+def test_local_store_filters_before_ranking(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((40, 8)).astype(np.float32)
+    writer = LocalVectorStoreWriter(tmp_path)
+    writer.add(
+        IndexedChunk(
+            document_id=f"doc-{i}",
+            chunk_id=f"doc-{i}::chunk-0",
+            chunk_index=0,
+            source=f"{'payments' if i % 4 == 0 else 'search'}/doc-{i}.md",
+            text=f"text {i}",
+            metadata={"team": "payments" if i % 4 == 0 else "search"},
+            embedding=vector,
+        )
+        for i, vector in enumerate(vectors)
+    )
+    writer.commit()
+    store = LocalVectorStore(tmp_path)
+    query = vectors[1]
+
+    results = store.search(query, top_k=3, filters={"team": "payments"})
+
+    allowed = np.arange(0, 40, 4)
+    similarity = vectors[allowed] @ query / (
+        np.linalg.norm(vectors[allowed], axis=1) * np.linalg.norm(query)
+    )
+    expected = [f"doc-{allowed[i]}::chunk-0" for i in np.argsort(-similarity)[:3]]
+    assert [result.chunk_id for result in results] == expected
+    assert store.search(query, top_k=3, filters={"team": "billing"}) == []
@@ -0,0 +1,39 @@
+import pytest
+
+from opscopilot_rag.fusion import reciprocal_rank_fusion
+from opscopilot_rag.types import RetrievalResult
+
+
+def _result(chunk_id, score=1.0):
+    return RetrievalResult(
+        document_id=chunk_id.split("::")[0],
+        chunk_id=chunk_id,
+        chunk_index=0,
+        source="doc.md",
+        text=chunk_id,
+        metadata={},
+        score=score,
+    )
+
+
+def test_rrf_rewards_chunks_found_by_several_queries():
+    fused = reciprocal_rank_fusion(
+        [
+            [_result("a::0"), _result("b::0"), _result("c::0")],
+            [_result("c::0"), _result("d::0")],
+        ],
+        k=60,
+    )
+    assert [result.chunk_id for result in fused][:2] == ["c::0", "a::0"]
+    assert fused[0].score == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_rrf_weights_and_limit():
+    fused = reciprocal_rank_fusion(
+        [[_result("a::0")], [_result("b::0")]],
+        weights=[0.5, 1.0],
+        limit=1,
+    )
+    assert [result.chunk_id for result in fused] == ["b::0"]
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([[_result("a::0")]], weights=[1.0, 2.0])
@@ -1,4 +1,7 @@
-from opscopilot_rag.indexing import build_index_documents
+import numpy as np
+import pytest
+
+from opscopilot_rag.indexing import _build_upsert_action, build_index_documents
 from opscopilot_rag.types import Chunk, EmbeddingResult
 
 
@@ -10,7 +13,8 @@ def test_build_index_documents_maps_embeddings():
     embeddings = EmbeddingResult(vectors=[[0.1], [0.2]], model_id="m", dimensions=1)
     documents = build_index_documents(chunks, embeddings)
     assert documents[0].chunk_id == "doc::chunk-0"
-    assert documents[1].embedding == [0.2]
+    assert documents[1].embedding.dtype == np.float32
+    assert documents[1].embedding.tolist() == pytest.approx([0.2])
 
 
 def test_build_index_documents_length_mismatch():
@@ -22,3 +26,14 @@ def test_build_index_documents_length_mismatch():
         assert "length mismatch" in str(exc)
     else:
         raise AssertionError("expected ValueError")
+
+
+def test_bulk_upsert_serializes_vectors_as_lists():
+    chunks = [Chunk(document_id="doc", chunk_id="doc::chunk-0", index=0, text="a", metadata={})]
+    embeddings = EmbeddingResult(
+        vectors=np.array([[0.5, 0.25]], dtype=np.float32), model_id="m", dimensions=2
+    )
+    document = build_index_documents(chunks, embeddings)[0]
+    action = _build_upsert_action("idx", document)
+    assert action["_source"]["embedding"] == [0.5, 0.25]
+    assert type(action["_source"]["embedding"][0]) is float
@@ -0,0 +1,33 @@
+import pytest
+
+from opscopilot_rag.cli import ingest
+
+
+def _fail(*_args, **_kwargs):
+    raise AssertionError("clients must not be built before documents are found")
+
+
+def test_ingest_without_documents_exits_before_building_clients(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(ingest, "OpenSearchClient", _fail)
+    monkeypatch.setattr(ingest, "OpenAIEmbeddingAdapter", _fail)
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+    args = ingest.build_arg_parser().parse_args(["--root", str(tmp_path), "--extensions", ".md"])
+
+    assert ingest.ingest_documents(args) == 1
+    assert capsys.readouterr().out == "No documents found to ingest.\n"
+
+
+def test_ingest_rejects_invalid_flag_combinations_before_discovery(tmp_path):
+    args = ingest.build_arg_parser().parse_args(
+        ["--root", str(tmp_path / "missing"), "--incremental", "--rebuild", "--manifest", "m"]
+    )
+    with pytest.raises(RuntimeError, match="cannot be combined"):
+        ingest.ingest_documents(args)
+
+
+def test_ingest_rejects_filter_fields_on_nmslib_before_discovery(tmp_path):
+    args = ingest.build_arg_parser().parse_args(
+        ["--root", str(tmp_path), "--filter-fields", "team=path:0", "--knn-engine", "nmslib"]
+    )
+    with pytest.raises(ValueError, match="nmslib engine rejects"):
+        ingest.ingest_documents(args)
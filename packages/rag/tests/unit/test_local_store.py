@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from opscopilot_rag.backends import LocalBackend, retrieval_backend_from_env
+from opscopilot_rag.local_store import LocalVectorStore, LocalVectorStoreWriter
+from opscopilot_rag.types import IndexedChunk, KnnMethodConfig
+
+
+def _docs(vectors: np.ndarray, prefix: str = "doc") -> list[IndexedChunk]:
+    return [
+        IndexedChunk(
+            document_id=prefix,
+            chunk_id=f"{prefix}::chunk-{i}",
+            chunk_index=i,
+            source=f"{prefix}.md",
+            text=f"text {i}",
+            metadata={"source": f"{prefix}.md"},
+            embedding=vector,
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def _write(path, vectors, space_type="cosinesimil", prefix="doc", keep_generations=1):
+    writer = LocalVectorStoreWriter(
+        path,
+        knn=KnnMethodConfig(space_type=space_type),
+        keep_generations=keep_generations,
+    )
+    writer.add(_docs(vectors[:3], prefix))
+    writer.add(_docs(vectors, prefix)[3:])
+    return writer
+
+
+@pytest.mark.parametrize("space_type", ["cosinesimil", "innerproduct", "l2"])
+def test_search_matches_brute_force(tmp_path, space_type):
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    query = rng.standard_normal(8).astype(np.float32)
+    _write(tmp_path, vectors, space_type).commit()
+
+    results = LocalVectorStore(tmp_path).search(query, top_k=5)
+
+    if space_type == "cosinesimil":
+        similarity = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    elif space_type == "innerproduct":
+        similarity = vectors @ query
+    else:
+        similarity = -np.sum((vectors - query) ** 2, axis=1)
+    expected = [f"doc::chunk-{i}" for i in np.argsort(-similarity)[:5]]
+    assert [result.chunk_id for result in results] == expected
+    scores = [result.score for result in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_metadata_updates_are_persisted(tmp_path):
+    writer = _write(tmp_path, np.eye(4, dtype=np.float32))
+    assert writer.update_metadata([("doc::chunk-1", {"duplicate_sources": ["b.md"]})]) == 1
+    writer.commit()
+    result = LocalVectorStore(tmp_path).search(np.array([0, 1, 0, 0]), top_k=1)[0]
+    assert result.metadata == {"source": "doc.md", "duplicate_sources": ["b.md"]}
+
+
+def test_store_reloads_new_generation_and_prunes_old_ones(tmp_path):
+    _write(tmp_path, np.eye(4, dtype=np.float32), prefix="old").commit()
+    store = LocalVectorStore(tmp_path, reload_interval_s=0)
+    first = store.generation()
+    _write(tmp_path, np.eye(4, dtype=np.float32), prefix="new").commit()
+    _write(tmp_path, np.eye(4, dtype=np.float32), prefix="newest", keep_generations=0).commit()
+    assert store.generation() != first
+    assert store.search(np.array([1, 0, 0, 0]), top_k=1)[0].document_id == "newest"
+    assert len([entry for entry in tmp_path.iterdir() if entry.is_dir()]) == 1
+
+
+def test_backend_from_env_selects_local_store(tmp_path, monkeypatch):
+    _write(tmp_path, np.eye(4, dtype=np.float32)).commit()
+    monkeypatch.setenv("RAG_BACKEND", "local")
+    monkeypatch.setenv("RAG_LOCAL_STORE_PATH", str(tmp_path))
+    backend = retrieval_backend_from_env()
+    assert isinstance(backend, LocalBackend)
+    assert backend.search([0, 0, 1, 0], top_k=1)[0].chunk_id == "doc::chunk-2"
@@ -0,0 +1,89 @@
+from opscopilot_rag.chunking import chunk_text
+from opscopilot_rag.manifest import IncrementalPlanner, IngestManifest
+from opscopilot_rag.pipeline import iter_chunked_documents
+from opscopilot_rag.types import ChunkingConfig, Document
+
+SETTINGS = {"model_id": "m", "chunk_size": 4, "chunk_overlap": 0}
+
+
+def _chunker(document):
+    return chunk_text(
+        document.document_id,
+        document.content,
+        chunk_size=4,
+        chunk_overlap=0,
+        metadata=document.metadata,
+    )
+
+
+def _doc(document_id, content):
+    return Document(
+        document_id=document_id,
+        source_path=document_id,
+        content=content,
+        metadata={"source": document_id},
+    )
+
+
+def _run(manifest, documents, settings=SETTINGS):
+    planner = IncrementalPlanner(manifest, settings)
+    changed = list(planner.iter_changed_chunks((doc, _chunker(doc)) for doc in documents))
+    return planner, changed
+
+
+def test_incremental_planner_emits_only_changed_chunks(tmp_path):
+    path = tmp_path / "manifest.json"
+    planner, changed = _run(IngestManifest.load(path), [_doc("a", "aaaabbbb"), _doc("b", "cccc")])
+    assert [chunk.chunk_id for chunk in changed] == ["a::chunk-0", "a::chunk-1", "b::chunk-0"]
+    planner.current.save(path)
+
+    planner, changed = _run(IngestManifest.load(path), [_doc("a", "aaaaXXXX"), _doc("b", "cccc")])
+    assert [chunk.chunk_id for chunk in changed] == ["a::chunk-1"]
+    assert planner.unchanged_documents == 1
+    assert planner.orphaned_chunk_ids() == []
+
+
+def test_incremental_planner_reports_orphaned_chunks(tmp_path):
+    path = tmp_path / "manifest.json"
+    planner, _ = _run(IngestManifest(), [_doc("a", "aaaabbbbcccc"), _doc("gone", "dddd")])
+    planner.current.save(path)
+
+    planner, changed = _run(IngestManifest.load(path), [_doc("a", "aaaa")])
+    assert changed == []
+    assert sorted(planner.orphaned_chunk_ids()) == ["a::chunk-1", "a::chunk-2", "gone::chunk-0"]
+    assert set(planner.current.documents) == {"a"}
+
+
+def test_incremental_planner_reembeds_when_settings_change():
+    planner, _ = _run(IngestManifest(), [_doc("a", "aaaa")])
+    planner, changed = _run(planner.current, [_doc("a", "aaaa")], settings={**SETTINGS, "model_id": "n"})
+    assert [chunk.chunk_id for chunk in changed] == ["a::chunk-0"]
+
+
+def test_incremental_planner_skips_chunking_unchanged_documents(tmp_path):
+    (tmp_path / "a.md").write_text("aaaa bbbb", encoding="utf-8")
+    (tmp_path / "b.md").write_text("cccc", encoding="utf-8")
+    config = ChunkingConfig(strategy="fixed", chunk_size=4, chunk_overlap=0)
+    planner = IncrementalPlanner(IngestManifest(), SETTINGS)
+    list(planner.iter_changed_chunks(iter_chunked_documents(tmp_path, config)))
+    (tmp_path / "b.md").write_text("dddd", encoding="utf-8")
+
+    planner = IncrementalPlanner(planner.current, SETTINGS)
+    for workers in (1, 2):
+        chunked = list(
+            iter_chunked_documents(
+                tmp_path,
+                config,
+                workers=workers,
+                known_hashes=planner.known_content_hashes(),
+            )
+        )
+        assert [(doc.document_id, len(chunks)) for doc, chunks in chunked] == [
+            ("a.md", 0),
+            ("b.md", 1),
+        ]
+    changed = list(planner.iter_changed_chunks(chunked))
+    assert [chunk.chunk_id for chunk in changed] == ["b.md::chunk-0"]
+    assert planner.unchanged_documents == 1
+    assert planner.current.documents["a.md"] == planner.previous.documents["a.md"]
+    assert IncrementalPlanner(planner.current, {"model_id": "n"}).known_content_hashes() == {}
@@ -0,0 +1,210 @@
+from datetime import datetime, timezone
+
+import pytest
+from opensearchpy.exceptions import NotFoundError
+
+from opscopilot_rag.opensearch_client import (
+    build_index_body,
+    bulk_load_settings,
+    check_alias_target,
+    generation_index_name,
+    list_index_generations,
+    mark_index_generation,
+    prune_index_generations,
+    read_index_generation,
+    resolve_alias,
+    swap_alias,
+)
+from opscopilot_rag.types import KnnMethodConfig
+
+
+class FakeIndices:
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.calls: list[tuple] = []
+
+    def get_settings(self, index):
+        return {"physical-index": {"settings": {"index": dict(self.settings)}}}
+
+    def put_settings(self, index, body):
+        self.calls.append(("put_settings", body["index"]))
+
+    def refresh(self, index):
+        self.calls.append(("refresh",))
+
+    def forcemerge(self, index, max_num_segments):
+        self.calls.append(("forcemerge", max_num_segments))
+
+
+class FakeClient:
+    def __init__(self, settings: dict):
+        self.indices = FakeIndices(settings)
+
+
+def test_build_index_body_defaults_to_engine_settings():
+    body = build_index_body(3)
+    assert body["settings"] == {"index.knn": True}
+    assert "method" not in body["mappings"]["properties"]["embedding"]
+
+
+def test_build_index_body_applies_hnsw_parameters():
+    knn = KnnMethodConfig(engine="faiss", space_type="innerproduct", m=32, ef_construction=256, ef_search=64)
+    body = build_index_body(3, knn=knn)
+    method = body["mappings"]["properties"]["embedding"]["method"]
+    assert method == {
+        "name": "hnsw",
+        "engine": "faiss",
+        "space_type": "innerproduct",
+        "parameters": {"m": 32, "ef_construction": 256},
+    }
+    assert body["settings"]["index.knn.algo_param.ef_search"] == 64
+
+
+def test_bulk_load_settings_restores_and_force_merges():
+    client = FakeClient({"refresh_interval": "5s", "number_of_replicas": "2"})
+    with bulk_load_settings(client, "docs", force_merge_segments=1):
+        assert client.indices.calls == [
+            ("put_settings", {"refresh_interval": "-1", "number_of_replicas": 0})
+        ]
+    assert client.indices.calls[1:] == [
+        ("put_settings", {"refresh_interval": "5s", "number_of_replicas": "2"}),
+        ("refresh",),
+        ("forcemerge", 1),
+    ]
+
+
+def test_bulk_load_settings_restores_without_merging_on_failure():
+    client = FakeClient({"number_of_replicas": "1"})
+    try:
+        with bulk_load_settings(client, "docs", force_merge_segments=1):
+            raise RuntimeError("ingest failed")
+    except RuntimeError:
+        pass
+    assert ("put_settings", {"refresh_interval": None, "number_of_replicas": "1"}) in client.indices.calls
+    assert all(call[0] != "forcemerge" for call in client.indices.calls)
+
+
+class FakeAliasIndices:
+    def __init__(self, indices: dict[str, set[str]]):
+        self.indices = indices
+        self.deleted: list[str] = []
+        self.alias_updates: list[list[dict]] = []
+
+    def exists(self, index):
+        return index in self.indices or self.exists_alias(index)
+
+    def exists_alias(self, name):
+        return any(name in aliases for aliases in self.indices.values())
+
+    def get_alias(self, name):
+        found = {index: {} for index, aliases in self.indices.items() if name in aliases}
+        if not found:
+            raise NotFoundError(404, "alias_missing", {})
+        return found
+
+    def get(self, index):
+        prefix = index.rstrip("*")
+        return {name: {} for name in self.indices if name.startswith(prefix)}
+
+    def update_aliases(self, body):
+        self.alias_updates.append(body["actions"])
+        for action in body["actions"]:
+            for verb, spec in action.items():
+                if verb == "remove_index":
+                    del self.indices[spec["index"]]
+                    continue
+                aliases = self.indices[spec["index"]]
+                if verb == "add":
+                    aliases.add(spec["alias"])
+                else:
+                    aliases.discard(spec["alias"])
+
+    def delete(self, index):
+        self.deleted.append(index)
+        del self.indices[index]
+
+    def put_mapping(self, index, body):
+        self.meta = {index: body["_meta"]}
+
+    def get_mapping(self, index):
+        names = [name for name, aliases in self.indices.items() if index == name or index in aliases]
+        if not names:
+            raise NotFoundError(404, "index_not_found", {})
+        meta = getattr(self, "meta", {})
+        return {name: {"mappings": {"_meta": meta.get(name, {})}} for name in names}
+
+
+class FakeAliasClient:
+    def __init__(self, indices):
+        self.indices = FakeAliasIndices(indices)
+
+
+def test_generation_index_name_is_sortable():
+    first = generation_index_name("docs", datetime(2026, 1, 2, tzinfo=timezone.utc))
+    second = generation_index_name("docs", datetime(2026, 1, 3, tzinfo=timezone.utc))
+    assert first.startswith("docs-g2026")
+    assert first < second
+
+
+def _generation(alias, day):
+    return generation_index_name(alias, datetime(2026, 1, day, tzinfo=timezone.utc))
+
+
+def test_swap_alias_moves_alias_atomically_and_prunes_old_generations():
+    g1, g2, g3 = (_generation("docs", day) for day in (1, 2, 3))
+    client = FakeAliasClient({g1: set(), g2: {"docs"}, g3: set()})
+    previous = swap_alias(client, "docs", g3)
+    assert previous == [g2]
+    assert client.indices.alias_updates == [
+        [
+            {"remove": {"index": g2, "alias": "docs"}},
+            {"add": {"index": g3, "alias": "docs"}},
+        ]
+    ]
+    assert resolve_alias(client, "docs") == [g3]
+    assert prune_index_generations(client, "docs", keep=1) == [g1]
+    assert set(client.indices.indices) == {g2, g3}
+
+
+def test_prune_index_generations_ignores_lookalike_indices():
+    g1, g2, g3 = (_generation("docs", day) for day in (1, 2, 3))
+    lookalikes = {"docs-glossary", "docs-g1", f"{g1}-backup", _generation("docs-gx", 1)}
+    indices = {name: set() for name in lookalikes}
+    client = FakeAliasClient({**indices, g1: set(), g2: set(), g3: {"docs"}})
+    assert list_index_generations(client, "docs") == [g1, g2, g3]
+    assert prune_index_generations(client, "docs", keep=0) == [g2, g1]
+    assert set(client.indices.indices) == lookalikes | {g3}
+
+
+def test_swap_alias_refuses_to_shadow_concrete_index():
+    client = FakeAliasClient({"docs": set(), "docs-g1": set()})
+    try:
+        swap_alias(client, "docs", "docs-g1")
+    except RuntimeError as exc:
+        assert "concrete index" in str(exc)
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_swap_alias_replaces_concrete_index_in_one_atomic_update():
+    client = FakeAliasClient({"docs": set(), "docs-g1": set()})
+    with pytest.raises(RuntimeError, match="--replace-concrete-index"):
+        check_alias_target(client, "docs")
+    check_alias_target(client, "docs", replace_concrete=True)
+    assert swap_alias(client, "docs", "docs-g1", replace_concrete=True) == ["docs"]
+    assert client.indices.alias_updates == [
+        [{"remove_index": {"index": "docs"}}, {"add": {"index": "docs-g1", "alias": "docs"}}]
+    ]
+
+
+def test_index_generation_marker_tracks_alias_target_and_meta():
+    client = FakeAliasClient({"docs-g1": {"docs"}, "docs-g2": set()})
+    before = read_index_generation(client, "docs")
+    mark_index_generation(client, "docs-g1", generation="42")
+    marked = read_index_generation(client, "docs")
+    swap_alias(client, "docs", "docs-g2")
+    swapped = read_index_generation(client, "docs")
+    assert before == "docs-g1:"
+    assert marked == "docs-g1:42"
+    assert swapped == "docs-g2:"
+    assert read_index_generation(client, "missing") is None
@@ -0,0 +1,49 @@
+import time
+
+from opscopilot_rag.pipeline import iter_batches, iter_chunked_documents, prefetch
+from opscopilot_rag.types import ChunkingConfig
+
+
+def test_iter_batches_streams_fixed_size_batches():
+    batches = list(iter_batches(iter(range(5)), batch_size=2))
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_prefetch_bounds_pending_items():
+    produced = []
+
+    def _source():
+        for value in range(10):
+            produced.append(value)
+            yield value
+
+    stream = prefetch(_source(), max_pending=2)
+    assert next(stream) == 0
+    time.sleep(0.2)
+    assert len(produced) <= 4
+    assert list(stream) == list(range(1, 10))
+
+
+def test_prefetch_propagates_producer_errors():
+    def _source():
+        yield 1
+        raise RuntimeError("boom")
+
+    stream = prefetch(_source(), max_pending=1)
+    assert next(stream) == 1
+    try:
+        next(stream)
+    except RuntimeError as exc:
+        assert "boom" in str(exc)
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_iter_chunked_documents_workers_match_serial_order(tmp_path):
+    for index in range(7):
+        (tmp_path / f"doc-{index}.md").write_text(f"# Doc {index}\n\n" + "body text " * (index + 5))
+    config = ChunkingConfig(strategy="fixed", chunk_size=40, chunk_overlap=5)
+    serial = list(iter_chunked_documents(tmp_path, config))
+    parallel = list(iter_chunked_documents(tmp_path, config, workers=2, shard_size=2))
+    assert [doc.document_id for doc, _ in parallel] == [f"doc-{i}.md" for i in range(7)]
+    assert parallel == serial
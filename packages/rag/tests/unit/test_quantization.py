@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+from opensearchpy.exceptions import NotFoundError
+
+from opscopilot_rag.backends import OpenSearchBackend
+from opscopilot_rag.benchmarks import run_quantization_benchmark, synthetic_vectors
+from opscopilot_rag.indexing import build_index_documents
+from opscopilot_rag.opensearch_client import (
+    build_index_body,
+    ensure_index,
+    mark_index_generation,
+    read_quantization_scale,
+)
+from opscopilot_rag.quantization import (
+    calibrate_byte_scale,
+    count_clipped,
+    estimate_native_memory_bytes,
+    quantize_matrix,
+    quantize_vector,
+)
+from opscopilot_rag.retrieval import build_knn_query
+from opscopilot_rag.types import (
+    Chunk,
+    EmbeddingResult,
+    KnnMethodConfig,
+    RetrievalOptions,
+)
+
+
+def test_fp16_mapping_uses_faiss_scalar_quantizer():
+    body = build_index_body(4, knn=KnnMethodConfig(quantization="fp16"))
+    method = body["mappings"]["properties"]["embedding"]["method"]
+    assert method["engine"] == "faiss"
+    assert method["parameters"]["encoder"] == {"name": "sq", "parameters": {"type": "fp16"}}
+
+
+def test_byte_mapping_sets_data_type_and_rejects_other_engines():
+    body = build_index_body(4, knn=KnnMethodConfig(quantization="byte"))
+    embedding = body["mappings"]["properties"]["embedding"]
+    assert embedding["data_type"] == "byte"
+    assert embedding["method"]["engine"] == "lucene"
+    with pytest.raises(ValueError):
+        build_index_body(4, knn=KnnMethodConfig(engine="nmslib", quantization="byte"))
+
+
+def test_pq_mapping_requires_a_trained_model():
+    body = build_index_body(4, knn=KnnMethodConfig(quantization="pq", model_id="pq-model"))
+    assert body["mappings"]["properties"]["embedding"] == {
+        "type": "knn_vector",
+        "model_id": "pq-model",
+    }
+    with pytest.raises(ValueError):
+        build_index_body(4, knn=KnnMethodConfig(quantization="pq"))
+
+
+def test_byte_quantization_scales_and_clips():
+    quantized = quantize_matrix(np.array([[0.5, -0.25, 2.0]], dtype=np.float32), "byte", 100)
+    assert quantized.dtype == np.int8
+    assert quantized.tolist() == [[50, -25, 127]]
+    assert calibrate_byte_scale(np.array([[0.5, -0.5]]), quantile=1.0) == pytest.approx(254.0)
+    assert count_clipped(np.array([[0.5, -1.3, 2.0, -1.28]]), 100) == 2
+
+
+def test_index_documents_and_queries_share_quantization():
+    chunks = [Chunk(document_id="doc", chunk_id="doc::chunk-0", index=0, text="t", metadata={})]
+    embeddings = EmbeddingResult(vectors=np.array([[0.1, -0.2]]), model_id="m", dimensions=2)
+    knn = KnnMethodConfig(quantization="byte", quantization_scale=100)
+    documents = build_index_documents(chunks, embeddings, knn=knn)
+    assert documents[0].embedding.tolist() == [10, -20]
+    query = build_knn_query(
+        [0.1, -0.2],
+        top_k=1,
+        options=RetrievalOptions(quantization="byte", quantization_scale=100),
+    )
+    assert query["query"]["knn"]["embedding"]["vector"] == [10, -20]
+    assert quantize_vector([1.0, 2.0], None).tolist() == [1.0, 2.0]
+
+
+def test_quantization_report_trades_recall_for_memory():
+    vectors = synthetic_vectors(520, 32, seed=3)
+    results = run_quantization_benchmark(vectors[:500], vectors[500:], top_k=5)
+    by_mode = {result.mode: result for result in results}
+    assert by_mode["none"].recall_at_k == 1.0
+    assert by_mode["byte"].recall_at_k > 0.8
+    assert by_mode["byte"].scale is not None
+    assert by_mode["byte"].native_memory_bytes < by_mode["none"].native_memory_bytes
+    assert estimate_native_memory_bytes(1000, 768, "pq") < estimate_native_memory_bytes(
+        1000, 768, "byte"
+    )
+
+
+class FakeMetaIndices:
+    def __init__(self, meta=None):
+        self.meta = meta
+
+    def exists(self, index):
+        return self.meta is not None
+
+    def get_mapping(self, index):
+        if self.meta is None:
+            raise NotFoundError(404, "index_not_found", {})
+        return {index: {"mappings": {"_meta": dict(self.meta)}}}
+
+    def put_mapping(self, index, body):
+        self.meta = body["_meta"]
+
+
+class FakeMetaClient:
+    def __init__(self, meta=None):
+        self.indices = FakeMetaIndices(meta)
+
+
+def test_byte_scale_is_stored_in_index_meta_and_checked():
+    knn = KnnMethodConfig(quantization="byte", quantization_scale=250.0)
+    assert build_index_body(4, knn=knn)["mappings"]["_meta"] == {"quantization_scale": 250.0}
+    client = FakeMetaClient({"generation": "g1"})
+    ensure_index(client, "docs", 4, knn=knn)
+    assert client.indices.meta == {"generation": "g1", "quantization_scale": 250.0}
+    mark_index_generation(client, "docs", generation="g2")
+    assert read_quantization_scale(client, "docs") == 250.0
+    with pytest.raises(RuntimeError, match="share one scale"):
+        ensure_index(
+            client, "docs", 4, knn=KnnMethodConfig(quantization="byte", quantization_scale=127.0)
+        )
+    with pytest.raises(ValueError):
+        build_index_documents(
+            [], EmbeddingResult(vectors=np.empty((0, 4)), model_id="m", dimensions=4),
+            knn=KnnMethodConfig(quantization="byte"),
+        )
+
+
+def test_opensearch_backend_reads_byte_scale_from_index_meta():
+    client = FakeMetaClient({"quantization_scale": 250.0})
+    backend = OpenSearchBackend(client, "docs", RetrievalOptions(quantization="byte"))
+    assert backend._search_options().quantization_scale == 250.0
+    with pytest.raises(RuntimeError, match="RAG_KNN_QUANTIZATION_SCALE"):
+        OpenSearchBackend(
+            FakeMetaClient({}), "docs", RetrievalOptions(quantization="byte")
+        )._search_options()
@@ -0,0 +1,62 @@
+from opscopilot_rag.query_cache import QueryResultCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_query("  Why is my pod   CrashLooping? ") == "why is my pod crashlooping"
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = QueryResultCache(ttl_s=10, clock=clock)
+    cache.put("q", "context")
+    clock.now = 9
+    assert cache.get("q") == "context"
+    clock.now = 11
+    assert cache.get("q") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_generation_change_clears_cache_at_most_once_per_interval():
+    clock = FakeClock()
+    cache = QueryResultCache(generation_check_interval_s=30, clock=clock)
+    generations = ["g1"]
+    calls = []
+
+    def _loader():
+        calls.append(clock.now)
+        return generations[0]
+
+    cache.refresh_generation(_loader)
+    cache.put("q", "old")
+    generations[0] = "g2"
+    clock.now = 10
+    cache.refresh_generation(_loader)
+    assert cache.get("q") == "old"
+    clock.now = 31
+    cache.refresh_generation(_loader)
+    assert cache.get("q") is None
+    assert calls == [0.0, 31]
+
+
+def test_disabled_cache_stores_nothing():
+    cache = QueryResultCache(max_entries=0)
+    cache.put("q", "context")
+    assert cache.get("q") is None
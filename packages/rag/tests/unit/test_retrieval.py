@@ -1,7 +1,145 @@
-from opscopilot_rag.retrieval import build_knn_query
+import asyncio
+
+import numpy as np
+import pytest
+
+from opscopilot_rag.backends import OpenSearchBackend
+from opscopilot_rag.retrieval import (
+    RETRIEVAL_SOURCE_FIELDS,
+    aretrieve_knn,
+    build_knn_query,
+    retrieve_knn,
+    retrieve_knn_many,
+    truncate_text,
+)
+from opscopilot_rag.types import RetrievalOptions
 
 
 def test_build_knn_query_includes_vector():
     query = build_knn_query([0.1, 0.2], top_k=3)
     assert query["size"] == 3
     assert query["query"]["knn"]["embedding"]["vector"] == [0.1, 0.2]
+
+
+def test_build_knn_query_serializes_float32_vectors():
+    query = build_knn_query(np.array([0.5, 0.25], dtype=np.float32), top_k=1)
+    assert query["query"]["knn"]["embedding"]["vector"] == [0.5, 0.25]
+
+
+class FakeSearchClient:
+    def __init__(self, response):
+        self.response = response
+        self.bodies = []
+
+    def search(self, index, body):
+        self.bodies.append(body)
+        return self.response
+
+
+def test_build_knn_query_projects_source_and_excludes_vectors():
+    query = build_knn_query([0.1], top_k=1)
+    assert query["_source"] == {
+        "includes": list(RETRIEVAL_SOURCE_FIELDS),
+        "excludes": ["embedding"],
+    }
+    assert "highlight" not in query
+
+
+def test_build_knn_query_keeps_embedding_when_requested():
+    query = build_knn_query([0.1], top_k=1, source_includes=["chunk_id", "embedding"])
+    assert query["_source"] == {"includes": ["chunk_id", "embedding"]}
+
+
+def test_truncate_mode_moves_text_into_a_server_side_window():
+    query = build_knn_query([0.1], top_k=1, options=RetrievalOptions(text_mode="truncate"))
+    assert "text" not in query["_source"]["includes"]
+    field = query["highlight"]["fields"]["text"]
+    assert field["no_match_size"] == 600
+    assert field["highlight_query"] == {"match_none": {}}
+
+
+def test_retrieve_knn_uses_highlight_fragments_as_text():
+    client = FakeSearchClient(
+        {
+            "hits": {
+                "hits": [
+                    {
+                        "_score": 0.9,
+                        "_source": {"chunk_id": "doc::chunk-0", "source": "doc.md"},
+                        "highlight": {"text": ["restart the pod", "check the probe"]},
+                    }
+                ]
+            }
+        }
+    )
+    options = RetrievalOptions(text_mode="highlight", max_text_chars=200, fragments=2)
+    results = retrieve_knn(client, "idx", [0.1], 1, options=options, query_text="restart pod")
+    field = client.bodies[0]["highlight"]["fields"]["text"]
+    assert field["highlight_query"] == {"match": {"text": "restart pod"}}
+    assert field["fragment_size"] == 100
+    assert results[0].text == "restart the pod … check the probe"
+
+
+def test_truncate_text_cuts_on_word_boundary():
+    assert truncate_text("restart the deployment now", 14) == "restart the"
+    assert truncate_text("short", 14) == "short"
+
+
+class FakeAsyncSearchClient(FakeSearchClient):
+    async def search(self, index, body):
+        return FakeSearchClient.search(self, index, body)
+
+
+_HIT = {
+    "hits": {
+        "hits": [
+            {
+                "_score": 0.8,
+                "_source": {"document_id": "doc", "chunk_id": "doc::chunk-0", "text": "restart"},
+            }
+        ]
+    }
+}
+
+
+def test_aretrieve_knn_awaits_async_client():
+    client = FakeAsyncSearchClient(_HIT)
+    results = asyncio.run(aretrieve_knn(client, "docs", [0.1], top_k=1))
+    assert [r.chunk_id for r in results] == ["doc::chunk-0"]
+    assert client.bodies[0]["size"] == 1
+
+
+def test_opensearch_backend_asearch_falls_back_to_sync_client():
+    backend = OpenSearchBackend(FakeSearchClient(_HIT), "docs")
+    results = asyncio.run(backend.asearch([0.1], top_k=1))
+    assert results[0].text == "restart"
+    async_backend = OpenSearchBackend(None, "docs", async_client=FakeAsyncSearchClient(_HIT))
+    assert asyncio.run(async_backend.asearch([0.1], top_k=1))[0].score == 0.8
+
+
+class FakeMultiSearchClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.bodies = []
+
+    def msearch(self, body):
+        self.bodies.append(body)
+        return {"responses": self.responses}
+
+
+def test_retrieve_knn_many_sends_one_msearch_request():
+    client = FakeMultiSearchClient([_HIT, {"hits": {"hits": []}}])
+    results = retrieve_knn_many(
+        client, "docs", [[0.1], [0.2]], top_k=2, query_texts=["restart", "prod"]
+    )
+    assert [[r.chunk_id for r in hits] for hits in results] == [["doc::chunk-0"], []]
+    assert len(client.bodies) == 1
+    body = client.bodies[0]
+    assert body[0] == {"index": "docs"} and body[2] == {"index": "docs"}
+    assert body[3]["query"]["knn"]["embedding"]["vector"] == [0.2]
+
+
+def test_retrieve_knn_many_raises_on_sub_query_errors():
+    client = FakeMultiSearchClient([{"error": {"type": "search_phase_execution_exception"}}])
+    with pytest.raises(RuntimeError):
+        retrieve_knn_many(client, "docs", [[0.1]], top_k=1)
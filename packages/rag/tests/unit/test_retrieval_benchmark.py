@@ -0,0 +1,77 @@
+import numpy as np
+
+from opscopilot_rag.benchmarks import (
+    RetrievalBenchmarkConfig,
+    exact_top_k,
+    local_search,
+    opensearch_search,
+    recall_at_k,
+    run_retrieval_benchmark,
+    synthesize_queries,
+)
+from opscopilot_rag.local_store import LocalVectorStore, LocalVectorStoreWriter
+from opscopilot_rag.types import IndexedChunk
+
+
+def test_exact_top_k_and_recall():
+    corpus = np.eye(4, dtype=np.float32)
+    queries = np.array([[0.9, 0.1, 0.0, 0.0], [0.0, 0.0, 0.2, 0.8]], dtype=np.float32)
+    truth = exact_top_k(corpus, queries, 2)
+    assert truth.tolist() == [[0, 1], [3, 2]]
+    assert recall_at_k(truth, [[0, 3], [3, 2]]) == 0.75
+
+
+def test_local_exact_search_has_full_recall(tmp_path):
+    rng = np.random.default_rng(5)
+    vectors = rng.standard_normal((60, 8)).astype(np.float32)
+    writer = LocalVectorStoreWriter(tmp_path)
+    writer.add(
+        IndexedChunk(
+            document_id="doc",
+            chunk_id=f"doc::chunk-{i}",
+            chunk_index=i,
+            source="doc.md",
+            text="word " * 200,
+            metadata={},
+            embedding=vector,
+        )
+        for i, vector in enumerate(vectors)
+    )
+    writer.commit()
+    store = LocalVectorStore(tmp_path)
+    chunk_ids, stored, space_type = store.snapshot()
+    queries = synthesize_queries(chunk_ids, stored, count=10, noise=0.01)
+    results = run_retrieval_benchmark(
+        chunk_ids,
+        stored,
+        queries,
+        [
+            RetrievalBenchmarkConfig(top_k=5),
+            RetrievalBenchmarkConfig(top_k=5, text_mode="truncate"),
+        ],
+        local_search(store),
+        space_type=space_type,
+    )
+    assert [result.recall_at_k for result in results] == [1.0, 1.0]
+    assert results[0].label_recall == 1.0
+    assert results[1].mean_response_bytes < results[0].mean_response_bytes
+    assert results[0].p99_ms >= results[0].p50_ms
+
+
+class FakeSearchClient:
+    def __init__(self):
+        self.bodies = []
+
+    def search(self, index, body):
+        self.bodies.append(body)
+        return {"hits": {"hits": [{"_score": 1.0, "_source": {"chunk_id": "a"}}]}}
+
+
+def test_opensearch_search_records_response_bytes_and_ef_search():
+    client = FakeSearchClient()
+    search = opensearch_search(client, "docs")
+    results, size = search(np.ones(2, dtype=np.float32), None, RetrievalBenchmarkConfig(3, 64))
+    assert [result.chunk_id for result in results] == ["a"]
+    assert size > 0
+    knn = client.bodies[0]["query"]["knn"]["embedding"]
+    assert knn["method_parameters"] == {"ef_search": 64}